@@ -11,7 +11,10 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
+from urllib.parse import urlparse
 import os
+import sys
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -48,6 +51,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'inventory',
     'users',
     'simple_history',
@@ -62,6 +66,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'inventory.caching.RequestMemoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'simple_history.middleware.HistoryRequestMiddleware',
@@ -101,6 +106,56 @@ DATABASES = {
     )
 }
 
+# Optional separate database for the audit trail (django-simple-history tables).
+# Run `manage.py migrate --database=history` after enabling it.
+HISTORY_DATABASE_URL = os.getenv('HISTORY_DATABASE_URL')
+if HISTORY_DATABASE_URL:
+    DATABASES['history'] = dj_database_url.parse(
+        HISTORY_DATABASE_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    DATABASE_ROUTERS = ['inventory.routers.HistoryRouter']
+
+
+# Cache shared by all workers (settings, area maps, reports, QR codes).
+# CACHE_URL selects the backend:
+#   redis://host:6379/0        Redis (requires the redis package)
+#   memcached://host:11211     Memcached, several hosts comma separated (requires pymemcache)
+#   file:///var/cache/hfps     Files on disk, shared by the workers of one host
+#                              (default: hfps_tic_cache in the system temp directory)
+#   db://cache_table           Table in the default database (run `manage.py createcachetable`)
+#   locmem://                  Memory of each process, nothing shared
+# `manage.py test` always uses locmem://, so test runs never clear or fill the
+# cache of a running instance.
+TESTING = sys.argv[1:2] == ['test']
+if TESTING:
+    CACHE_URL = urlparse('locmem://')
+else:
+    CACHE_URL = urlparse(os.getenv('CACHE_URL', f"file://{Path(tempfile.gettempdir()) / 'hfps_tic_cache'}"))
+CACHE_BACKENDS = {
+    'redis': ('django.core.cache.backends.redis.RedisCache', CACHE_URL.geturl()),
+    'rediss': ('django.core.cache.backends.redis.RedisCache', CACHE_URL.geturl()),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', CACHE_URL.netloc.split(',')),
+    'file': ('inventory.caching.FileBasedCache', CACHE_URL.path),
+    'db': ('django.core.cache.backends.db.DatabaseCache', CACHE_URL.netloc or CACHE_URL.path.strip('/')),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', CACHE_URL.netloc),
+}
+if CACHE_URL.scheme not in CACHE_BACKENDS:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured(f"Unsupported CACHE_URL scheme: {CACHE_URL.scheme!r}")
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_URL.scheme][0],
+        'LOCATION': CACHE_BACKENDS[CACHE_URL.scheme][1],
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'hfps'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+if CACHE_URL.scheme in ('file', 'db', 'locmem'):
+    # The default cap of 300 entries is below one label sheet of QR images.
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 20000))}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -156,6 +211,11 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# History archive: history rows older than the retention period are moved
+# to compressed files here by `manage.py archive_history`.
+HISTORY_ARCHIVE_ROOT = Path(os.getenv('HISTORY_ARCHIVE_ROOT', BASE_DIR / 'history_archive'))
+HISTORY_RETENTION_MONTHS = int(os.getenv('HISTORY_RETENTION_MONTHS', 24))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -34,6 +34,7 @@ urlpatterns = [
     path('accounts/', include('django.contrib.auth.urls')),
     path('users/', include('users.urls')),
     path('', include('inventory.urls')),
+    path('api/sync/', views_api.OfflineSyncView.as_view(), name='api_offline_sync'),
     path('api/', include(router.urls)),
     path('api-auth/', include('rest_framework.urls')),
     path('favicon.ico', favicon_view),
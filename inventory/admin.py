@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Area, Equipment, Peripheral, Maintenance, Handover, CostCenter, Client, Technician, PeripheralType, HandoverPeripheral, EquipmentRound, OwnershipType
+from .models import Area, Equipment, Peripheral, Maintenance, Handover, CostCenter, Client, Technician, PeripheralType, HandoverPeripheral, EquipmentRound, OwnershipType, MaintenanceRecurrence, AlertLog, AlertSubscription, HistoryArchive, StockMovement, StockBalance, StockForecast, BulkOperation, SyncedRecord
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from .utils import export_to_excel
@@ -117,6 +117,58 @@ class MaintenanceAdmin(admin.ModelAdmin):
         return format_html('<a class="button" href="{}" target="_blank">Generar Acta</a>', url)
     acta_link.short_description = "Acta"
 
+@admin.register(MaintenanceRecurrence)
+class MaintenanceRecurrenceAdmin(admin.ModelAdmin):
+    list_display = ('equipment', 'area', 'start_date', 'interval_months', 'end_date', 'is_active')
+    list_filter = ('is_active', 'area')
+    search_fields = ('equipment__serial_number', 'area__name')
+
+@admin.register(AlertLog)
+class AlertLogAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'equipment', 'due_date', 'recipient', 'sent_at')
+    list_filter = ('kind', 'due_date')
+    search_fields = ('equipment__serial_number', 'recipient')
+    date_hierarchy = 'sent_at'
+
+@admin.register(AlertSubscription)
+class AlertSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'is_active')
+    list_filter = ('is_active', 'areas')
+    filter_horizontal = ('areas',)
+
+@admin.register(HistoryArchive)
+class HistoryArchiveAdmin(admin.ModelAdmin):
+    list_display = ('model_name', 'first_date', 'last_date', 'row_count', 'path', 'created_at')
+    list_filter = ('model_name',)
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('date', 'peripheral', 'area', 'kind', 'quantity', 'balance_after', 'performed_by')
+    list_filter = ('kind', 'area')
+    search_fields = ('peripheral__serial_number', 'peripheral__brand', 'peripheral__model', 'note')
+    date_hierarchy = 'date'
+    list_select_related = ('peripheral', 'area', 'performed_by')
+
+    def has_change_permission(self, request, obj=None):
+        # The ledger is append-only; corrections are new ADJUSTMENT movements.
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(StockBalance)
+class StockBalanceAdmin(admin.ModelAdmin):
+    list_display = ('peripheral', 'area', 'quantity', 'updated_at')
+    list_filter = ('area',)
+    search_fields = ('peripheral__serial_number', 'peripheral__brand', 'peripheral__model')
+    list_select_related = ('peripheral', 'area')
+
+@admin.register(StockForecast)
+class StockForecastAdmin(admin.ModelAdmin):
+    list_display = ('peripheral', 'stock', 'daily_rate', 'stockout_date', 'reorder_point', 'reorder_quantity', 'computed_at')
+    search_fields = ('peripheral__serial_number', 'peripheral__brand', 'peripheral__model')
+    list_select_related = ('peripheral__type',)
+
 class HandoverPeripheralInline(admin.TabularInline):
     model = HandoverPeripheral
     extra = 1
@@ -136,6 +188,28 @@ class HandoverAdmin(admin.ModelAdmin):
         return format_html('<a class="button" href="{}" target="_blank">Generar Acta</a>', url)
     acta_link.short_description = "Acta"
 
+@admin.register(BulkOperation)
+class BulkOperationAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'action', 'date', 'area', 'status', 'performed_by', 'acta_link')
+    list_filter = ('action', 'date', 'area')
+    search_fields = ('reason', 'performed_by__username')
+    date_hierarchy = 'date'
+    readonly_fields = ('acta_pdf',)
+    filter_horizontal = ('equipment', 'peripherals')
+
+    def acta_link(self, obj):
+        url = reverse('inventory:bulk_action_acta', args=[obj.pk])
+        return format_html('<a class="button" href="{}" target="_blank">Ver Acta</a>', url)
+    acta_link.short_description = "Acta"
+
+@admin.register(SyncedRecord)
+class SyncedRecordAdmin(admin.ModelAdmin):
+    list_display = ('client_id', 'kind', 'object_id', 'user', 'synced_at')
+    list_filter = ('kind', 'synced_at')
+    search_fields = ('client_id', 'user__username')
+    date_hierarchy = 'synced_at'
+    readonly_fields = ('client_id', 'kind', 'object_id', 'user', 'synced_at')
+
 @admin.register(EquipmentRound)
 class EquipmentRoundAdmin(admin.ModelAdmin):
     list_display = ('equipment', 'datetime', 'performed_by', 'general_status', 'powers_on', 'network_status')
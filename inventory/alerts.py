@@ -0,0 +1,218 @@
+"""
+Alert engine for e-mail notifications (maintenance due, warranties expiring).
+
+Both management commands (send_alerts, send_notifications) go through this
+module. Due items are found with date-window range queries instead of exact
+date matches, and every alert sent is stored in AlertLog, so a day skipped by
+cron is caught up on the next run and nothing is sent twice.
+
+Each recipient only gets the areas they subscribe to (AlertSubscription), and
+all digests of a run are sent over a single mail connection.
+"""
+import logging
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .choices import ALERT_KIND_CHOICES
+from .models import Equipment, AlertLog, AlertSubscription
+from .services import expand_maintenance_schedule
+
+logger = logging.getLogger('inventory')
+
+# Days ahead of the due date at which each kind of alert starts being sent.
+ALERT_LEAD_DAYS = {
+    'MAINTENANCE_UPCOMING': 3,
+    'MAINTENANCE_TODAY': 0,
+    'WARRANTY_EXPIRING': 30,
+}
+
+# Alerts whose due date already passed are still sent for this many days
+# (e.g. when cron did not run), unless they are in the AlertLog.
+ALERT_GRACE_DAYS = 7
+
+ALERT_KIND_LABELS = dict(ALERT_KIND_CHOICES)
+
+
+def alert_window(kind, today):
+    """Return the (start, end) due-date window scanned for an alert kind."""
+    return today - timedelta(days=ALERT_GRACE_DAYS), today + timedelta(days=ALERT_LEAD_DAYS[kind])
+
+
+def collect_due_items(kinds, today=None):
+    """
+    Return the items due for the given alert kinds, each with
+    kind, equipment, equipment_id and due_date. One range query per source.
+    """
+    today = today or timezone.now().date()
+    items = []
+
+    maintenance_kinds = [k for k in kinds if k.startswith('MAINTENANCE_')]
+    if maintenance_kinds:
+        start = min(alert_window(k, today)[0] for k in maintenance_kinds)
+        end = max(alert_window(k, today)[1] for k in maintenance_kinds)
+        schedules = expand_maintenance_schedule(start, end, status='PENDING')
+        for kind in maintenance_kinds:
+            k_start, k_end = alert_window(kind, today)
+            items.extend(
+                SimpleNamespace(kind=kind, equipment=s.equipment, equipment_id=s.equipment_id, due_date=s.scheduled_date)
+                for s in schedules
+                if k_start <= s.scheduled_date <= k_end
+            )
+
+    if 'WARRANTY_EXPIRING' in kinds:
+        start, end = alert_window('WARRANTY_EXPIRING', today)
+        expiring = Equipment.objects.filter(
+            warranty_expiry__range=[start, end]
+        ).exclude(status='RETIRED').select_related('area').order_by('warranty_expiry')
+        items.extend(
+            SimpleNamespace(kind='WARRANTY_EXPIRING', equipment=e, equipment_id=e.pk, due_date=e.warranty_expiry)
+            for e in expiring
+        )
+
+    return items
+
+
+def build_area_recipient_index():
+    """
+    Return (global_recipients, {area_id: recipients}) for routing alerts.
+
+    Global recipients get every area: active staff users without a
+    subscription and subscriptions with no areas selected. Users with an
+    inactive subscription are opted out. Built with three flat queries.
+    """
+    subscriptions = dict(AlertSubscription.objects.values_list('user_id', 'is_active'))
+    active_users = User.objects.filter(is_active=True).exclude(email='')
+
+    global_recipients = set(
+        active_users.filter(is_staff=True).exclude(pk__in=subscriptions).values_list('email', flat=True)
+    )
+    subscribed = dict(active_users.filter(pk__in=[u for u, active in subscriptions.items() if active]).values_list('pk', 'email'))
+
+    index = {}
+    with_areas = set()
+    links = AlertSubscription.areas.through.objects.filter(
+        alertsubscription__user_id__in=subscribed
+    ).values_list('alertsubscription__user_id', 'area_id')
+    for user_id, area_id in links:
+        index.setdefault(area_id, set()).add(subscribed[user_id])
+        with_areas.add(user_id)
+    global_recipients.update(email for user_id, email in subscribed.items() if user_id not in with_areas)
+    return global_recipients, index
+
+
+def build_digests(kinds, recipients=None, today=None):
+    """
+    Return {recipient: [items]} with the due items each recipient has not been
+    alerted about yet. Already-sent alerts are read with a single query.
+
+    When recipients is given every recipient gets all items; otherwise items
+    are routed through the area subscription index.
+    """
+    today = today or timezone.now().date()
+    items = collect_due_items(kinds, today)
+    if not items:
+        return {}
+
+    if recipients is not None:
+        global_recipients, index = {r for r in recipients if r}, {}
+    else:
+        global_recipients, index = build_area_recipient_index()
+    all_recipients = global_recipients.union(*index.values())
+    if not all_recipients:
+        return {}
+
+    already_sent = set(AlertLog.objects.filter(
+        kind__in=kinds,
+        recipient__in=all_recipients,
+        due_date__range=[min(i.due_date for i in items), max(i.due_date for i in items)],
+    ).values_list('kind', 'equipment_id', 'due_date', 'recipient'))
+
+    digests = {}
+    for item in items:
+        for recipient in global_recipients | index.get(item.equipment.area_id, set()):
+            if (item.kind, item.equipment_id, item.due_date, recipient) not in already_sent:
+                digests.setdefault(recipient, []).append(item)
+    return dict(sorted(digests.items()))
+
+
+def format_digest(items, today=None):
+    """Build (subject, body) for one recipient's digest, grouped by alert kind."""
+    today = today or timezone.now().date()
+    sections = []
+    for kind, label in ALERT_KIND_CHOICES:
+        kind_items = sorted((i for i in items if i.kind == kind), key=lambda i: i.due_date)
+        if not kind_items:
+            continue
+        lines = []
+        for i in kind_items:
+            eq = i.equipment
+            area_name = eq.area.name if eq.area else "Sin Área"
+            overdue = " (VENCIDO)" if i.due_date < today else ""
+            lines.append(f"- {eq.brand} {eq.model} (Serial: {eq.serial_number}, {area_name}): {i.due_date}{overdue}")
+        sections.append(f"{label} ({len(kind_items)}):\n" + "\n".join(lines))
+
+    subject = f"🔔 Alertas HFPS: {len(items)} pendientes ({today})"
+    body = "\n\n".join([
+        "Hola,",
+        "Los siguientes equipos requieren su atención:",
+        *sections,
+        "Sistema de Gestión de Inventario",
+    ])
+    return subject, body
+
+
+def send_alert_digests(kinds, recipients=None, today=None, from_email=None, connection=None):
+    """
+    Send one digest per recipient over a single mail connection and log every
+    alert sent.
+
+    All messages are built first and the connection is opened once. Returns a
+    summary dict: items (alerts sent), digests (e-mails sent), failed. A digest
+    that fails to send is not logged, so it is retried on the next run.
+    """
+    today = today or timezone.now().date()
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL or 'admin@hfps.com'
+
+    summary = {'items': 0, 'digests': 0, 'failed': 0}
+    outgoing = []
+    for recipient, items in build_digests(kinds, recipients, today).items():
+        subject, body = format_digest(items, today)
+        outgoing.append((items, EmailMessage(subject, body, from_email, [recipient])))
+    if not outgoing:
+        return summary
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Error opening mail connection for alert digests: {e}")
+        summary['failed'] = len(outgoing)
+        return summary
+
+    logs = []
+    try:
+        for items, message in outgoing:
+            # Sent one by one over the open connection so a failure is
+            # attributed to its own digest and the rest still go out.
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                logger.error(f"Error sending alert digest to {message.to[0]}: {e}")
+                summary['failed'] += 1
+                continue
+            logs.extend(
+                AlertLog(kind=i.kind, equipment_id=i.equipment_id, due_date=i.due_date, recipient=message.to[0])
+                for i in items
+            )
+            summary['items'] += len(items)
+            summary['digests'] += 1
+    finally:
+        connection.close()
+
+    AlertLog.objects.bulk_create(logs, ignore_conflicts=True)
+    return summary
@@ -0,0 +1,37 @@
+"""
+Equipment/peripheral -> area maps used by the handover form.
+
+The form preselects the source area when an item is chosen. The maps are
+built with two values_list queries, cached under a version number
+(inventory/caching.py) and served as a separate JSON resource whose ETag is
+that version, so the form page itself no longer grows with the inventory. Signals bump the version
+whenever an equipment or peripheral is created, deleted or may have changed
+area; code that moves areas with queryset.update() must call
+bump_area_maps_version() itself.
+"""
+from .caching import bump_version, get_or_build, get_version
+from .models import Equipment, Peripheral
+
+AREA_MAPS_NAMESPACE = 'area_maps'
+
+
+def get_area_maps_version():
+    return get_version(AREA_MAPS_NAMESPACE)
+
+
+def bump_area_maps_version():
+    """Invalidate the cached maps once the current transaction commits."""
+    bump_version(AREA_MAPS_NAMESPACE)
+
+
+def build_area_maps():
+    return {
+        'equipment': dict(Equipment.objects.filter(area__isnull=False).values_list('id', 'area_id')),
+        'peripheral': dict(Peripheral.objects.filter(area__isnull=False).values_list('id', 'area_id')),
+    }
+
+
+def get_area_maps():
+    """Return (version, {'equipment': {id: area_id}, 'peripheral': {id: area_id}})."""
+    version = get_area_maps_version()
+    return version, get_or_build(AREA_MAPS_NAMESPACE, build_area_maps, version=version)
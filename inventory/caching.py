@@ -0,0 +1,117 @@
+"""
+Versioned cache entries shared by every worker.
+
+Each namespace ('area_maps', 'system_settings', ...) has a version number
+stored in the shared cache (settings.CACHES, see CACHE_URL). Entries are
+keyed by namespace, version and parts, so invalidating a namespace is one
+bump_version() call: workers compute new keys on their next read and the
+old entries simply expire.
+
+Within a request, get_or_build() results are also memoized by
+RequestMemoMiddleware, so a value used by the view, the templates and the
+context processors is fetched from the shared cache only once.
+"""
+import time
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.core.cache.backends import filebased
+from django.db import transaction
+
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+_MISSING = object()
+# {(namespace, version, parts): value} for the current request, None outside one.
+_request_memo = ContextVar('inventory_request_memo', default=None)
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    """
+    Django's file cache, but the entry count is checked every CULL_EVERY
+    writes instead of on each one: the stock backend lists the whole
+    directory per set(), which made storing a sheet of QR images quadratic.
+    """
+    CULL_EVERY = 100
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._writes = 0
+
+    def _cull(self):
+        self._writes += 1
+        if self._writes % self.CULL_EVERY == 0:
+            super()._cull()
+
+
+class RequestMemoMiddleware:
+    """Give each request its own get_or_build() memo."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_memo.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            _request_memo.reset(token)
+
+
+def version_key(namespace):
+    return f'inventory:{namespace}:version'
+
+
+def get_version(namespace):
+    key = version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seeded from the clock so a lost key never reuses an old version.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(namespace):
+    key = version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key evicted or never set.
+        cache.set(key, time.time_ns(), timeout=None)
+    memo = _request_memo.get()
+    if memo:
+        for memo_key in [k for k in memo if k[0] == namespace]:
+            del memo[memo_key]
+
+
+def bump_version(namespace):
+    """Invalidate every entry of namespace once the current transaction commits."""
+    transaction.on_commit(lambda: _bump(namespace))
+
+
+def make_key(namespace, *parts, version=None):
+    if version is None:
+        version = get_version(namespace)
+    return ':'.join(['inventory', namespace, str(version), *map(str, parts)])
+
+
+def get_or_build(namespace, builder, *parts, version=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the entry of namespace/parts at the current (or given) version,
+    calling builder() and storing its result on a miss.
+    """
+    if version is None:
+        version = get_version(namespace)
+    memo = _request_memo.get()
+    memo_key = (namespace, version, parts)
+    if memo is not None and memo_key in memo:
+        return memo[memo_key]
+
+    key = make_key(namespace, *parts, version=version)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = builder()
+        cache.set(key, value, timeout=timeout)
+    if memo is not None:
+        memo[memo_key] = value
+    return value
@@ -60,3 +60,39 @@ COMPONENT_ACTION_CHOICES = [
     ('REPLACED', 'Reemplazado'),
     ('UPGRADED', 'Mejorado / Actualizado'),
 ]
+
+ALERT_KIND_CHOICES = [
+    ('MAINTENANCE_UPCOMING', 'Mantenimiento Próximo'),
+    ('MAINTENANCE_TODAY', 'Mantenimiento Programado para Hoy'),
+    ('WARRANTY_EXPIRING', 'Vencimiento de Garantía'),
+]
+
+EQUIPMENT_EVENT_TYPE_CHOICES = [
+    ('ENTRY', 'Registro Inicial'),
+    ('MAINTENANCE', 'Mantenimiento'),
+    ('HANDOVER', 'Acta de Entrega'),
+    ('ROUND', 'Ronda'),
+    ('COMPONENT', 'Cambio de Componente'),
+    ('RETIREMENT', 'Baja'),
+]
+
+STOCK_MOVEMENT_KIND_CHOICES = [
+    ('RECEIPT', 'Ingreso'),
+    ('HANDOVER', 'Entrega'),
+    ('COMPONENT', 'Instalación de Componente'),
+    ('RETIREMENT', 'Baja'),
+    ('ADJUSTMENT', 'Ajuste'),
+    ('TRANSFER', 'Traslado entre Áreas'),
+]
+
+BULK_ACTION_CHOICES = [
+    ('REASSIGN', 'Reasignación de Área'),
+    ('STATUS', 'Cambio de Estado'),
+    ('RETIRE', 'Baja Masiva'),
+]
+
+OFFLINE_RECORD_KIND_CHOICES = [
+    ('ROUND', 'Ronda'),
+    ('COMPONENT_LOG', 'Cambio de Componente'),
+    ('MAINTENANCE', 'Mantenimiento'),
+]
@@ -1,9 +1,12 @@
+from django.utils.functional import SimpleLazyObject
+
 from .models import SystemSettings
 
 def system_settings(request):
     """
     Context processor to make the active System Settings available to all templates.
+    Lazy, so pages that never use it do not even hit the cache.
     """
     return {
-        'system_settings': SystemSettings.load()
+        'system_settings': SimpleLazyObject(SystemSettings.load)
     }
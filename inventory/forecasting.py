@@ -0,0 +1,154 @@
+"""
+Consumption-rate forecasting for peripheral reorder points.
+
+Daily consumption per SKU is taken from the quantities delivered in handovers
+(HandoverPeripheral) and used in component changes (ComponentLog) over a
+trailing window. Both sources are loaded with two flat queries and pivoted
+into a SKU x day matrix, so the rates, days to stockout and reorder
+quantities of the whole catalogue are computed in one vectorized pass.
+
+The nightly forecast_peripheral_stock command stores the table in
+StockForecast; the dashboard only reads that table.
+"""
+import logging
+import math
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Peripheral, HandoverPeripheral, ComponentLog, StockForecast
+
+logger = logging.getLogger('inventory')
+
+# Trailing days of consumption used to compute the rates.
+FORECAST_WINDOW_DAYS = 90
+# Days between placing an order and receiving it.
+FORECAST_LEAD_TIME_DAYS = 14
+# Days of consumption a reorder should cover once received.
+FORECAST_COVER_DAYS = 30
+# Safety stock factor over the daily demand deviation (~95% service level).
+FORECAST_SERVICE_FACTOR = 1.65
+# Projected stockouts within this many days are shown on the dashboard.
+FORECAST_ALERT_DAYS = 30
+
+REORDER_COLUMNS = [
+    'stock', 'min_stock_level', 'daily_rate', 'daily_std',
+    'days_to_stockout', 'stockout_date', 'reorder_point', 'reorder_quantity',
+]
+
+
+def consumption_frame(start, end):
+    """
+    Return a DataFrame (peripheral_id, day, quantity) with every unit
+    consumed between the start and end dates, from both sources. Only
+    component logs that install a part count; removals are not consumption.
+    """
+    handovers = HandoverPeripheral.objects.annotate(day=TruncDate('handover__date')).filter(
+        day__range=[start, end]
+    ).values_list('peripheral_id', 'day', 'quantity')
+    components = ComponentLog.objects.filter(
+        peripheral__isnull=False, action_type__in=['ADDED', 'REPLACED']
+    ).annotate(day=TruncDate('date')).filter(
+        day__range=[start, end]
+    ).values_list('peripheral_id', 'day', 'quantity')
+
+    frame = pd.DataFrame([*handovers, *components], columns=['peripheral_id', 'day', 'quantity'])
+    frame['day'] = pd.to_datetime(frame['day'])
+    return frame
+
+
+def daily_consumption_matrix(frame, start, end):
+    """Pivot the consumption frame to a SKU x day matrix, days without use as 0."""
+    days = pd.date_range(start, end, freq='D')
+    if frame.empty:
+        return pd.DataFrame(columns=days, dtype=float)
+    daily = frame.groupby(['peripheral_id', 'day'])['quantity'].sum().unstack(fill_value=0)
+    return daily.reindex(columns=days, fill_value=0).astype(float)
+
+
+def build_reorder_table(today=None, window_days=FORECAST_WINDOW_DAYS, lead_time_days=FORECAST_LEAD_TIME_DAYS,
+                        cover_days=FORECAST_COVER_DAYS, service_factor=FORECAST_SERVICE_FACTOR):
+    """
+    Return the reorder table of every non-retired peripheral as a DataFrame
+    indexed by peripheral_id (columns in REORDER_COLUMNS).
+
+    - daily_rate / daily_std: mean and deviation of the daily consumption.
+    - days_to_stockout: stock / daily_rate (NaN when nothing is consumed).
+    - reorder_point: demand over the lead time + safety stock + min_stock_level.
+    - reorder_quantity: units to order when stock is at or below the reorder
+      point, enough to cover lead time + cover_days; 0 otherwise.
+    """
+    today = today or timezone.localdate()
+    start = today - timedelta(days=window_days - 1)
+
+    stock = pd.DataFrame(
+        Peripheral.objects.exclude(status='RETIRED').annotate(
+            stock=Coalesce(Sum('stock_balances__quantity'), 0)
+        ).values_list('pk', 'stock', 'min_stock_level'),
+        columns=['peripheral_id', 'stock', 'min_stock_level'],
+    ).set_index('peripheral_id')
+    if stock.empty:
+        return pd.DataFrame(columns=REORDER_COLUMNS)
+
+    usage = daily_consumption_matrix(consumption_frame(start, today), start, today)
+    usage = usage.reindex(stock.index, fill_value=0).to_numpy(dtype=float)
+
+    on_hand = stock['stock'].to_numpy(dtype=float)
+    minimum = stock['min_stock_level'].to_numpy(dtype=float)
+    rate = usage.mean(axis=1)
+    std = usage.std(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_left = np.where(rate > 0, on_hand / rate, np.nan)
+    safety = service_factor * std * math.sqrt(lead_time_days)
+    reorder_point = np.ceil(rate * lead_time_days + safety) + minimum
+    target = np.ceil(rate * (lead_time_days + cover_days) + safety) + minimum
+    reorder_quantity = np.where(on_hand <= reorder_point, np.maximum(target - on_hand, 0), 0)
+
+    table = stock.assign(
+        daily_rate=rate,
+        daily_std=std,
+        days_to_stockout=days_left,
+        reorder_point=reorder_point.astype(int),
+        reorder_quantity=reorder_quantity.astype(int),
+    )
+    projected = ~np.isnan(days_left)
+    table['stockout_date'] = pd.Series(pd.NaT, index=table.index, dtype='datetime64[ns]')
+    table.loc[projected, 'stockout_date'] = pd.Timestamp(today) + pd.to_timedelta(np.floor(days_left[projected]), unit='D')
+    return table[REORDER_COLUMNS]
+
+
+def store_stock_forecasts(table, computed_at=None):
+    """Replace the stored StockForecast rows with the given reorder table."""
+    computed_at = computed_at or timezone.now()
+    forecasts = [
+        StockForecast(
+            peripheral_id=peripheral_id,
+            stock=int(row.stock),
+            daily_rate=float(row.daily_rate),
+            days_to_stockout=None if pd.isna(row.days_to_stockout) else float(row.days_to_stockout),
+            stockout_date=None if pd.isna(row.stockout_date) else row.stockout_date.date(),
+            reorder_point=int(row.reorder_point),
+            reorder_quantity=int(row.reorder_quantity),
+            computed_at=computed_at,
+        )
+        for peripheral_id, row in zip(table.index, table.itertuples(index=False))
+    ]
+    with transaction.atomic():
+        StockForecast.objects.all().delete()
+        StockForecast.objects.bulk_create(forecasts, batch_size=500)
+    logger.info(f"Stored {len(forecasts)} peripheral stock forecasts")
+    return len(forecasts)
+
+
+def get_projected_stockouts(days=FORECAST_ALERT_DAYS, today=None):
+    """Stored forecasts of SKUs projected to run out within the next days."""
+    today = today or timezone.localdate()
+    return StockForecast.objects.filter(
+        stockout_date__lte=today + timedelta(days=days)
+    ).exclude(peripheral__status='RETIRED').select_related('peripheral__type').order_by('stockout_date')
@@ -1,7 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
-from .models import Maintenance, Equipment, Area, CostCenter, Peripheral, Handover, Client, PeripheralType, EquipmentRound, ComponentLog, RetirementLog
+from .models import Maintenance, Equipment, Area, CostCenter, Peripheral, Handover, Client, PeripheralType, EquipmentRound, ComponentLog, RetirementLog, MaintenanceRecurrence
 from django.contrib.auth.models import User
+from .widgets import RemoteSelect, RemoteSelectMultiple
+from .choices import BULK_ACTION_CHOICES, EQUIPMENT_STATUS_CHOICES, PERIPHERAL_STATUS_CHOICES
 
 class CustomUserCreationForm(UserCreationForm):
     is_staff = forms.BooleanField(required=False, label="¿Es Administrador?", help_text="Marcar si el usuario puede gestionar otros usuarios y configuraciones.")
@@ -48,6 +50,7 @@ class MaintenanceForm(forms.ModelForm):
         fields = '__all__'
         exclude = ['date', 'acta_pdf', 'performed_by'] # performed_by is usually auto-set to logged user, but for the form we might let them choose or default.
         widgets = {
+            'equipment': RemoteSelect('equipment'),
             'description': forms.Textarea(attrs={'rows': 4}),
             'start_time': forms.TimeInput(attrs={'type': 'time'}),
             'end_time': forms.TimeInput(attrs={'type': 'time'}),
@@ -61,6 +64,23 @@ class MaintenanceForm(forms.ModelForm):
         for field in self.fields:
             if isinstance(self.fields[field].widget, (forms.TextInput, forms.Textarea, forms.Select, forms.TimeInput, forms.DateInput)):
                 self.fields[field].widget.attrs.update({'class': 'form-control'})
+
+class MaintenanceRecurrenceForm(forms.ModelForm):
+    class Meta:
+        model = MaintenanceRecurrence
+        fields = ['equipment', 'area', 'start_date', 'interval_months', 'end_date', 'is_active']
+        widgets = {
+            'equipment': RemoteSelect('equipment', attrs={'class': 'form-select'}),
+            'area': forms.Select(attrs={'class': 'form-select'}),
+            'start_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+            'interval_months': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
+            'end_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+        }
+        help_texts = {
+            'equipment': 'Para un solo equipo. Deje vacío si la regla aplica a toda un área.',
+            'area': 'Aplica a todos los equipos activos del área.',
+        }
+
 class EquipmentForm(forms.ModelForm):
     class Meta:
         model = Equipment
@@ -88,7 +108,7 @@ class PeripheralForm(forms.ModelForm):
             'type': forms.Select(attrs={'class': 'form-select'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
             'min_stock_level': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
-            'connected_to': forms.Select(attrs={'class': 'form-select'}), # Searchable via JS ideally, but select for now
+            'connected_to': RemoteSelect('equipment', attrs={'class': 'form-select'}),
             'area': forms.Select(attrs={'class': 'form-select'}),
         }
     
@@ -134,13 +154,13 @@ class HandoverForm(forms.ModelForm):
             'source_area': forms.Select(attrs={'class': 'form-select'}),
             'destination_area': forms.Select(attrs={'class': 'form-select'}),
             'type': forms.Select(attrs={'class': 'form-select'}),
-            'equipment': forms.SelectMultiple(attrs={'class': 'form-select', 'style': 'height: 200px;'}),
+            'equipment': RemoteSelectMultiple('equipment', attrs={'class': 'form-select'}),
             # Peripherals handled by inline formset
             'observations': forms.Textarea(attrs={'rows': 3, 'class': 'form-control'}),
             'receiver_name': forms.TextInput(attrs={'class': 'form-control'}),
         }
         labels = {
-            'equipment': 'Equipos (Mantenga presionado Ctrl para seleccionar varios)',
+            'equipment': 'Equipos',
         }
 
     def __init__(self, *args, **kwargs):
@@ -167,7 +187,7 @@ class EquipmentRoundForm(forms.ModelForm):
             'printer_status', 'general_status', 'observations'
         ]
         widgets = {
-            'equipment': forms.Select(attrs={'class': 'form-select'}),
+            'equipment': RemoteSelect('equipment', attrs={'class': 'form-select'}),
             'hw_status': forms.Select(attrs={'class': 'form-select'}),
             'powers_on': forms.Select(attrs={'class': 'form-select'}),
             'monitor_status': forms.Select(attrs={'class': 'form-select'}),
@@ -183,14 +203,31 @@ class EquipmentRoundForm(forms.ModelForm):
         }
 
 
+class RoundSheetRowForm(forms.ModelForm):
+    """One equipment row of an area round sheet (the equipment comes from the sheet)."""
+    equipment_id = forms.IntegerField(widget=forms.HiddenInput)
+
+    class Meta:
+        model = EquipmentRound
+        fields = [*EquipmentRound.CHECK_FIELDS, 'general_status', 'observations']
+        widgets = {
+            **{name: forms.Select(attrs={'class': 'form-select'}) for name in EquipmentRound.CHECK_FIELDS},
+            'general_status': forms.Select(attrs={'class': 'form-select'}),
+            'observations': forms.TextInput(attrs={'class': 'form-control'}),
+        }
+
+
+RoundSheetFormSet = forms.formset_factory(RoundSheetRowForm, extra=0)
+
+
 class ComponentLogForm(forms.ModelForm):
     # Field specifically for selecting a peripheral from stock
     peripheral = forms.ModelChoiceField(
-        queryset=Peripheral.objects.filter(quantity__gt=0),
+        queryset=Peripheral.objects.filter(quantity__gt=0).select_related('type'),
         required=False,
         empty_label="--- No aplica (Ingreso manual) ---",
         label="Pieza de Inventario (Opcional)",
-        widget=forms.Select(attrs={'class': 'form-select select2'})
+        widget=RemoteSelect('peripheral', params={'in_stock': 1}, attrs={'class': 'form-select'})
     )
 
     class Meta:
@@ -211,3 +248,71 @@ class RetirementForm(forms.ModelForm):
             'reason': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Ej. Pantalla estrellada, corto circuito interno, obsoleto...'}),
             'photo': forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': 'image/*'}),
         }
+
+
+class BulkActionForm(forms.Form):
+    """Mass reassignment / status change / retirement of equipment and peripherals."""
+    action = forms.ChoiceField(choices=BULK_ACTION_CHOICES, label="Acción",
+                               widget=forms.Select(attrs={'class': 'form-select'}))
+    source_area = forms.ModelChoiceField(
+        queryset=Area.objects.all(), required=False, label="Todos los activos del área",
+        help_text="Incluye todos los equipos y periféricos no dados de baja de esta área.",
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    equipment = forms.ModelMultipleChoiceField(
+        queryset=Equipment.objects.exclude(status='RETIRED'), required=False, label="Equipos",
+        widget=RemoteSelectMultiple('equipment', attrs={'class': 'form-select'}),
+    )
+    peripherals = forms.ModelMultipleChoiceField(
+        queryset=Peripheral.objects.exclude(status='RETIRED').select_related('type'), required=False, label="Periféricos",
+        widget=RemoteSelectMultiple('peripheral', attrs={'class': 'form-select'}),
+    )
+    area = forms.ModelChoiceField(queryset=Area.objects.all(), required=False, label="Área Destino",
+                                  widget=forms.Select(attrs={'class': 'form-select'}))
+    status = forms.ChoiceField(required=False, label="Nuevo Estado", widget=forms.Select(attrs={'class': 'form-select'}))
+    reason = forms.CharField(required=False, label="Justificación",
+                             widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 3}))
+    photo = forms.ImageField(required=False, label="Evidencia Fotográfica",
+                             widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': 'image/*'}))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        statuses = dict(EQUIPMENT_STATUS_CHOICES)
+        statuses.update(dict(PERIPHERAL_STATUS_CHOICES))
+        self.fields['status'].choices = [('', '---------')] + [
+            (value, label) for value, label in statuses.items() if value != 'RETIRED'
+        ]
+
+    def clean(self):
+        cleaned = super().clean()
+        action = cleaned.get('action')
+        equipment = list(cleaned.get('equipment') or [])
+        peripherals = list(cleaned.get('peripherals') or [])
+        area = cleaned.get('source_area')
+        if area:
+            known = {e.pk for e in equipment}
+            equipment += [e for e in Equipment.objects.filter(area=area).exclude(status='RETIRED') if e.pk not in known]
+            known = {p.pk for p in peripherals}
+            peripherals += [p for p in Peripheral.objects.filter(area=area).exclude(status='RETIRED').select_related('type') if p.pk not in known]
+        if not equipment and not peripherals:
+            raise forms.ValidationError("Seleccione al menos un equipo o periférico, o un área de origen.")
+
+        if action == 'REASSIGN' and not cleaned.get('area'):
+            self.add_error('area', "Seleccione el área destino.")
+        if action == 'STATUS':
+            status = cleaned.get('status')
+            if not status:
+                self.add_error('status', "Seleccione el nuevo estado.")
+            elif equipment and status not in dict(EQUIPMENT_STATUS_CHOICES):
+                self.add_error('status', "Estado no válido para equipos.")
+            elif peripherals and status not in dict(PERIPHERAL_STATUS_CHOICES):
+                self.add_error('status', "Estado no válido para periféricos.")
+        if action == 'RETIRE':
+            if not cleaned.get('reason'):
+                self.add_error('reason', "La justificación es obligatoria para la baja.")
+            if not cleaned.get('photo'):
+                self.add_error('photo', "La evidencia fotográfica es obligatoria para la baja.")
+
+        cleaned['equipment_list'] = equipment
+        cleaned['peripheral_list'] = peripherals
+        return cleaned
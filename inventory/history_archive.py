@@ -0,0 +1,177 @@
+"""
+Archival of django-simple-history rows to compressed cold storage.
+
+History rows older than the retention period are streamed into gzip JSONL
+files under settings.HISTORY_ARCHIVE_ROOT, one HistoryArchive row per file,
+and then deleted from the database in small transactions. A file is always
+complete on disk before any of its rows are deleted.
+
+The reader (iter_archived_history) lets the point-in-time snapshots keep
+answering for archived ranges; only files whose date range overlaps the query
+are opened.
+"""
+import datetime
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Equipment, Maintenance, EquipmentRound, ComponentLog, HistoryArchive, InventoryCheckpoint
+
+logger = logging.getLogger('inventory')
+
+ARCHIVED_MODELS = {
+    'equipment': Equipment,
+    'maintenance': Maintenance,
+    'equipmentround': EquipmentRound,
+    'componentlog': ComponentLog,
+}
+
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision (DjangoJSONEncoder truncates to milliseconds)."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def get_archive_root():
+    return Path(getattr(settings, 'HISTORY_ARCHIVE_ROOT', Path(settings.BASE_DIR) / 'history_archive'))
+
+
+def get_retention_cutoff(months=None, now=None):
+    months = getattr(settings, 'HISTORY_RETENTION_MONTHS', 24) if months is None else months
+    return (now or timezone.now()) - relativedelta(months=months)
+
+
+def _history_model(model_name):
+    return ARCHIVED_MODELS[model_name].history.model
+
+
+def _write_archive_file(model_name, rows, stamp, part):
+    """Write rows (dicts) to a new gzip JSONL file and return its relative path."""
+    relative = Path(model_name) / f"{model_name}_{stamp}_{part:04d}.jsonl.gz"
+    target = get_archive_root() / relative
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix('.tmp')
+    with gzip.open(tmp, 'wt', encoding='utf-8') as fh:
+        for row in rows:
+            fh.write(json.dumps(row, cls=ArchiveJSONEncoder))
+            fh.write('\n')
+    # Only a fully written file gets its final name.
+    os.replace(tmp, target)
+    return relative.as_posix()
+
+
+def _checkpoint_versions(cutoff):
+    """
+    history_ids referenced by the checkpoints snapshots after cutoff start
+    from: the last one taken up to cutoff and every later one.
+    """
+    checkpoints = InventoryCheckpoint.objects.all()
+    base = checkpoints.filter(taken_at__lte=cutoff).order_by('-taken_at').values_list('taken_at', flat=True).first()
+    if base is not None:
+        checkpoints = checkpoints.filter(taken_at__gte=base)
+    return {
+        history_id
+        for versions in checkpoints.values_list('equipment_versions', flat=True)
+        for history_id in versions.values()
+    }
+
+
+def archive_history(model_name, cutoff, batch_size=500, rows_per_file=50000, dry_run=False):
+    """
+    Move the superseded history rows of model_name recorded before cutoff to
+    archive files. The newest row of each object and, for equipment, the
+    versions referenced by the checkpoints in use after cutoff are kept, so
+    snapshots after cutoff never read the archive. Returns the number of
+    rows archived (or that would be, with dry_run).
+    """
+    model = _history_model(model_name)
+    latest = model.objects.order_by().values('id').annotate(latest=Max('history_id')).values('latest')
+    history = model.objects.filter(history_date__lt=cutoff).exclude(history_id__in=latest).order_by('history_id')
+    kept = _checkpoint_versions(cutoff) if model_name == 'equipment' else set()
+    if dry_run:
+        return sum(1 for history_id in history.values_list('history_id', flat=True).iterator() if history_id not in kept)
+
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    using = router.db_for_write(model)
+    archived = 0
+    part = 0
+    last_id = 0
+    while True:
+        batch = list(history.filter(history_id__gt=last_id).values()[:rows_per_file])
+        if not batch:
+            break
+        last_id = batch[-1]['history_id']
+        rows = [r for r in batch if r['history_id'] not in kept]
+        if not rows:
+            continue
+        part += 1
+        path = _write_archive_file(model_name, rows, stamp, part)
+        HistoryArchive.objects.create(
+            model_name=model_name,
+            path=path,
+            first_date=min(r['history_date'] for r in rows),
+            last_date=max(r['history_date'] for r in rows),
+            row_count=len(rows),
+        )
+        ids = [r['history_id'] for r in rows]
+        for start in range(0, len(ids), batch_size):
+            with transaction.atomic(using=using):
+                model.objects.filter(history_id__in=ids[start:start + batch_size]).delete()
+        archived += len(rows)
+        logger.info(f"Archived {len(rows)} {model_name} history rows to {path}")
+    return archived
+
+
+def iter_archived_history(model_name, start=None, end=None, ids=None, history_ids=None):
+    """
+    Yield archived history rows as dicts with Python values (dates parsed),
+    ordered by file. Filters: history_date in [start, end], object id in ids,
+    history_id in history_ids.
+    """
+    archives = HistoryArchive.objects.filter(model_name=model_name)
+    if start is not None:
+        archives = archives.filter(last_date__gte=start)
+    if end is not None:
+        archives = archives.filter(first_date__lte=end)
+
+    fields = {f.attname: f for f in _history_model(model_name)._meta.concrete_fields}
+    ids = set(ids) if ids is not None else None
+    history_ids = set(history_ids) if history_ids is not None else None
+    root = get_archive_root()
+    for archive in archives.order_by('first_date'):
+        path = root / archive.path
+        if not path.exists():
+            logger.error(f"History archive file missing: {path}")
+            continue
+        with gzip.open(path, 'rt', encoding='utf-8') as fh:
+            for line in fh:
+                raw = json.loads(line)
+                if ids is not None and raw['id'] not in ids:
+                    continue
+                if history_ids is not None and raw['history_id'] not in history_ids:
+                    continue
+                row = {k: fields[k].to_python(v) if k in fields else v for k, v in raw.items()}
+                if start is not None and row['history_date'] < start:
+                    continue
+                if end is not None and row['history_date'] > end:
+                    continue
+                yield row
+
+
+def archived_history_instances(model_name, **filters):
+    """Archived rows as unsaved Historical* instances, usable like database rows."""
+    model = _history_model(model_name)
+    return [model(**row) for row in iter_archived_history(model_name, **filters)]
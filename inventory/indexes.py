@@ -0,0 +1,30 @@
+"""
+Indexes shared by the models and their migrations.
+"""
+from django.contrib.postgres.indexes import OpClass
+from django.db import models
+
+
+class OpClassIndex(models.Index):
+    """
+    Index whose OpClass() operator classes only apply on PostgreSQL.
+
+    Prefix searches (istartswith compares UPPER() LIKE 'ABC%') can only use
+    an index on PostgreSQL when it has a pattern operator class, e.g.
+    OpClass(Upper('serial_number'), name='text_pattern_ops'). Other
+    databases have no operator classes: they index the plain expressions,
+    so the same migration runs on SQLite.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        expressions = [
+            expression.get_source_expressions()[0] if isinstance(expression, OpClass) else expression
+            for expression in self.expressions
+        ]
+        index = models.Index(
+            *expressions, name=self.name, db_tablespace=self.db_tablespace,
+            condition=self.condition, include=self.include,
+        )
+        return index.create_sql(model, schema_editor, using=using, **kwargs)
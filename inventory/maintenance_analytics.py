@@ -0,0 +1,161 @@
+"""
+Maintenance task-frequency analytics over the acta checklist booleans.
+
+How often each task of Maintenance.TASK_FIELDS is done, per month, per
+area and per technician, and which tasks are done together. Every
+grouping is one aggregate query with a conditional count per task; the
+co-occurrence matrix is one aggregate with a conditional count per pair
+of tasks, so no maintenance row leaves the database.
+
+Results are cached per window under a version bumped when maintenance
+records are saved or deleted; the area-maps version is part of the key,
+so moving equipment to another area also rebuilds them.
+"""
+from itertools import combinations
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+
+from .area_maps import get_area_maps_version
+from .caching import bump_version, get_or_build
+from .models import Maintenance
+
+MAINTENANCE_ANALYTICS_NAMESPACE = 'maintenance_analytics'
+TASK_FIELDS = Maintenance.TASK_FIELDS
+TOP_PAIRS = 15
+
+# Grouping name -> (values() expression, label of rows without value)
+GROUPINGS = {
+    'period': (TruncMonth('date'), None),
+    'area': (F('equipment__area__name'), 'Sin Área'),
+    'technician': (F('performed_by__username'), 'Sin Técnico'),
+}
+
+
+def bump_maintenance_analytics():
+    """Invalidate cached analytics once the current transaction commits."""
+    bump_version(MAINTENANCE_ANALYTICS_NAMESPACE)
+
+
+def _task_counts():
+    # Aliases must not shadow the boolean fields themselves.
+    return {f'n_{field}': Count('id', filter=Q(**{field: True})) for field in TASK_FIELDS}
+
+
+def _row(key, values):
+    total = values['total']
+    counts = [values[f'n_{field}'] for field in TASK_FIELDS]
+    return {
+        'key': key,
+        'total': total,
+        'counts': counts,
+        'rates': [count / total if total else 0 for count in counts],
+    }
+
+
+def task_frequency(queryset, grouping):
+    """Task counts of queryset per group ('period', 'area' or 'technician'): one query."""
+    expression, empty_label = GROUPINGS[grouping]
+    rows = (
+        queryset.order_by().annotate(group=expression).values('group')
+        .annotate(total=Count('id'), **_task_counts())
+        .order_by('group')
+    )
+    result = []
+    for values in rows:
+        key = values['group']
+        if grouping == 'period' and key is not None:
+            key = key.strftime('%Y-%m')
+        result.append(_row(key if key is not None else empty_label, values))
+    if grouping != 'period':
+        result.sort(key=lambda r: -r['total'])
+    return result
+
+
+def task_co_occurrence(queryset, top=TOP_PAIRS):
+    """
+    Pairs of tasks done in the same maintenance, most frequent first, with
+    support (share of all maintenance), confidence (share of the first
+    task's maintenance that also had the second) and lift. One query.
+    """
+    pairs = list(combinations(TASK_FIELDS, 2))
+    aggregates = {f'pair_{i}': Count('id', filter=Q(**{a: True, b: True})) for i, (a, b) in enumerate(pairs)}
+    values = queryset.order_by().aggregate(total=Count('id'), **_task_counts(), **aggregates)
+    total = values['total']
+    result = []
+    for i, (a, b) in enumerate(pairs):
+        together = values[f'pair_{i}']
+        if not together:
+            continue
+        # Confidence from the rarer task: "when A is done, B is done too".
+        if values[f'n_{a}'] > values[f'n_{b}']:
+            a, b = b, a
+        result.append({
+            'task': a,
+            'with_task': b,
+            'count': together,
+            'support': together / total,
+            'confidence': together / values[f'n_{a}'],
+            'lift': together * total / (values[f'n_{a}'] * values[f'n_{b}']),
+        })
+    result.sort(key=lambda p: (-p['count'], -p['lift']))
+    return result[:top]
+
+
+def build_maintenance_task_analytics(start_date, end_date):
+    maintenances = Maintenance.objects.filter(date__range=[start_date, end_date])
+    overall = maintenances.aggregate(total=Count('id'), **_task_counts())
+    tasks = [
+        {'field': field, 'label': str(Maintenance._meta.get_field(field).verbose_name)}
+        for field in TASK_FIELDS
+    ]
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'tasks': tasks,
+        'overall': _row('Total', overall),
+        'by_period': task_frequency(maintenances, 'period'),
+        'by_area': task_frequency(maintenances, 'area'),
+        'by_technician': task_frequency(maintenances, 'technician'),
+        'co_occurrence': task_co_occurrence(maintenances) if overall['total'] else [],
+    }
+
+
+def get_maintenance_task_analytics(start_date, end_date):
+    """Cached build_maintenance_task_analytics() of the window (dates inclusive)."""
+    return get_or_build(
+        MAINTENANCE_ANALYTICS_NAMESPACE,
+        lambda: build_maintenance_task_analytics(start_date, end_date),
+        start_date.isoformat(), end_date.isoformat(), get_area_maps_version(),
+    )
+
+
+def _top_tasks(row, tasks, limit):
+    ranked = sorted(zip(tasks, row['counts'], row['rates']), key=lambda t: -t[1])
+    return [{'label': task['label'], 'count': count, 'rate': rate} for task, count, rate in ranked[:limit] if count]
+
+
+def summarize_task_analytics(analytics, limit=3):
+    """
+    Printable view of get_maintenance_task_analytics(): tasks by frequency,
+    the limit most frequent tasks of each area and technician, and the
+    co-occurring pairs with their task labels.
+    """
+    tasks = analytics['tasks']
+    labels = {task['field']: task['label'] for task in tasks}
+    return {
+        'total': analytics['overall']['total'],
+        'tasks': _top_tasks(analytics['overall'], tasks, len(tasks)),
+        'by_area': [
+            {'key': row['key'], 'total': row['total'], 'top': _top_tasks(row, tasks, limit)}
+            for row in analytics['by_area']
+        ],
+        'by_technician': [
+            {'key': row['key'], 'total': row['total'], 'top': _top_tasks(row, tasks, limit)}
+            for row in analytics['by_technician']
+        ],
+        'pairs': [
+            {**pair, 'task_label': labels[pair['task']], 'with_label': labels[pair['with_task']]}
+            for pair in analytics['co_occurrence']
+        ],
+    }
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from inventory.history_archive import ARCHIVED_MODELS, archive_history, get_retention_cutoff
+from inventory.models import InventoryCheckpoint
+from inventory.snapshots import create_inventory_checkpoint
+
+class Command(BaseCommand):
+    help = 'Moves history rows older than the retention period to compressed archive files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None,
+                            help='Retention period in months (default: settings.HISTORY_RETENTION_MONTHS).')
+        parser.add_argument('--model', action='append', choices=list(ARCHIVED_MODELS), dest='models',
+                            help='Only archive this history table (can be repeated).')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction.')
+        parser.add_argument('--rows-per-file', type=int, default=50000)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived.')
+
+    def handle(self, *args, **options):
+        cutoff = get_retention_cutoff(options['months'])
+        models = options['models'] or list(ARCHIVED_MODELS)
+        self.stdout.write(f"Archiving history recorded before {cutoff:%Y-%m-%d %H:%M}...")
+
+        if 'equipment' in models and not options['dry_run']:
+            # Snapshots after the cutoff then start from this checkpoint and never need the archive.
+            if not InventoryCheckpoint.objects.filter(taken_at=cutoff).exists():
+                create_inventory_checkpoint(cutoff)
+
+        total = 0
+        for model_name in models:
+            count = archive_history(
+                model_name, cutoff,
+                batch_size=options['batch_size'],
+                rows_per_file=options['rows_per_file'],
+                dry_run=options['dry_run'],
+            )
+            total += count
+            verb = "would be archived" if options['dry_run'] else "archived"
+            self.stdout.write(f"{model_name}: {count} rows {verb}")
+
+        self.stdout.write(self.style.SUCCESS(f"Done ({total} rows)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from inventory.models import EquipmentEvent
+from inventory.timeline import EVENT_SOURCES, backfill_equipment_events
+
+class Command(BaseCommand):
+    help = 'Builds the EquipmentEvent timeline table (Hoja de Vida) from existing records.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Delete existing events before backfilling.')
+        parser.add_argument('--type', action='append', choices=list(EVENT_SOURCES), dest='types',
+                            help='Only backfill this event type (can be repeated).')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        types = options['types'] or list(EVENT_SOURCES)
+        if options['rebuild']:
+            deleted, _ = EquipmentEvent.objects.filter(event_type__in=types).delete()
+            self.stdout.write(f"Deleted {deleted} existing events.")
+
+        counts = backfill_equipment_events(types, batch_size=options['batch_size'])
+        for event_type, total in counts.items():
+            self.stdout.write(f"{event_type}: {total} events")
+        self.stdout.write(self.style.SUCCESS(f"Timeline backfilled ({sum(counts.values())} events)."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventory.models import InventoryCheckpoint
+from inventory.snapshots import create_inventory_checkpoint
+
+class Command(BaseCommand):
+    help = 'Stores a compact checkpoint of the equipment history for point-in-time snapshots (run nightly).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=0,
+                            help='Keep only the N most recent checkpoints (0 keeps all).')
+
+    def handle(self, *args, **options):
+        checkpoint = create_inventory_checkpoint(timezone.now())
+        self.stdout.write(self.style.SUCCESS(f"Created {checkpoint}."))
+
+        if options['keep']:
+            old_ids = list(InventoryCheckpoint.objects.order_by('-taken_at').values_list('pk', flat=True)[options['keep']:])
+            if old_ids:
+                InventoryCheckpoint.objects.filter(pk__in=old_ids).delete()
+                self.stdout.write(f"Deleted {len(old_ids)} old checkpoints.")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from inventory.forecasting import (
+    build_reorder_table, store_stock_forecasts,
+    FORECAST_WINDOW_DAYS, FORECAST_LEAD_TIME_DAYS, FORECAST_COVER_DAYS,
+)
+
+class Command(BaseCommand):
+    help = 'Recomputes consumption rates, projected stockouts and reorder quantities of all peripherals (run nightly).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=FORECAST_WINDOW_DAYS,
+                            help='Days of consumption history used for the rates.')
+        parser.add_argument('--lead-time', type=int, default=FORECAST_LEAD_TIME_DAYS,
+                            help='Days between ordering and receiving stock.')
+        parser.add_argument('--cover', type=int, default=FORECAST_COVER_DAYS,
+                            help='Days of consumption a reorder should cover.')
+        parser.add_argument('--csv', help='Also write the full reorder table to this CSV file.')
+
+    def handle(self, *args, **options):
+        table = build_reorder_table(
+            window_days=options['window'],
+            lead_time_days=options['lead_time'],
+            cover_days=options['cover'],
+        )
+        stored = store_stock_forecasts(table)
+        to_order = int((table['reorder_quantity'] > 0).sum()) if stored else 0
+        self.stdout.write(self.style.SUCCESS(f"Forecast {stored} peripherals, {to_order} need reordering."))
+
+        if options['csv']:
+            table.to_csv(options['csv'], index_label='peripheral_id')
+            self.stdout.write(f"Reorder table written to {options['csv']}.")
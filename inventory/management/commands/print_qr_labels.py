@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from inventory.models import Equipment
+from inventory.qr import equipment_label_sheet
+from inventory.services import filter_equipment
+
+class Command(BaseCommand):
+    help = 'Writes a PDF sheet of QR labels (QR, serial, area) for the equipment matching the filters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='PDF file to write.')
+        parser.add_argument('--base-url', required=True,
+                            help='Scheme and host the QR codes point to, e.g. https://inventario.hfps.gov.co')
+        parser.add_argument('--area', help='Area id.')
+        parser.add_argument('--type', help='Equipment type (PC, LAPTOP, ...).')
+        parser.add_argument('--status', help='Equipment status (ACTIVE, ...).')
+        parser.add_argument('--ids', help='Comma separated equipment ids.')
+        parser.add_argument('--workers', type=int, help='QR encoding processes (default: one per CPU).')
+
+    def handle(self, *args, **options):
+        params = {key: options[key] for key in ('area', 'type', 'status', 'ids') if options[key]}
+        equipment = filter_equipment(params, Equipment.objects.select_related('area')).order_by('area__name', 'serial_number')
+        count = equipment.count()
+        if not count:
+            raise CommandError('No equipment matches the filters.')
+
+        pdf = equipment_label_sheet(equipment, options['base_url'].rstrip('/'), workers=options['workers'])
+        with open(options['output'], 'wb') as f:
+            f.write(pdf)
+        self.stdout.write(self.style.SUCCESS(f"{count} labels written to {options['output']}."))
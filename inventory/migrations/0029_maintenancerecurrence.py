@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0028_systemsettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(verbose_name='Fecha de Inicio')),
+                ('interval_months', models.PositiveIntegerField(default=6, verbose_name='Frecuencia (Meses)')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Fecha Fin (Opcional)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activa')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('area', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='maintenance_recurrences', to='inventory.area', verbose_name='Área (Grupo)')),
+                ('equipment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recurrences', to='inventory.equipment', verbose_name='Equipo')),
+            ],
+            options={
+                'verbose_name': 'Regla de Mantenimiento Recurrente',
+                'verbose_name_plural': 'Reglas de Mantenimiento Recurrente',
+            },
+        ),
+    ]
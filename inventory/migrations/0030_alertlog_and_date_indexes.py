@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0029_maintenancerecurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('MAINTENANCE_UPCOMING', 'Mantenimiento Próximo'), ('MAINTENANCE_TODAY', 'Mantenimiento Programado para Hoy'), ('WARRANTY_EXPIRING', 'Vencimiento de Garantía')], max_length=30, verbose_name='Tipo de Alerta')),
+                ('due_date', models.DateField(verbose_name='Fecha de Vencimiento')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Destinatario')),
+                ('sent_at', models.DateTimeField(auto_now_add=True, verbose_name='Enviado el')),
+            ],
+            options={
+                'verbose_name': 'Alerta Enviada',
+                'verbose_name_plural': 'Alertas Enviadas',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['warranty_expiry'], name='equipment_warranty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceschedule',
+            index=models.Index(fields=['scheduled_date', 'status'], name='schedule_date_status_idx'),
+        ),
+        migrations.AddField(
+            model_name='alertlog',
+            name='equipment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_logs', to='inventory.equipment', verbose_name='Equipo'),
+        ),
+        migrations.AddIndex(
+            model_name='alertlog',
+            index=models.Index(fields=['kind', 'due_date'], name='alertlog_kind_due_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='alertlog',
+            unique_together={('kind', 'equipment', 'due_date', 'recipient')},
+        ),
+    ]
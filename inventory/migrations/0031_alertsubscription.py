@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0030_alertlog_and_date_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activa')),
+                ('areas', models.ManyToManyField(blank=True, help_text='Dejar vacío para recibir alertas de todas las áreas.', related_name='alert_subscriptions', to='inventory.area', verbose_name='Áreas')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='alert_subscription', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Suscripción de Alertas',
+                'verbose_name_plural': 'Suscripciones de Alertas',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0031_alertsubscription'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('ENTRY', 'Registro Inicial'), ('MAINTENANCE', 'Mantenimiento'), ('HANDOVER', 'Acta de Entrega'), ('ROUND', 'Ronda'), ('COMPONENT', 'Cambio de Componente'), ('RETIREMENT', 'Baja')], max_length=20, verbose_name='Tipo de Evento')),
+                ('source_id', models.PositiveIntegerField(verbose_name='ID de Origen')),
+                ('date', models.DateTimeField(verbose_name='Fecha')),
+                ('title', models.CharField(max_length=255, verbose_name='Título')),
+                ('description', models.TextField(blank=True, verbose_name='Descripción')),
+                ('user', models.CharField(blank=True, max_length=150, verbose_name='Registrado por')),
+                ('color', models.CharField(default='secondary', max_length=20, verbose_name='Color')),
+                ('photo', models.CharField(blank=True, max_length=255, verbose_name='Evidencia Fotográfica')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='inventory.equipment', verbose_name='Equipo')),
+            ],
+            options={
+                'verbose_name': 'Evento de Hoja de Vida',
+                'verbose_name_plural': 'Eventos de Hoja de Vida',
+                'ordering': ['-date', '-id'],
+                'indexes': [models.Index(fields=['equipment', '-date'], name='equipment_event_date_idx')],
+                'unique_together': {('equipment', 'event_type', 'source_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0032_equipmentevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(db_index=True, verbose_name='Fecha del Punto de Control')),
+                ('equipment_versions', models.JSONField(default=dict, verbose_name='Versiones de Equipos')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Punto de Control de Inventario',
+                'verbose_name_plural': 'Puntos de Control de Inventario',
+                'ordering': ['-taken_at'],
+            },
+        ),
+    ]
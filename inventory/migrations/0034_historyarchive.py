@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0033_inventorycheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=50, verbose_name='Modelo')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='Archivo')),
+                ('first_date', models.DateTimeField(verbose_name='Desde')),
+                ('last_date', models.DateTimeField(verbose_name='Hasta')),
+                ('row_count', models.PositiveIntegerField(verbose_name='Registros')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo de Historial',
+                'verbose_name_plural': 'Archivos de Historial',
+                'ordering': ['model_name', 'first_date'],
+                'indexes': [models.Index(fields=['model_name', 'first_date'], name='history_archive_range_idx')],
+            },
+        ),
+    ]
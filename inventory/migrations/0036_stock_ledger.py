@@ -0,0 +1,76 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_opening_balances(apps, schema_editor):
+    """Open the ledger with the current quantity of every peripheral, in its area."""
+    Peripheral = apps.get_model('inventory', 'Peripheral')
+    StockBalance = apps.get_model('inventory', 'StockBalance')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+
+    stock = list(Peripheral.objects.filter(quantity__gt=0).values_list('pk', 'area_id', 'quantity'))
+    StockBalance.objects.bulk_create(
+        [StockBalance(peripheral_id=pk, area_id=area_id, quantity=quantity) for pk, area_id, quantity in stock],
+        batch_size=500,
+    )
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(peripheral_id=pk, area_id=area_id, kind='ADJUSTMENT', quantity=quantity,
+                          balance_after=quantity, note='Saldo inicial')
+            for pk, area_id, quantity in stock
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0035_history_user_without_db_constraint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Cantidad')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('area', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_balances', to='inventory.area', verbose_name='Área')),
+                ('peripheral', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_balances', to='inventory.peripheral', verbose_name='Periférico')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Stock',
+                'verbose_name_plural': 'Saldos de Stock',
+                'constraints': [models.UniqueConstraint(fields=('peripheral', 'area'), name='stock_balance_unique_area'), models.UniqueConstraint(condition=models.Q(('area__isnull', True)), fields=('peripheral',), name='stock_balance_unique_unassigned')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('RECEIPT', 'Ingreso'), ('HANDOVER', 'Entrega'), ('COMPONENT', 'Instalación de Componente'), ('RETIREMENT', 'Baja'), ('ADJUSTMENT', 'Ajuste'), ('TRANSFER', 'Traslado entre Áreas')], max_length=20, verbose_name='Tipo de Movimiento')),
+                ('quantity', models.IntegerField(verbose_name='Cantidad')),
+                ('balance_after', models.IntegerField(verbose_name='Saldo Resultante')),
+                ('date', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Fecha')),
+                ('note', models.CharField(blank=True, max_length=255, verbose_name='Nota')),
+                ('area', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='inventory.area', verbose_name='Área')),
+                ('component_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='inventory.componentlog', verbose_name='Cambio de Componente')),
+                ('handover', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='inventory.handover', verbose_name='Acta de Entrega')),
+                ('performed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Realizado por')),
+                ('peripheral', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='inventory.peripheral', verbose_name='Periférico')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock',
+                'verbose_name_plural': 'Movimientos de Stock',
+                'ordering': ['-date', '-id'],
+                'indexes': [models.Index(fields=['peripheral', 'area', 'date'], name='stock_movement_asof_idx'), models.Index(fields=['date'], name='stock_movement_date_idx')],
+            },
+        ),
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0036_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.PositiveIntegerField(default=0, verbose_name='Stock al Calcular')),
+                ('daily_rate', models.FloatField(default=0, verbose_name='Consumo Diario Promedio')),
+                ('days_to_stockout', models.FloatField(blank=True, null=True, verbose_name='Días hasta Agotarse')),
+                ('stockout_date', models.DateField(blank=True, db_index=True, null=True, verbose_name='Fecha Proyectada de Agotamiento')),
+                ('reorder_point', models.PositiveIntegerField(default=0, verbose_name='Punto de Reorden')),
+                ('reorder_quantity', models.PositiveIntegerField(default=0, verbose_name='Cantidad Sugerida a Pedir')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Calculado')),
+                ('peripheral', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='inventory.peripheral', verbose_name='Periférico')),
+            ],
+            options={
+                'verbose_name': 'Pronóstico de Stock',
+                'verbose_name_plural': 'Pronósticos de Stock',
+                'ordering': ['stockout_date'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:47
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+import inventory.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0037_stock_forecast'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=inventory.indexes.OpClassIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('serial_number'), name='text_pattern_ops'), name='equipment_serial_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=inventory.indexes.OpClassIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('brand'), name='text_pattern_ops'), name='equipment_brand_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=inventory.indexes.OpClassIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('model'), name='text_pattern_ops'), name='equipment_model_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='peripheral',
+            index=inventory.indexes.OpClassIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('serial_number'), name='text_pattern_ops'), name='peripheral_serial_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='peripheral',
+            index=inventory.indexes.OpClassIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('brand'), name='text_pattern_ops'), name='peripheral_brand_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='peripheral',
+            index=inventory.indexes.OpClassIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('model'), name='text_pattern_ops'), name='peripheral_model_upper_idx'),
+        ),
+    ]
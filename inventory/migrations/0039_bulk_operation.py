@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0038_autocomplete_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('REASSIGN', 'Reasignación de Área'), ('STATUS', 'Cambio de Estado'), ('RETIRE', 'Baja Masiva')], max_length=20, verbose_name='Acción')),
+                ('date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('status', models.CharField(blank=True, max_length=20, verbose_name='Nuevo Estado')),
+                ('reason', models.TextField(blank=True, verbose_name='Justificación')),
+                ('photo', models.ImageField(blank=True, upload_to='retirement_evidence/%Y/%m/', verbose_name='Evidencia Fotográfica')),
+                ('acta_pdf', models.FileField(blank=True, null=True, upload_to='bulk_actas/', verbose_name='Acta Consolidada PDF')),
+                ('area', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bulk_operations', to='inventory.area', verbose_name='Área Destino')),
+                ('equipment', models.ManyToManyField(blank=True, related_name='bulk_operations', to='inventory.equipment', verbose_name='Equipos')),
+                ('performed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Realizado por')),
+                ('peripherals', models.ManyToManyField(blank=True, related_name='bulk_operations', to='inventory.peripheral', verbose_name='Periféricos')),
+            ],
+            options={
+                'verbose_name': 'Operación Masiva',
+                'verbose_name_plural': 'Operaciones Masivas',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='retirementlog',
+            name='operation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='retirement_logs', to='inventory.bulkoperation', verbose_name='Baja Masiva'),
+        ),
+    ]
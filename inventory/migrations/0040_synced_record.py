@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0039_bulk_operation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.UUIDField(unique=True, verbose_name='ID del Dispositivo')),
+                ('kind', models.CharField(choices=[('ROUND', 'Ronda'), ('COMPONENT_LOG', 'Cambio de Componente'), ('MAINTENANCE', 'Mantenimiento')], max_length=20, verbose_name='Tipo de Registro')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID del Registro Creado')),
+                ('synced_at', models.DateTimeField(auto_now_add=True, verbose_name='Sincronizado el')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Registro Sincronizado',
+                'verbose_name_plural': 'Registros Sincronizados',
+                'ordering': ['-synced_at'],
+            },
+        ),
+    ]
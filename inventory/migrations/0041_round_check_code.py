@@ -0,0 +1,81 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:25
+
+from functools import reduce
+from operator import add
+
+from django.db import migrations, models, router
+from django.db.models import Case, Max, Value, When
+
+# Frozen copy of EquipmentRound.CHECK_FIELDS / CHECK_CODES at this migration.
+CHECK_FIELDS = (
+    'hw_status', 'powers_on', 'monitor_status', 'peripherals_status', 'network_status',
+    'os_status', 'cables_status', 'cleanliness_status', 'ups_status', 'printer_status',
+)
+CHECK_CODES = {'PASS': 0, 'WARN': 1, 'FAIL': 2, 'NA': 3}
+BATCH_SIZE = 50000
+
+
+def check_code_expression():
+    """SQL for EquipmentRound.encode_checks(): a sum of one CASE per check."""
+    return reduce(add, [
+        Case(
+            *[When(**{field: status}, then=Value(code << (2 * i))) for status, code in CHECK_CODES.items()],
+            default=Value(CHECK_CODES['NA'] << (2 * i)),
+            output_field=models.PositiveIntegerField(),
+        )
+        for i, field in enumerate(CHECK_FIELDS)
+    ])
+
+
+def _backfill(model, pk_name, using):
+    """Encode the rows of model with set-based UPDATEs over pk ranges."""
+    rows = model.objects.using(using)
+    last = rows.aggregate(last=Max(pk_name))['last'] or 0
+    for start in range(0, last + 1, BATCH_SIZE):
+        rows.filter(**{
+            f'{pk_name}__gte': start, f'{pk_name}__lt': start + BATCH_SIZE,
+        }).update(check_code=check_code_expression())
+
+
+def backfill_check_codes(apps, schema_editor):
+    """Encode existing rounds."""
+    model = apps.get_model('inventory', 'EquipmentRound')
+    using = schema_editor.connection.alias
+    if using == router.db_for_write(model):
+        _backfill(model, 'id', using)
+
+
+def backfill_history_check_codes(apps, schema_editor):
+    """Encode the round history, on the database that holds it (HistoryRouter)."""
+    model = apps.get_model('inventory', 'HistoricalEquipmentRound')
+    using = schema_editor.connection.alias
+    if using == router.db_for_write(model):
+        _backfill(model, 'history_id', using)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0040_synced_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentround',
+            name='check_code',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Checklist Codificado'),
+        ),
+        migrations.AddField(
+            model_name='historicalequipmentround',
+            name='check_code',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Checklist Codificado'),
+        ),
+        migrations.RunPython(
+            backfill_check_codes, migrations.RunPython.noop,
+            hints={'model_name': 'equipmentround'},
+        ),
+        migrations.RunPython(
+            backfill_history_check_codes, migrations.RunPython.noop,
+            hints={'model_name': 'historicalequipmentround'},
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:20
+
+from django.db import migrations, models
+
+
+def fill_labels(apps, schema_editor):
+    """
+    Derive the PDF label of existing maintenance and handover events from
+    their title ('Mantenimiento <tipo>', 'Acta: <tipo> a <destino>'); the
+    other event types print their title, as before.
+    """
+    EquipmentEvent = apps.get_model('inventory', 'EquipmentEvent')
+    events = EquipmentEvent.objects.using(schema_editor.connection.alias)
+    changed = []
+    for event in events.filter(event_type__in=['MAINTENANCE', 'HANDOVER']).only('id', 'event_type', 'title').iterator(chunk_size=2000):
+        if event.event_type == 'MAINTENANCE':
+            event.label = event.title.replace('Mantenimiento', 'Mant.', 1)
+        else:
+            # Handover type names never contain ' a '.
+            event.label, _, event.destination = event.title.partition(' a ')
+        changed.append(event)
+        if len(changed) >= 2000:
+            events.bulk_update(changed, ['label', 'destination'])
+            changed = []
+    if changed:
+        events.bulk_update(changed, ['label', 'destination'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0042_history_user_do_nothing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentevent',
+            name='destination',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Área Destino'),
+        ),
+        migrations.AddField(
+            model_name='equipmentevent',
+            name='label',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Etiqueta'),
+        ),
+        migrations.RunPython(fill_labels, migrations.RunPython.noop),
+    ]
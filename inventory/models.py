@@ -1,17 +1,50 @@
 from django.db import models
+from django.contrib.postgres.indexes import OpClass
+from django.db.models.functions import Upper
 from simple_history.models import HistoricalRecords
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.utils import timezone
 from .utils import generate_maintenance_pdf, generate_handover_pdf
+from .caching import bump_version, get_or_build, get_version
+from .indexes import OpClassIndex
 from .choices import (
     EQUIPMENT_TYPE_CHOICES, EQUIPMENT_STATUS_CHOICES,
     PERIPHERAL_TYPE_CHOICES, PERIPHERAL_STATUS_CHOICES,
     MAINTENANCE_TYPE_CHOICES, HANDOVER_TYPE_CHOICES,
-    IP_TYPE_CHOICES, OWNERSHIP_CHOICES, COMPONENT_ACTION_CHOICES
+    IP_TYPE_CHOICES, OWNERSHIP_CHOICES, COMPONENT_ACTION_CHOICES,
+    ALERT_KIND_CHOICES, EQUIPMENT_EVENT_TYPE_CHOICES, STOCK_MOVEMENT_KIND_CHOICES,
+    BULK_ACTION_CHOICES, OFFLINE_RECORD_KIND_CHOICES,
 )
 
+
+class AuditHistoricalRecords(HistoricalRecords):
+    """
+    HistoricalRecords whose history_user never cascades. History may live on
+    its own database (inventory/routers.py), so deleting a user must not
+    issue an UPDATE of the Historical* tables on 'default': the audit rows
+    keep the id of the deleted user instead of being set to NULL.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('user_db_constraint', False)
+        super().__init__(**kwargs)
+
+    def _get_history_user_fields(self):
+        fields = super()._get_history_user_fields()
+        if self.user_id_field is None:
+            fields['history_user'] = models.ForeignKey(
+                fields['history_user'].remote_field.model,
+                null=True,
+                related_name=self.user_related_name,
+                on_delete=models.DO_NOTHING,
+                db_constraint=self.user_db_constraint,
+            )
+        return fields
+
+
 class CostCenter(models.Model):
     """Model representing a Cost Center."""
     code = models.CharField(max_length=20, unique=True, verbose_name=_("Código"))
@@ -121,7 +154,7 @@ class Equipment(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    history = HistoricalRecords()
+    history = AuditHistoricalRecords()
 
     def __str__(self):
         return f"{self.get_type_display()} - {self.brand} {self.model} ({self.serial_number})"
@@ -129,6 +162,13 @@ class Equipment(models.Model):
     class Meta:
         verbose_name = _("Equipo")
         verbose_name_plural = _("Equipos")
+        indexes = [
+            models.Index(fields=['warranty_expiry'], name='equipment_warranty_idx'),
+            # Prefix search of the autocomplete endpoint (istartswith compares UPPER() LIKE 'ABC%').
+            OpClassIndex(OpClass(Upper('serial_number'), name='text_pattern_ops'), name='equipment_serial_upper_idx'),
+            OpClassIndex(OpClass(Upper('brand'), name='text_pattern_ops'), name='equipment_brand_upper_idx'),
+            OpClassIndex(OpClass(Upper('model'), name='text_pattern_ops'), name='equipment_model_upper_idx'),
+        ]
 
 class PeripheralType(models.Model):
     """Model for dynamic Peripheral Types."""
@@ -167,6 +207,11 @@ class Peripheral(models.Model):
     class Meta:
         verbose_name = _("Periférico")
         verbose_name_plural = _("Periféricos")
+        indexes = [
+            OpClassIndex(OpClass(Upper('serial_number'), name='text_pattern_ops'), name='peripheral_serial_upper_idx'),
+            OpClassIndex(OpClass(Upper('brand'), name='text_pattern_ops'), name='peripheral_brand_upper_idx'),
+            OpClassIndex(OpClass(Upper('model'), name='text_pattern_ops'), name='peripheral_model_upper_idx'),
+        ]
 
 class HandoverPeripheral(models.Model):
     """Through model for Handover-Peripheral relationship with quantity."""
@@ -179,6 +224,16 @@ class HandoverPeripheral(models.Model):
 
 class Maintenance(models.Model):
     """Model representing a Maintenance record (Preventive or Corrective)."""
+
+    # Checklist task fields (sections 4-6 of the acta), in form order
+    TASK_FIELDS = (
+        'type_review', 'type_software_failure', 'type_connection', 'type_updates',
+        'type_cleaning', 'type_install', 'type_peripheral', 'type_backup',
+        'cleaning_defrag', 'cleaning_cco', 'cleaning_scandisk', 'cleaning_space',
+        'hw_disassembly', 'hw_power_supply', 'hw_fans', 'hw_chassis', 'hw_thermal_paste',
+        'hw_contacts', 'hw_keyboard_mouse', 'hw_screen', 'hw_reassembly',
+    )
+
     equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='maintenances', verbose_name=_("Equipo"))
     date = models.DateField(default=timezone.now, verbose_name=_("Fecha"))
     maintenance_type = models.CharField(max_length=20, choices=MAINTENANCE_TYPE_CHOICES, verbose_name=_("Tipo de Mantenimiento"))
@@ -217,11 +272,12 @@ class Maintenance(models.Model):
     hw_keyboard_mouse = models.BooleanField(default=False, verbose_name=_("Limpieza Teclado/Mouse"))
     hw_screen = models.BooleanField(default=False, verbose_name=_("Limpieza Pantalla"))
     hw_reassembly = models.BooleanField(default=False, verbose_name=_("Ensamble y Pruebas"))
-    history = HistoricalRecords()
+    history = AuditHistoricalRecords()
 
     def save(self, *args, **kwargs):
-        # Determine if we need to generate the PDF
-        should_generate_pdf = not self.acta_pdf
+        # Determine if we need to generate the PDF. Partial saves (update_fields),
+        # such as the schedule sync touching next_maintenance_date, never render it.
+        should_generate_pdf = not self.acta_pdf and kwargs.get('update_fields') is None
         
         # Save first to get ID
         super().save(*args, **kwargs)
@@ -279,12 +335,61 @@ class MaintenanceSchedule(models.Model):
 
     class Meta:
         unique_together = ('equipment', 'scheduled_date')
+        indexes = [
+            models.Index(fields=['scheduled_date', 'status'], name='schedule_date_status_idx'),
+        ]
         verbose_name = "Cronograma de Mantenimiento"
         verbose_name_plural = "Cronogramas de Mantenimiento"
 
     def __str__(self):
         return f"{self.equipment} - {self.scheduled_date}"
 
+class MaintenanceRecurrence(models.Model):
+    """
+    Recurring maintenance rule (e.g. every 6 months starting on a date) for one
+    equipment or for every equipment in an area. Occurrences are expanded on
+    demand; only completions and exceptions are stored in MaintenanceSchedule.
+    """
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, null=True, blank=True, related_name='recurrences', verbose_name=_("Equipo"))
+    area = models.ForeignKey(Area, on_delete=models.CASCADE, null=True, blank=True, related_name='maintenance_recurrences', verbose_name=_("Área (Grupo)"))
+    start_date = models.DateField(verbose_name=_("Fecha de Inicio"))
+    interval_months = models.PositiveIntegerField(default=6, verbose_name=_("Frecuencia (Meses)"))
+    end_date = models.DateField(blank=True, null=True, verbose_name=_("Fecha Fin (Opcional)"))
+    is_active = models.BooleanField(default=True, verbose_name=_("Activa"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Regla de Mantenimiento Recurrente")
+        verbose_name_plural = _("Reglas de Mantenimiento Recurrente")
+
+    def __str__(self):
+        target = self.equipment or self.area
+        return f"{target} - cada {self.interval_months} meses desde {self.start_date}"
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if bool(self.equipment_id) == bool(self.area_id):
+            raise ValidationError(_("Seleccione un equipo o un área, no ambos."))
+        if not self.interval_months:
+            raise ValidationError({'interval_months': _("La frecuencia debe ser de al menos 1 mes.")})
+
+    def occurrences_between(self, start, end):
+        """Yield the rule's dates within [start, end], anchored on start_date to avoid day drift."""
+        from dateutil.relativedelta import relativedelta
+
+        last = min(end, self.end_date) if self.end_date else end
+        if last < self.start_date or not self.interval_months:
+            return
+        months_to_start = (start.year - self.start_date.year) * 12 + (start.month - self.start_date.month)
+        step = max(0, months_to_start // self.interval_months)
+        while True:
+            occurrence = self.start_date + relativedelta(months=step * self.interval_months)
+            if occurrence > last:
+                break
+            if occurrence >= start:
+                yield occurrence
+            step += 1
+
 class EquipmentRound(models.Model):
     """Model representing an Equipment Round (Ronda de Equipos) check."""
     
@@ -301,6 +406,14 @@ class EquipmentRound(models.Model):
         ('NA', '➖ No Aplica'),
     ]
 
+    # Checklist fields, in form order. check_code packs them two bits each in
+    # this order (check i in bits 2i-2i+1): append new checks, never reorder.
+    CHECK_FIELDS = (
+        'hw_status', 'powers_on', 'monitor_status', 'peripherals_status', 'network_status',
+        'os_status', 'cables_status', 'cleanliness_status', 'ups_status', 'printer_status',
+    )
+    CHECK_CODES = {'PASS': 0, 'WARN': 1, 'FAIL': 2, 'NA': 3}
+
     equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='rounds', verbose_name=_("Equipo"))
     performed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name=_("Realizada por"))
     datetime = models.DateTimeField(default=timezone.now, verbose_name=_("Fecha y Hora"))
@@ -321,12 +434,34 @@ class EquipmentRound(models.Model):
     
     general_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='GOOD', verbose_name=_("Estado General"))
     observations = models.TextField(blank=True, null=True, verbose_name=_("Observaciones"))
-    
-    history = HistoricalRecords()
+
+    # All checks in one integer for analytics (see inventory/round_checks.py).
+    check_code = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Checklist Codificado"))
+
+    history = AuditHistoricalRecords()
 
     def __str__(self):
         return f"Ronda {self.equipment} - {self.datetime.strftime('%Y-%m-%d %H:%M')}"
 
+    @classmethod
+    def encode_checks(cls, values):
+        """Pack the statuses of CHECK_FIELDS (in order) into one integer; unknown values count as NA."""
+        code = 0
+        for i, value in enumerate(values):
+            code |= cls.CHECK_CODES.get(value, cls.CHECK_CODES['NA']) << (2 * i)
+        return code
+
+    def sync_check_code(self):
+        """Recompute check_code from the checklist fields (bulk inserts skip save())."""
+        self.check_code = self.encode_checks(getattr(self, name) for name in self.CHECK_FIELDS)
+
+    def save(self, *args, **kwargs):
+        self.sync_check_code()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.CHECK_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'check_code'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = _("Ronda de Equipo")
         verbose_name_plural = _("Rondas de Equipos")
@@ -344,7 +479,7 @@ class ComponentLog(models.Model):
     component_name = models.CharField(max_length=100, blank=True, null=True, verbose_name=_("Descripción de Pieza (Libre)"))
     description = models.TextField(verbose_name=_("Descripción de los Cambios"))
     performed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name=_("Realizado por"))
-    history = HistoricalRecords()
+    history = AuditHistoricalRecords()
 
     def __str__(self):
         return f"{self.get_action_type_display()} {self.component_name} - {self.equipment}"
@@ -356,6 +491,30 @@ class ComponentLog(models.Model):
 
 
 
+class BulkOperation(models.Model):
+    """
+    Mass reassignment, status change or retirement of several assets at once,
+    with one consolidated acta listing all of them.
+    """
+    action = models.CharField(max_length=20, choices=BULK_ACTION_CHOICES, verbose_name=_("Acción"))
+    date = models.DateTimeField(default=timezone.now, verbose_name=_("Fecha"))
+    area = models.ForeignKey(Area, on_delete=models.SET_NULL, null=True, blank=True, related_name='bulk_operations', verbose_name=_("Área Destino"))
+    status = models.CharField(max_length=20, blank=True, verbose_name=_("Nuevo Estado"))
+    reason = models.TextField(blank=True, verbose_name=_("Justificación"))
+    photo = models.ImageField(upload_to='retirement_evidence/%Y/%m/', blank=True, verbose_name=_("Evidencia Fotográfica"))
+    equipment = models.ManyToManyField(Equipment, blank=True, related_name='bulk_operations', verbose_name=_("Equipos"))
+    peripherals = models.ManyToManyField(Peripheral, blank=True, related_name='bulk_operations', verbose_name=_("Periféricos"))
+    performed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("Realizado por"))
+    acta_pdf = models.FileField(upload_to='bulk_actas/', blank=True, null=True, verbose_name=_("Acta Consolidada PDF"))
+
+    class Meta:
+        verbose_name = _("Operación Masiva")
+        verbose_name_plural = _("Operaciones Masivas")
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.get_action_display()} #{self.pk} - {self.date.strftime('%Y-%m-%d %H:%M')}"
+
 class RetirementLog(models.Model):
     """Model to store the justification and evidence when retiring an asset."""
     equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='retirement_logs', null=True, blank=True, verbose_name=_("Equipo"))
@@ -366,6 +525,7 @@ class RetirementLog(models.Model):
     
     date = models.DateTimeField(default=timezone.now, verbose_name=_("Fecha de Baja"))
     performed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("Realizado por"))
+    operation = models.ForeignKey(BulkOperation, on_delete=models.SET_NULL, null=True, blank=True, related_name='retirement_logs', verbose_name=_("Baja Masiva"))
 
     class Meta:
         verbose_name = _("Acta de Baja")
@@ -376,8 +536,234 @@ class RetirementLog(models.Model):
         asset = self.equipment.serial_number if self.equipment else (self.peripheral.serial_number if self.peripheral else "Activo")
         return f"Baja de {asset} el {self.date.strftime('%Y-%m-%d')}"
 
+class StockMovement(models.Model):
+    """
+    Append-only ledger of peripheral stock movements.
+
+    quantity is signed (positive in, negative out) and balance_after is the
+    (peripheral, area) balance right after the movement, so a past balance is
+    read from a single row. Rows are written by the stock services in the same
+    transaction that updates StockBalance.
+    """
+    peripheral = models.ForeignKey(Peripheral, on_delete=models.CASCADE, related_name='stock_movements', verbose_name=_("Periférico"))
+    area = models.ForeignKey(Area, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements', verbose_name=_("Área"))
+    kind = models.CharField(max_length=20, choices=STOCK_MOVEMENT_KIND_CHOICES, verbose_name=_("Tipo de Movimiento"))
+    quantity = models.IntegerField(verbose_name=_("Cantidad"))
+    balance_after = models.IntegerField(verbose_name=_("Saldo Resultante"))
+    date = models.DateTimeField(default=timezone.now, editable=False, verbose_name=_("Fecha"))
+    performed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("Realizado por"))
+    handover = models.ForeignKey(Handover, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements', verbose_name=_("Acta de Entrega"))
+    component_log = models.ForeignKey(ComponentLog, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements', verbose_name=_("Cambio de Componente"))
+    note = models.CharField(max_length=255, blank=True, verbose_name=_("Nota"))
+
+    class Meta:
+        verbose_name = _("Movimiento de Stock")
+        verbose_name_plural = _("Movimientos de Stock")
+        ordering = ['-date', '-id']
+        indexes = [
+            models.Index(fields=['peripheral', 'area', 'date'], name='stock_movement_asof_idx'),
+            models.Index(fields=['date'], name='stock_movement_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} - {self.peripheral_id} ({self.date:%Y-%m-%d})"
+
+class StockBalance(models.Model):
+    """Materialized stock of a peripheral in an area (area empty = unassigned)."""
+    peripheral = models.ForeignKey(Peripheral, on_delete=models.CASCADE, related_name='stock_balances', verbose_name=_("Periférico"))
+    area = models.ForeignKey(Area, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_balances', verbose_name=_("Área"))
+    quantity = models.PositiveIntegerField(default=0, verbose_name=_("Cantidad"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Saldo de Stock")
+        verbose_name_plural = _("Saldos de Stock")
+        constraints = [
+            models.UniqueConstraint(fields=['peripheral', 'area'], name='stock_balance_unique_area'),
+            models.UniqueConstraint(fields=['peripheral'], condition=models.Q(area__isnull=True), name='stock_balance_unique_unassigned'),
+        ]
+
+    def __str__(self):
+        return f"{self.peripheral_id} @ {self.area_id or '-'}: {self.quantity}"
+
+class StockForecast(models.Model):
+    """
+    Consumption forecast of a peripheral, recomputed nightly by
+    forecast_peripheral_stock (see inventory/forecasting.py).
+    """
+    peripheral = models.OneToOneField(Peripheral, on_delete=models.CASCADE, related_name='forecast', verbose_name=_("Periférico"))
+    stock = models.PositiveIntegerField(default=0, verbose_name=_("Stock al Calcular"))
+    daily_rate = models.FloatField(default=0, verbose_name=_("Consumo Diario Promedio"))
+    days_to_stockout = models.FloatField(null=True, blank=True, verbose_name=_("Días hasta Agotarse"))
+    stockout_date = models.DateField(null=True, blank=True, db_index=True, verbose_name=_("Fecha Proyectada de Agotamiento"))
+    reorder_point = models.PositiveIntegerField(default=0, verbose_name=_("Punto de Reorden"))
+    reorder_quantity = models.PositiveIntegerField(default=0, verbose_name=_("Cantidad Sugerida a Pedir"))
+    computed_at = models.DateTimeField(default=timezone.now, verbose_name=_("Calculado"))
+
+    class Meta:
+        verbose_name = _("Pronóstico de Stock")
+        verbose_name_plural = _("Pronósticos de Stock")
+        ordering = ['stockout_date']
+
+    def __str__(self):
+        return f"{self.peripheral_id}: {self.daily_rate:.2f}/día, agotamiento {self.stockout_date or '-'}"
+
+class EquipmentEvent(models.Model):
+    """
+    Denormalized entry of the equipment timeline (Hoja de Vida).
+
+    One row per maintenance, handover, round, component change, retirement or
+    registration, kept in sync by signals so the timeline is a single indexed
+    query instead of six related managers.
+    """
+    ICONS = {
+        'ENTRY': 'fa-plus-circle',
+        'MAINTENANCE': 'fa-tools',
+        'HANDOVER': 'fa-exchange-alt',
+        'ROUND': 'fa-clipboard-check',
+        'COMPONENT': 'fa-microchip',
+        'RETIREMENT': 'fa-ban',
+    }
+
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='events', verbose_name=_("Equipo"))
+    event_type = models.CharField(max_length=20, choices=EQUIPMENT_EVENT_TYPE_CHOICES, verbose_name=_("Tipo de Evento"))
+    source_id = models.PositiveIntegerField(verbose_name=_("ID de Origen"))
+    date = models.DateTimeField(verbose_name=_("Fecha"))
+    title = models.CharField(max_length=255, verbose_name=_("Título"))
+    # Short label and destination area for the narrow columns of the Hoja de Vida PDF.
+    label = models.CharField(max_length=100, blank=True, verbose_name=_("Etiqueta"))
+    destination = models.CharField(max_length=100, blank=True, verbose_name=_("Área Destino"))
+    description = models.TextField(blank=True, verbose_name=_("Descripción"))
+    user = models.CharField(max_length=150, blank=True, verbose_name=_("Registrado por"))
+    color = models.CharField(max_length=20, default='secondary', verbose_name=_("Color"))
+    photo = models.CharField(max_length=255, blank=True, verbose_name=_("Evidencia Fotográfica"))
+
+    class Meta:
+        verbose_name = _("Evento de Hoja de Vida")
+        verbose_name_plural = _("Eventos de Hoja de Vida")
+        ordering = ['-date', '-id']
+        unique_together = ('equipment', 'event_type', 'source_id')
+        indexes = [
+            models.Index(fields=['equipment', '-date'], name='equipment_event_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.equipment_id} - {self.title} ({self.date:%Y-%m-%d})"
+
+    @property
+    def icon(self):
+        return self.ICONS.get(self.event_type, 'fa-circle')
+
+    @property
+    def photo_url(self):
+        return default_storage.url(self.photo) if self.photo else None
+
+    @property
+    def photo_path(self):
+        return default_storage.path(self.photo) if self.photo else None
+
+class InventoryCheckpoint(models.Model):
+    """
+    Compact checkpoint of the equipment history: for every equipment that
+    existed at taken_at, the history_id of its latest HistoricalEquipment row.
+    Point-in-time snapshots start from the closest checkpoint and replay only
+    the history recorded after it.
+    """
+    taken_at = models.DateTimeField(db_index=True, verbose_name=_("Fecha del Punto de Control"))
+    equipment_versions = models.JSONField(default=dict, verbose_name=_("Versiones de Equipos"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Punto de Control de Inventario")
+        verbose_name_plural = _("Puntos de Control de Inventario")
+        ordering = ['-taken_at']
+
+    def __str__(self):
+        return f"Punto de control {self.taken_at:%Y-%m-%d %H:%M} ({len(self.equipment_versions)} equipos)"
+
+class HistoryArchive(models.Model):
+    """A compressed JSONL file holding history rows pruned from a Historical* table."""
+    model_name = models.CharField(max_length=50, verbose_name=_("Modelo"))
+    path = models.CharField(max_length=255, unique=True, verbose_name=_("Archivo"))
+    first_date = models.DateTimeField(verbose_name=_("Desde"))
+    last_date = models.DateTimeField(verbose_name=_("Hasta"))
+    row_count = models.PositiveIntegerField(verbose_name=_("Registros"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Archivo de Historial")
+        verbose_name_plural = _("Archivos de Historial")
+        ordering = ['model_name', 'first_date']
+        indexes = [
+            models.Index(fields=['model_name', 'first_date'], name='history_archive_range_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name}: {self.first_date:%Y-%m-%d} - {self.last_date:%Y-%m-%d} ({self.row_count})"
+
+class AlertLog(models.Model):
+    """Record of an alert already e-mailed, so each (kind, equipment, due date, recipient) is sent only once."""
+    kind = models.CharField(max_length=30, choices=ALERT_KIND_CHOICES, verbose_name=_("Tipo de Alerta"))
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='alert_logs', verbose_name=_("Equipo"))
+    due_date = models.DateField(verbose_name=_("Fecha de Vencimiento"))
+    recipient = models.EmailField(verbose_name=_("Destinatario"))
+    sent_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Enviado el"))
+
+    class Meta:
+        verbose_name = _("Alerta Enviada")
+        verbose_name_plural = _("Alertas Enviadas")
+        unique_together = ('kind', 'equipment', 'due_date', 'recipient')
+        indexes = [
+            models.Index(fields=['kind', 'due_date'], name='alertlog_kind_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.equipment_id} ({self.due_date}) -> {self.recipient}"
+
+class AlertSubscription(models.Model):
+    """Areas a user receives e-mail alerts for. Staff users without a subscription receive every area."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='alert_subscription', verbose_name=_("Usuario"))
+    areas = models.ManyToManyField(Area, blank=True, related_name='alert_subscriptions', verbose_name=_("Áreas"), help_text=_("Dejar vacío para recibir alertas de todas las áreas."))
+    is_active = models.BooleanField(default=True, verbose_name=_("Activa"))
+
+    class Meta:
+        verbose_name = _("Suscripción de Alertas")
+        verbose_name_plural = _("Suscripciones de Alertas")
+
+    def __str__(self):
+        return f"Alertas de {self.user.username}"
+
+class SyncedRecord(models.Model):
+    """
+    Record captured offline and already applied by the sync API, keyed by the
+    id the device generated, so retrying a batch never creates it twice.
+    """
+    client_id = models.UUIDField(unique=True, verbose_name=_("ID del Dispositivo"))
+    kind = models.CharField(max_length=20, choices=OFFLINE_RECORD_KIND_CHOICES, verbose_name=_("Tipo de Registro"))
+    object_id = models.PositiveIntegerField(verbose_name=_("ID del Registro Creado"))
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("Usuario"))
+    synced_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Sincronizado el"))
+
+    class Meta:
+        verbose_name = _("Registro Sincronizado")
+        verbose_name_plural = _("Registros Sincronizados")
+        ordering = ['-synced_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} ({self.client_id})"
+
+SYSTEM_SETTINGS_NAMESPACE = 'system_settings'
+
+
 class SystemSettings(models.Model):
-    """Singleton model to store global system settings like the logo."""
+    """
+    Singleton model to store global system settings like the logo.
+
+    load() is called on every page (context processor) and PDF page header,
+    so the row is cached in the shared cache (inventory/caching.py) and kept
+    in-process next to the version it was read with; save() bumps the
+    version, which makes every process reload it on its next load().
+    """
     site_name = models.CharField(max_length=100, default="HFPS TIC", verbose_name=_("Nombre del Sitio"))
     logo = models.ImageField(upload_to='site_logo/', blank=True, null=True, verbose_name=_("Logo del Sistema"), help_text=_("Sube una imagen para cambiar el logo principal de la aplicación."))
 
@@ -388,14 +774,24 @@ class SystemSettings(models.Model):
     def __str__(self):
         return self.site_name
 
+    # (version, instance) of the last load() in this process
+    _loaded = (None, None)
+
     def save(self, *args, **kwargs):
         self.pk = 1
         super(SystemSettings, self).save(*args, **kwargs)
+        bump_version(SYSTEM_SETTINGS_NAMESPACE)
 
     def delete(self, *args, **kwargs):
         pass
 
     @classmethod
     def load(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
+        """Return the settings row (treat it as read-only; edit a fresh copy and save())."""
+        version = get_version(SYSTEM_SETTINGS_NAMESPACE)
+        loaded_version, obj = cls._loaded
+        if obj is not None and loaded_version == version:
+            return obj
+        obj = get_or_build(SYSTEM_SETTINGS_NAMESPACE, lambda: cls.objects.get_or_create(pk=1)[0], version=version)
+        cls._loaded = (version, obj)
         return obj
@@ -0,0 +1,148 @@
+"""
+Round failure analytics: heatmap and repeat offenders.
+
+For a date window, the heatmap gives per area and per checklist item the
+share of rounds with WARN / FAIL (over the rounds where the check applies),
+and repeat offenders are equipment whose same check failed in consecutive
+rounds. Both come from one values_list() of the packed check_code
+(inventory/round_checks.py) and a single numpy/pandas pass.
+
+Results are cached per window under a version bumped whenever rounds are
+saved or deleted; the area-maps version is part of the key, so moving
+equipment to another area also rebuilds them.
+"""
+import numpy as np
+import pandas as pd
+
+from .area_maps import get_area_maps_version
+from .caching import bump_version, get_or_build
+from .models import EquipmentRound
+from .round_checks import CHECK_CODES, CHECK_FIELDS, decode_check_codes
+
+ROUND_ANALYTICS_NAMESPACE = 'round_analytics'
+
+# Column headers of the heatmap (web and PDF), in CHECK_FIELDS order.
+CHECK_SHORT_LABELS = {
+    'hw_status': 'Físico',
+    'powers_on': 'Energía',
+    'monitor_status': 'Pantalla',
+    'peripherals_status': 'Periféricos',
+    'network_status': 'Red',
+    'os_status': 'SO',
+    'cables_status': 'Cables',
+    'cleanliness_status': 'Limpieza',
+    'ups_status': 'UPS',
+    'printer_status': 'Impresora',
+}
+# Consecutive failing rounds that make a repeat offender.
+DEFAULT_MIN_STREAK = 2
+MAX_OFFENDERS = 50
+
+
+def bump_round_analytics():
+    """Invalidate cached analytics once the current transaction commits."""
+    bump_version(ROUND_ANALYTICS_NAMESPACE)
+
+
+def _failure_streaks(equipment_ids, failing):
+    """
+    Length of the run of consecutive failing rounds ending at each row, per
+    check. Rows are sorted by equipment and date; runs restart at each
+    equipment.
+    """
+    n = len(equipment_ids)
+    idx = np.arange(n)
+    # Index of the last row that breaks a run (a passing round, or the row
+    # before the first round of the equipment), carried forward.
+    breaks = np.where(failing, -1, idx[:, None])
+    starts = np.flatnonzero(np.r_[True, equipment_ids[1:] != equipment_ids[:-1]])
+    breaks[starts] = np.where(failing[starts], starts[:, None] - 1, starts[:, None])
+    last_break = np.maximum.accumulate(breaks, axis=0)
+    return np.where(failing, idx[:, None] - last_break, 0)
+
+
+def build_round_failure_analytics(start_date, end_date, min_streak=DEFAULT_MIN_STREAK):
+    rows = list(
+        EquipmentRound.objects.filter(datetime__date__range=[start_date, end_date])
+        .order_by('equipment_id', 'datetime', 'id')
+        .values_list('equipment_id', 'equipment__serial_number', 'equipment__area__name', 'datetime', 'check_code')
+    )
+    checks = [
+        {'field': field, 'label': CHECK_SHORT_LABELS[field], 'verbose_name': str(EquipmentRound._meta.get_field(field).verbose_name)}
+        for field in CHECK_FIELDS
+    ]
+    result = {'round_count': len(rows), 'checks': checks, 'areas': [], 'repeat_offenders': []}
+    if not rows:
+        return result
+
+    equipment_ids, serials, areas, dates, codes = zip(*rows)
+    equipment_ids = np.asarray(equipment_ids)
+    decoded = decode_check_codes(codes)
+    warn = decoded == CHECK_CODES['WARN']
+    fail = decoded == CHECK_CODES['FAIL']
+    applicable = decoded != CHECK_CODES['NA']
+    area_names = pd.Series(areas, dtype=object).fillna('Sin Área')
+
+    # Heatmap: one grouped sum of the three indicator matrices.
+    frame = pd.DataFrame(
+        np.hstack([warn, fail, applicable]).astype(np.int64),
+        columns=[f'{kind}:{field}' for kind in ('warn', 'fail', 'applicable') for field in CHECK_FIELDS],
+    )
+    frame['area'] = area_names.values
+    frame['rounds'] = 1
+    sums = frame.groupby('area', sort=True).sum()
+    for area, row in sums.iterrows():
+        cells, area_failing, area_applicable = [], 0, 0
+        for field in CHECK_FIELDS:
+            n_warn, n_fail, n_applicable = (int(row[f'{kind}:{field}']) for kind in ('warn', 'fail', 'applicable'))
+            area_failing += n_warn + n_fail
+            area_applicable += n_applicable
+            cells.append({
+                'field': field,
+                'warn': n_warn,
+                'fail': n_fail,
+                'applicable': n_applicable,
+                'warn_rate': n_warn / n_applicable if n_applicable else None,
+                'fail_rate': n_fail / n_applicable if n_applicable else None,
+                'rate': (n_warn + n_fail) / n_applicable if n_applicable else None,
+            })
+        result['areas'].append({
+            'area': area,
+            'rounds': int(row['rounds']),
+            'rate': area_failing / area_applicable if area_applicable else None,
+            'cells': cells,
+        })
+    result['areas'].sort(key=lambda a: -(a['rate'] or 0))
+
+    # Repeat offenders: longest and current failing streak per equipment and check.
+    streaks = pd.DataFrame(_failure_streaks(equipment_ids, warn | fail), columns=CHECK_FIELDS)
+    streaks['equipment_id'] = equipment_ids
+    grouped = streaks.groupby('equipment_id', sort=False)
+    longest = grouped.max().stack()
+    current = grouped.last().stack()
+    longest = longest[longest >= min_streak].sort_values(ascending=False, kind='stable')
+
+    # Later rows overwrite earlier ones: the last round of each equipment.
+    last_row = dict(zip(equipment_ids.tolist(), range(len(equipment_ids))))
+    for (pk, field), streak in longest.head(MAX_OFFENDERS).items():
+        i = last_row[pk]
+        result['repeat_offenders'].append({
+            'equipment_id': int(pk),
+            'serial': serials[i],
+            'area': area_names.iat[i],
+            'field': field,
+            'label': CHECK_SHORT_LABELS[field],
+            'streak': int(streak),
+            'ongoing': int(current[(pk, field)]) > 0,
+            'last_round': dates[i],
+        })
+    return result
+
+
+def get_round_failure_analytics(start_date, end_date, min_streak=DEFAULT_MIN_STREAK):
+    """Cached build_round_failure_analytics() of the window (dates inclusive)."""
+    return get_or_build(
+        ROUND_ANALYTICS_NAMESPACE,
+        lambda: build_round_failure_analytics(start_date, end_date, min_streak),
+        start_date.isoformat(), end_date.isoformat(), min_streak, get_area_maps_version(),
+    )
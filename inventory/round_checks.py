@@ -0,0 +1,82 @@
+"""
+Packed round checklists for analytics.
+
+EquipmentRound.check_code holds the ten checks of a round two bits each
+(PASS=0, WARN=1, FAIL=2, NA=3; check i of CHECK_FIELDS in bits 2i-2i+1),
+kept in sync by EquipmentRound.save() and create_round_sheet(). Failure
+rates then come from one integer column: fetch check_code with
+values_list() and decode the whole window at once with numpy, or extract
+a single check in SQL with check_code_of().
+"""
+from functools import reduce
+from operator import add
+
+import numpy as np
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from .models import EquipmentRound
+
+CHECK_FIELDS = EquipmentRound.CHECK_FIELDS
+CHECK_CODES = EquipmentRound.CHECK_CODES
+# Status of each code: CHECK_STATUSES[code]
+CHECK_STATUSES = tuple(sorted(CHECK_CODES, key=CHECK_CODES.get))
+BITS_PER_CHECK = 2
+CHECK_MASK = (1 << BITS_PER_CHECK) - 1
+FAILURE_STATUSES = ('WARN', 'FAIL')
+
+_SHIFTS = np.arange(len(CHECK_FIELDS), dtype=np.uint32) * BITS_PER_CHECK
+
+
+def check_code_of(field):
+    """Database expression with the code (0-3) of one check, taken from check_code."""
+    shift = BITS_PER_CHECK * CHECK_FIELDS.index(field)
+    return F('check_code').bitrightshift(shift).bitand(CHECK_MASK)
+
+
+def check_code_expression():
+    """Database expression computing check_code from the checklist columns."""
+    return reduce(add, [
+        Case(
+            *[When(**{field: status}, then=Value(code << (BITS_PER_CHECK * i))) for status, code in CHECK_CODES.items()],
+            default=Value(CHECK_CODES['NA'] << (BITS_PER_CHECK * i)),
+            output_field=PositiveIntegerField(),
+        )
+        for i, field in enumerate(CHECK_FIELDS)
+    ])
+
+
+def resync_check_codes(queryset=None):
+    """Re-encode rounds changed with queryset.update(), which bypasses save(). Returns the row count."""
+    if queryset is None:
+        queryset = EquipmentRound.objects.all()
+    return queryset.update(check_code=check_code_expression())
+
+
+def decode_check_codes(codes):
+    """
+    Unpack an iterable or array of check_code values into a
+    (len(codes), len(CHECK_FIELDS)) uint8 array of codes, columns in
+    CHECK_FIELDS order.
+    """
+    codes = np.asarray(codes, dtype=np.uint32).reshape(-1)
+    return ((codes[:, None] >> _SHIFTS) & CHECK_MASK).astype(np.uint8)
+
+
+def check_status_counts(codes):
+    """(len(CHECK_FIELDS), 4) int array: rounds per check (rows) and code (columns)."""
+    decoded = decode_check_codes(codes)
+    return (decoded[:, :, None] == np.arange(len(CHECK_STATUSES), dtype=np.uint8)).sum(axis=0)
+
+
+def failure_rates(codes, statuses=FAILURE_STATUSES):
+    """
+    {field: share of rounds in one of statuses}, over the rounds where the
+    check applies (NA excluded); None for checks that never applied.
+    """
+    counts = check_status_counts(codes)
+    applicable = counts.sum(axis=1) - counts[:, CHECK_CODES['NA']]
+    failing = counts[:, [CHECK_CODES[s] for s in statuses]].sum(axis=1)
+    return {
+        field: (float(failing[i] / applicable[i]) if applicable[i] else None)
+        for i, field in enumerate(CHECK_FIELDS)
+    }
@@ -0,0 +1,49 @@
+"""
+Database router that keeps the django-simple-history audit tables
+(Historical* models) on their own database.
+
+Enabled from settings when HISTORY_DATABASE_URL is set. History inserts then
+go to the 'history' alias and no longer contend with operational writes,
+while every other model stays on 'default'. Historical tables only hold
+relations without database constraints, so cross-database references (area,
+history_user, ...) are allowed and resolved with separate queries. Deleting a
+user never touches them: history_user does not cascade (AuditHistoricalRecords)
+and keeps the id of the deleted user.
+
+Migrations: run `manage.py migrate` and `manage.py migrate --database=history`.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from simple_history.models import HistoricalChanges
+
+HISTORY_DB_ALIAS = 'history'
+
+
+def is_history_model(model):
+    return isinstance(model, type) and issubclass(model, HistoricalChanges)
+
+
+class HistoryRouter:
+    """Route Historical* models to the 'history' database and everything else to 'default'."""
+
+    def db_for_read(self, model, **hints):
+        return HISTORY_DB_ALIAS if is_history_model(model) else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return HISTORY_DB_ALIAS if is_history_model(model) else DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_history_model(type(obj1)) or is_history_model(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        model = hints.get('model')
+        if model is not None:
+            is_history = is_history_model(model)
+        else:
+            # Migration state models are not real Historical* classes; simple_history
+            # always names them "Historical<Model>".
+            is_history = bool(model_name) and model_name.startswith('historical')
+        if is_history:
+            return db == HISTORY_DB_ALIAS
+        return db != HISTORY_DB_ALIAS
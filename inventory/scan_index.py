@@ -0,0 +1,69 @@
+"""
+Fast equipment lookup for QR and barcode scans.
+
+Each process keeps a serial -> id dict in memory next to the version it was
+built for; the version lives in the shared cache (inventory/caching.py), so
+a save anywhere makes every worker rebuild it (one values_list query) on
+its next scan. Scan cards (the few fields shown after a scan) are cached
+per equipment under the same version.
+
+QR labels carry a signed equipment id (inventory/qr.py), so a scan
+resolves without a lookup and the card can be shown without logging in.
+"""
+from .caching import bump_version, get_or_build, get_version
+from .choices import EQUIPMENT_STATUS_CHOICES, EQUIPMENT_TYPE_CHOICES
+from .models import Equipment
+
+SCAN_NAMESPACE = 'scan_index'
+
+# (version, {SERIAL: id}) of this process
+_index = (None, {})
+
+
+def bump_scan_index():
+    """Invalidate the index and cards once the current transaction commits."""
+    bump_version(SCAN_NAMESPACE)
+
+
+def build_scan_index():
+    return {
+        serial.strip().upper(): pk
+        for pk, serial in Equipment.objects.values_list('pk', 'serial_number')
+    }
+
+
+def get_scan_index():
+    """Return (version, {SERIAL: id}), rebuilding the in-process copy when stale."""
+    global _index
+    version = get_version(SCAN_NAMESPACE)
+    if _index[0] != version:
+        _index = (version, build_scan_index())
+    return _index
+
+
+def lookup_serial(serial):
+    """Equipment id of a scanned serial (case and surrounding spaces ignored), or None."""
+    return get_scan_index()[1].get(serial.strip().upper())
+
+
+def build_scan_card(pk):
+    row = Equipment.objects.filter(pk=pk).values(
+        'id', 'serial_number', 'type', 'brand', 'model', 'status', 'area__name',
+    ).first()
+    if row is None:
+        return None
+    return {
+        'id': row['id'],
+        'serial': row['serial_number'],
+        'type': dict(EQUIPMENT_TYPE_CHOICES).get(row['type'], row['type']),
+        'brand': row['brand'],
+        'model': row['model'],
+        'area': row['area__name'] or 'N/A',
+        'status': row['status'],
+        'status_display': dict(EQUIPMENT_STATUS_CHOICES).get(row['status'], row['status']),
+    }
+
+
+def get_scan_card(pk, version=None):
+    """Cached compact data of an equipment for scan results, or None if it does not exist."""
+    return get_or_build(SCAN_NAMESPACE, lambda: build_scan_card(pk), 'card', pk, version=version)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Equipment, Maintenance, Handover, Area
+from .choices import OFFLINE_RECORD_KIND_CHOICES
+from .models import Equipment, Maintenance, Handover, Area, EquipmentRound, ComponentLog
 
 class AreaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -37,3 +38,73 @@ class HandoverSerializer(serializers.ModelSerializer):
             'client', 'technician', 'receiver_name', 'observations',
         ]
 
+# Offline capture sync: the batch envelope and the data of each kind.
+# performed_by is always the user who syncs.
+
+OFFLINE_SYNC_MAX_RECORDS = 500
+
+class OfflineEquipmentField(serializers.PrimaryKeyRelatedField):
+    """Equipment by id, read from context['equipment'] (one in_bulk for the whole batch) when given."""
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('equipment')
+        if prefetched is not None:
+            try:
+                return prefetched[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+class OfflineRoundSerializer(serializers.ModelSerializer):
+    equipment = OfflineEquipmentField(queryset=Equipment.objects.all())
+
+    class Meta:
+        model = EquipmentRound
+        fields = ['equipment', 'datetime', *EquipmentRound.CHECK_FIELDS, 'general_status', 'observations']
+
+class OfflineComponentLogSerializer(serializers.ModelSerializer):
+    equipment = OfflineEquipmentField(queryset=Equipment.objects.all())
+
+    class Meta:
+        model = ComponentLog
+        fields = ['equipment', 'date', 'action_type', 'peripheral', 'quantity', 'component_name', 'description']
+
+    def validate(self, attrs):
+        if not attrs.get('peripheral') and not attrs.get('component_name'):
+            raise serializers.ValidationError(
+                "Debe ingresar una Descripción de Pieza manual si no selecciona una del inventario."
+            )
+        return attrs
+
+class OfflineMaintenanceSerializer(serializers.ModelSerializer):
+    equipment = OfflineEquipmentField(queryset=Equipment.objects.all())
+
+    class Meta:
+        model = Maintenance
+        exclude = ['id', 'acta_pdf', 'performed_by']
+
+OFFLINE_RECORD_SERIALIZERS = {
+    'ROUND': OfflineRoundSerializer,
+    'COMPONENT_LOG': OfflineComponentLogSerializer,
+    'MAINTENANCE': OfflineMaintenanceSerializer,
+}
+
+class OfflineRecordSerializer(serializers.Serializer):
+    client_id = serializers.UUIDField()
+    kind = serializers.ChoiceField(choices=OFFLINE_RECORD_KIND_CHOICES)
+    data = serializers.DictField()
+
+class OfflineBatchSerializer(serializers.Serializer):
+    records = serializers.ListField(
+        child=OfflineRecordSerializer(), allow_empty=False, max_length=OFFLINE_SYNC_MAX_RECORDS
+    )
+
+class ReportPeriodSerializer(serializers.Serializer):
+    """Optional ?start_date=&end_date= of analytics endpoints."""
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('start_date') and attrs.get('end_date') and attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior a la fecha final.")
+        return attrs
@@ -5,15 +5,30 @@ Extracted from views to keep views thin (#11) and enable unit testing (#25).
 """
 import calendar
 import logging
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
 
-from django.db.models import Count, F, Q, ExpressionWrapper, DateField
+from dateutil.relativedelta import relativedelta
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Count, F, Q, ExpressionWrapper, DateField, OuterRef, Subquery, Value, Sum, Max, Case, When
+from django.db.models.functions import Coalesce, Greatest
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
 from django.utils import timezone
 from datetime import timedelta
 
 from .models import (
     Equipment, Maintenance, Handover, Peripheral,
-    MaintenanceSchedule, EquipmentRound, ComponentLog,
+    MaintenanceSchedule, MaintenanceRecurrence, EquipmentRound, ComponentLog,
+    StockMovement, StockBalance, HandoverPeripheral, BulkOperation, RetirementLog,
+    SyncedRecord,
 )
+from .area_maps import bump_area_maps_version
+from .round_analytics import bump_round_analytics
+from .scan_index import bump_scan_index
+from .timeline import sync_equipment_events
+from .utils import generate_handover_pdf, generate_bulk_operation_pdf
 
 logger = logging.getLogger('inventory')
 
@@ -58,35 +73,899 @@ def sync_maintenance_to_schedule(maintenance):
         logger.error(f"Error syncing schedule: {e}")
 
 
+# ---------------------------------------------------------------------------
+# Recurring schedules (rules expanded on demand)
+# ---------------------------------------------------------------------------
+
+# How far ahead to look for the next rule occurrence when syncing next_maintenance_date.
+RECURRENCE_LOOKAHEAD_MONTHS = 24
+
+
+def _month_bounds(day):
+    last_day = calendar.monthrange(day.year, day.month)[1]
+    return day.replace(day=1), day.replace(day=last_day)
+
+
+def expand_maintenance_schedule(start, end, equipment_ids=None, area_id=None, status=None):
+    """
+    Return the scheduled maintenances between start and end (inclusive), sorted by date.
+
+    Occurrences of active MaintenanceRecurrence rules are generated in memory and
+    merged with the materialized MaintenanceSchedule rows. A materialized row
+    (completion, manual entry or CANCELLED exception) replaces any rule occurrence
+    for the same equipment in the same month. CANCELLED rows are never returned.
+
+    Each item exposes: equipment, equipment_id, scheduled_date, status,
+    schedule_id (None for rule occurrences), recurrence_id and is_virtual.
+    """
+    scope = None
+    if equipment_ids is not None or area_id:
+        scope_qs = Equipment.objects.all()
+        if equipment_ids is not None:
+            scope_qs = scope_qs.filter(id__in=list(equipment_ids))
+        if area_id:
+            scope_qs = scope_qs.filter(area_id=area_id)
+        scope = set(scope_qs.values_list('id', flat=True))
+        if not scope:
+            return []
+
+    # Materialized rows are read for whole months so that edge-of-window
+    # completions still override rule occurrences in the same month.
+    window_start, _ = _month_bounds(start)
+    _, window_end = _month_bounds(end)
+    rows = MaintenanceSchedule.objects.filter(scheduled_date__range=[window_start, window_end])
+    if scope is not None:
+        rows = rows.filter(equipment_id__in=scope)
+    rows = list(rows.values('id', 'equipment_id', 'scheduled_date', 'status'))
+
+    covered = {(r['equipment_id'], r['scheduled_date'].year, r['scheduled_date'].month) for r in rows}
+    entries = [
+        SimpleNamespace(
+            equipment_id=r['equipment_id'], scheduled_date=r['scheduled_date'], status=r['status'],
+            schedule_id=r['id'], recurrence_id=None, is_virtual=False,
+        )
+        for r in rows
+        if r['status'] != 'CANCELLED' and start <= r['scheduled_date'] <= end
+    ]
+
+    rules = list(
+        MaintenanceRecurrence.objects.filter(is_active=True, start_date__lte=end)
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=start))
+        .exclude(equipment__status='RETIRED')
+    )
+    group_area_ids = {rule.area_id for rule in rules if rule.area_id}
+    area_members = {}
+    if group_area_ids:
+        members = Equipment.objects.filter(area_id__in=group_area_ids).exclude(status='RETIRED')
+        for eq_id, eq_area_id in members.values_list('id', 'area_id'):
+            area_members.setdefault(eq_area_id, []).append(eq_id)
+
+    for rule in rules:
+        targets = [rule.equipment_id] if rule.equipment_id else area_members.get(rule.area_id, [])
+        if scope is not None:
+            targets = [eq_id for eq_id in targets if eq_id in scope]
+        if not targets:
+            continue
+        for occurrence in rule.occurrences_between(start, end):
+            for eq_id in targets:
+                key = (eq_id, occurrence.year, occurrence.month)
+                if key in covered:
+                    continue
+                covered.add(key)
+                entries.append(SimpleNamespace(
+                    equipment_id=eq_id, scheduled_date=occurrence, status='PENDING',
+                    schedule_id=None, recurrence_id=rule.pk, is_virtual=True,
+                ))
+
+    if status:
+        entries = [e for e in entries if e.status == status]
+
+    equipments = Equipment.objects.select_related('area').in_bulk({e.equipment_id for e in entries})
+    for entry in entries:
+        entry.equipment = equipments.get(entry.equipment_id)
+    entries.sort(key=lambda e: (e.scheduled_date, e.equipment_id))
+    return entries
+
+
+def next_pending_schedule_date(equipment_id, after):
+    """Return the first PENDING schedule date (materialized or from a rule) strictly after `after`."""
+    candidates = []
+    next_row = MaintenanceSchedule.objects.filter(
+        equipment_id=equipment_id, scheduled_date__gt=after, status='PENDING'
+    ).order_by('scheduled_date').values_list('scheduled_date', flat=True).first()
+    if next_row:
+        candidates.append(next_row)
+
+    upcoming = expand_maintenance_schedule(
+        after + timedelta(days=1), after + relativedelta(months=RECURRENCE_LOOKAHEAD_MONTHS),
+        equipment_ids=[equipment_id], status='PENDING',
+    )
+    if upcoming:
+        candidates.append(upcoming[0].scheduled_date)
+    return min(candidates) if candidates else None
+
+
+def _recurrence_occurs_in_month(equipment_id, day):
+    """True if an active rule targeting the equipment has an occurrence in the month of `day`."""
+    equipment = Equipment.objects.filter(pk=equipment_id).values('area_id', 'status').first()
+    if not equipment or equipment['status'] == 'RETIRED':
+        return False
+    targets = Q(equipment_id=equipment_id)
+    if equipment['area_id']:
+        targets |= Q(area_id=equipment['area_id'])
+    month_start, month_end = _month_bounds(day)
+    rules = MaintenanceRecurrence.objects.filter(targets, is_active=True)
+    return any(next(rule.occurrences_between(month_start, month_end), None) for rule in rules)
+
+
+def toggle_schedule_entry(equipment_id, scheduled_date):
+    """
+    Add or remove a mark on the schedule grid. Returns 'added' or 'removed'.
+
+    Removing a rule occurrence (or a row in a month where a rule applies) stores a
+    CANCELLED exception instead of deleting, so the rule does not bring it back.
+    """
+    schedule = MaintenanceSchedule.objects.filter(
+        equipment_id=equipment_id, scheduled_date=scheduled_date
+    ).first()
+
+    if schedule and schedule.status == 'CANCELLED':
+        schedule.status = 'PENDING'
+        schedule.save()
+        return 'added'
+
+    if schedule:
+        if _recurrence_occurs_in_month(equipment_id, scheduled_date):
+            schedule.status = 'CANCELLED'
+            schedule.save()
+        else:
+            schedule.delete()
+        return 'removed'
+
+    occurrences = expand_maintenance_schedule(scheduled_date, scheduled_date, equipment_ids=[equipment_id])
+    if any(e.is_virtual for e in occurrences):
+        MaintenanceSchedule.objects.create(
+            equipment_id=equipment_id, scheduled_date=scheduled_date, status='CANCELLED'
+        )
+        return 'removed'
+
+    MaintenanceSchedule.objects.create(
+        equipment_id=equipment_id, scheduled_date=scheduled_date, status='PENDING'
+    )
+    return 'added'
+
+
+# ---------------------------------------------------------------------------
+# Bulk operations: deferred Maintenance ↔ Schedule sync
+# ---------------------------------------------------------------------------
+
+_deferred_sync = threading.local()
+
+
+@contextmanager
+def deferred_schedule_sync():
+    """
+    Defer the Maintenance ↔ MaintenanceSchedule signal cascade during a bulk
+    operation (offline sync batches, data fixes, copying a year's plan).
+
+    Inside the block the signals only record which equipment was touched; on a
+    clean exit reconcile_schedule_sync() runs once for all of it, including the
+    schedule completion of sync_maintenance_to_schedule() for every maintenance
+    created, which callers must then skip. Nested blocks are merged into the
+    outermost one. If the block raises, nothing is reconciled.
+
+        with deferred_schedule_sync():
+            for row in rows:
+                Maintenance.objects.create(...)
+    """
+    if getattr(_deferred_sync, 'state', None) is not None:
+        yield _deferred_sync.state
+        return
+
+    state = _deferred_sync.state = {'equipment_ids': set(), 'next_dates': set(), 'performed': set()}
+    try:
+        yield state
+    finally:
+        _deferred_sync.state = None
+    reconcile_schedule_sync(state['equipment_ids'], state['next_dates'], state['performed'])
+
+
+def record_deferred_schedule_sync(instance, created=False):
+    """
+    Called by the schedule signals. Returns True (and records the change) when a
+    deferred_schedule_sync() block is active, so the signal must not run its cascade.
+    """
+    state = getattr(_deferred_sync, 'state', None)
+    if state is None:
+        return False
+    state['equipment_ids'].add(instance.equipment_id)
+    if isinstance(instance, Maintenance):
+        if instance.next_maintenance_date:
+            state['next_dates'].add((instance.equipment_id, instance.next_maintenance_date))
+        if created:
+            state['performed'].add((instance.equipment_id, instance.date))
+    return True
+
+
+def _complete_schedules(performed):
+    """
+    Set-based version of sync_maintenance_to_schedule for many
+    (equipment_id, date) pairs, applied in date order: each maintenance
+    completes one PENDING schedule of its month, or adds a COMPLETED row.
+    """
+    equipment_ids = {equipment_id for equipment_id, _ in performed}
+    first_day = min(day for _, day in performed).replace(day=1)
+    _, last_day = _month_bounds(max(day for _, day in performed))
+    rows = MaintenanceSchedule.objects.filter(
+        equipment_id__in=equipment_ids, scheduled_date__range=[first_day, last_day]
+    ).order_by('pk')
+
+    taken = set()
+    pending_by_month = {}
+    for row in rows:
+        taken.add((row.equipment_id, row.scheduled_date))
+        if row.status == 'PENDING':
+            key = (row.equipment_id, row.scheduled_date.year, row.scheduled_date.month)
+            pending_by_month.setdefault(key, []).append(row)
+
+    to_update, to_create = [], []
+    for equipment_id, day in sorted(performed):
+        pending = pending_by_month.get((equipment_id, day.year, day.month))
+        if pending:
+            schedule = pending.pop(0)
+            schedule.status = 'COMPLETED'
+            if (equipment_id, day) not in taken:
+                taken.discard((equipment_id, schedule.scheduled_date))
+                schedule.scheduled_date = day
+                taken.add((equipment_id, day))
+            to_update.append(schedule)
+        elif (equipment_id, day) not in taken:
+            to_create.append(MaintenanceSchedule(equipment_id=equipment_id, scheduled_date=day, status='COMPLETED'))
+            taken.add((equipment_id, day))
+
+    if to_update:
+        MaintenanceSchedule.objects.bulk_update(to_update, ['status', 'scheduled_date'], batch_size=500)
+    if to_create:
+        MaintenanceSchedule.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+
+
+def reconcile_schedule_sync(equipment_ids, next_dates=(), performed=()):
+    """
+    Bring schedules and next_maintenance_date up to date for many equipment at once,
+    in a few set-based queries, with the same outcome as creating each maintenance
+    through the create paths (per-row signals plus sync_maintenance_to_schedule):
+
+    1. Create the PENDING rows requested through next_maintenance_date (signal).
+    2. Complete the month's schedule for each newly created maintenance
+       (sync_maintenance_to_schedule, called by the create views and the
+       offline sync; the signals alone do not do it).
+    3. Point each equipment's latest Maintenance to its next PENDING date
+       (stored row or recurrence rule); changes are written with history rows (signal).
+
+    Returns the number of Maintenance records updated.
+    """
+    equipment_ids = set(equipment_ids)
+    if not equipment_ids:
+        return 0
+
+    with transaction.atomic():
+        if next_dates:
+            MaintenanceSchedule.objects.bulk_create(
+                [MaintenanceSchedule(equipment_id=eq_id, scheduled_date=day, status='PENDING') for eq_id, day in next_dates],
+                batch_size=500, ignore_conflicts=True,
+            )
+        if performed:
+            _complete_schedules(performed)
+
+        latest_ids = Equipment.objects.filter(pk__in=equipment_ids).annotate(
+            last_maintenance_id=Subquery(
+                Maintenance.objects.filter(equipment=OuterRef('pk')).order_by('-date', '-pk').values('pk')[:1]
+            )
+        ).values_list('last_maintenance_id', flat=True)
+        latest = list(Maintenance.objects.filter(pk__in=[pk for pk in latest_ids if pk]))
+        if not latest:
+            return 0
+
+        earliest = min(m.date for m in latest)
+        candidates = {}
+        stored = MaintenanceSchedule.objects.filter(
+            equipment_id__in=equipment_ids, status='PENDING', scheduled_date__gt=earliest
+        ).values_list('equipment_id', 'scheduled_date')
+        for eq_id, day in stored:
+            candidates.setdefault(eq_id, []).append(day)
+        generated = expand_maintenance_schedule(
+            earliest + timedelta(days=1),
+            max(m.date for m in latest) + relativedelta(months=RECURRENCE_LOOKAHEAD_MONTHS),
+            equipment_ids=equipment_ids, status='PENDING',
+        )
+        for entry in generated:
+            candidates.setdefault(entry.equipment_id, []).append(entry.scheduled_date)
+
+        changed = []
+        for maintenance in latest:
+            upcoming = [day for day in candidates.get(maintenance.equipment_id, []) if day > maintenance.date]
+            next_date = min(upcoming) if upcoming else None
+            if maintenance.next_maintenance_date != next_date:
+                maintenance.next_maintenance_date = next_date
+                changed.append(maintenance)
+
+        if changed:
+            bulk_update_with_history(changed, Maintenance, ['next_maintenance_date'], batch_size=500)
+    return len(changed)
+
+
 # ---------------------------------------------------------------------------
 # Peripheral stock management
+#
+# Every stock change is appended to the StockMovement ledger and applied to
+# the materialized StockBalance of (peripheral, area) and to the SKU total in
+# Peripheral.quantity, all in the same transaction. Balances are changed with
+# conditional F-expression UPDATEs so concurrent movements never lose updates.
 # ---------------------------------------------------------------------------
 
-def reduce_peripheral_stock(peripheral, quantity):
+def _current_stock(peripheral_id):
+    return Peripheral.objects.filter(pk=peripheral_id).values_list('quantity', flat=True).first()
+
+
+def record_stock_movement(peripheral, kind, quantity, area_id, user=None, handover=None,
+                          component_log=None, note='', strict=True, sync_total=True):
+    """
+    Apply a signed stock change to the (peripheral, area) balance and append
+    it to the ledger.
+
+    Outgoing movements larger than the balance fail when strict, otherwise
+    they are floored at the available balance. sync_total=False leaves
+    Peripheral.quantity untouched (used when the ledger follows a save() that
+    already changed it). Returns the StockMovement, or None if nothing moved.
+    peripheral.quantity is refreshed from the database either way.
+    """
+    movement = None
+    with transaction.atomic():
+        balances = StockBalance.objects.filter(peripheral_id=peripheral.pk, area_id=area_id)
+        if quantity < 0 and strict:
+            moved = balances.filter(quantity__gte=-quantity).update(quantity=F('quantity') + quantity)
+            delta = quantity if moved else 0
+        elif quantity < 0:
+            balance = balances.select_for_update().first()
+            delta = -min(-quantity, balance.quantity if balance else 0)
+            if delta:
+                balances.update(quantity=F('quantity') + delta)
+        else:
+            StockBalance.objects.get_or_create(peripheral_id=peripheral.pk, area_id=area_id)
+            balances.update(quantity=F('quantity') + quantity)
+            delta = quantity
+
+        if delta:
+            if sync_total:
+                Peripheral.objects.filter(pk=peripheral.pk).update(
+                    quantity=Greatest(F('quantity') + delta, Value(0))
+                )
+            movement = StockMovement.objects.create(
+                peripheral_id=peripheral.pk,
+                area_id=area_id,
+                kind=kind,
+                quantity=delta,
+                balance_after=balances.values_list('quantity', flat=True).first(),
+                performed_by=user,
+                handover=handover,
+                component_log=component_log,
+                note=note,
+            )
+        peripheral.quantity = _current_stock(peripheral.pk)
+    return movement
+
+
+def reduce_peripheral_stock(peripheral, quantity, kind='COMPONENT', user=None, **links):
     """
     Reduce peripheral stock by the given quantity.
     Returns (success: bool, remaining_stock: int).
+
+    Taken from the balance of the peripheral's area with a single conditional
+    UPDATE (quantity = quantity - n WHERE quantity >= n). The remaining stock is
+    the SKU total read back from the database.
     """
-    if peripheral.quantity >= quantity:
-        peripheral.quantity -= quantity
-        peripheral.save()
-        return True, peripheral.quantity
-    return False, peripheral.quantity
+    if quantity <= 0:
+        return True, _current_stock(peripheral.pk)
+    movement = record_stock_movement(peripheral, kind, -quantity, peripheral.area_id, user=user, **links)
+    return movement is not None, peripheral.quantity
 
 
-def reduce_peripheral_stock_floor(peripheral, quantity):
+def reduce_peripheral_stock_floor(peripheral, quantity, kind='HANDOVER', user=None, **links):
     """
     Reduce peripheral stock by the given quantity, flooring at 0.
-    Used by handover (less strict than component log).
+    Used by handover (less strict than component log). Returns the remaining stock.
     """
-    if peripheral.quantity >= quantity:
-        peripheral.quantity -= quantity
-    else:
-        peripheral.quantity = max(0, peripheral.quantity - quantity)
-    peripheral.save()
+    if quantity > 0:
+        record_stock_movement(peripheral, kind, -quantity, peripheral.area_id, user=user, strict=False, **links)
     return peripheral.quantity
 
 
+def reduce_peripheral_stock_bulk(quantities, kind='HANDOVER', user=None, **links):
+    """
+    Floor-reduce several peripherals at once: {peripheral_id: quantity}.
+
+    Set-based version of reduce_peripheral_stock_floor. The balances of the
+    peripherals' areas are locked and read in one query, then decremented
+    with one CASE UPDATE, the SKU totals with another, and the ledger rows are
+    bulk inserted. Returns {peripheral_id: units actually taken}.
+    """
+    quantities = {pk: q for pk, q in quantities.items() if q > 0}
+    if not quantities:
+        return {}
+    with transaction.atomic():
+        area_by_peripheral = dict(Peripheral.objects.filter(pk__in=quantities).values_list('pk', 'area_id'))
+        balances = {
+            (b.peripheral_id, b.area_id): b
+            for b in StockBalance.objects.select_for_update().filter(peripheral_id__in=quantities)
+        }
+        taken = {}
+        for peripheral_id, area_id in area_by_peripheral.items():
+            balance = balances.get((peripheral_id, area_id))
+            amount = min(quantities[peripheral_id], balance.quantity if balance else 0)
+            if amount:
+                taken[peripheral_id] = amount
+                balance.quantity -= amount
+        if not taken:
+            return {}
+
+        moved = [balances[(pk, area_by_peripheral[pk])] for pk in taken]
+        StockBalance.objects.filter(pk__in=[b.pk for b in moved]).update(
+            quantity=Case(*[When(pk=b.pk, then=Value(b.quantity)) for b in moved])
+        )
+        Peripheral.objects.filter(pk__in=taken).update(
+            quantity=Greatest(F('quantity') - Case(*[When(pk=pk, then=Value(q)) for pk, q in taken.items()]), Value(0))
+        )
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                peripheral_id=b.peripheral_id, area_id=b.area_id, kind=kind,
+                quantity=-taken[b.peripheral_id], balance_after=b.quantity,
+                performed_by=user, **links,
+            )
+            for b in moved
+        ])
+    return taken
+
+
+def transfer_peripheral_stock_bulk(peripherals, to_area_id, user=None, note=''):
+    """
+    Move the balance each peripheral holds in its current area to to_area_id
+    (set-based version of transfer_peripheral_stock, run before the area
+    itself is changed). Returns the number of units moved.
+    """
+    from_area = {p.pk: p.area_id for p in peripherals if p.area_id != to_area_id}
+    if not from_area:
+        return 0
+    with transaction.atomic():
+        balances = {
+            (b.peripheral_id, b.area_id): b
+            for b in StockBalance.objects.select_for_update().filter(peripheral_id__in=from_area)
+        }
+        to_move = [pk for pk, area_id in from_area.items() if balances.get((pk, area_id)) and balances[(pk, area_id)].quantity]
+        missing = [StockBalance(peripheral_id=pk, area_id=to_area_id) for pk in to_move if (pk, to_area_id) not in balances]
+        for balance in StockBalance.objects.bulk_create(missing):
+            balances[(balance.peripheral_id, to_area_id)] = balance
+
+        changed, movements, moved = [], [], 0
+        for pk in to_move:
+            source, target = balances[(pk, from_area[pk])], balances[(pk, to_area_id)]
+            quantity = source.quantity
+            source.quantity = 0
+            target.quantity += quantity
+            moved += quantity
+            changed += [source, target]
+            movements += [
+                StockMovement(peripheral_id=pk, area_id=source.area_id, kind='TRANSFER', quantity=-quantity,
+                              balance_after=0, performed_by=user, note=note),
+                StockMovement(peripheral_id=pk, area_id=to_area_id, kind='TRANSFER', quantity=quantity,
+                              balance_after=target.quantity, performed_by=user, note=note),
+            ]
+        StockBalance.objects.bulk_update(changed, ['quantity'], batch_size=500)
+        StockMovement.objects.bulk_create(movements, batch_size=500)
+    return moved
+
+
+def retire_peripheral_stock_bulk(peripheral_ids, user=None, note=''):
+    """Write off every balance of several peripherals at once. Returns the units written off."""
+    peripheral_ids = list(peripheral_ids)
+    with transaction.atomic():
+        balances = list(StockBalance.objects.select_for_update().filter(peripheral_id__in=peripheral_ids, quantity__gt=0))
+        StockMovement.objects.bulk_create([
+            StockMovement(peripheral_id=b.peripheral_id, area_id=b.area_id, kind='RETIREMENT', quantity=-b.quantity,
+                          balance_after=0, performed_by=user, note=note)
+            for b in balances
+        ], batch_size=500)
+        StockBalance.objects.filter(pk__in=[b.pk for b in balances]).update(quantity=0)
+        Peripheral.objects.filter(pk__in=peripheral_ids).update(quantity=0)
+    return sum(b.quantity for b in balances)
+
+
+def receive_peripheral_stock(peripheral, quantity, area_id=None, user=None, note=''):
+    """Add received units to an area (the peripheral's area by default)."""
+    area_id = peripheral.area_id if area_id is None else area_id
+    return record_stock_movement(peripheral, 'RECEIPT', quantity, area_id, user=user, note=note)
+
+
+def transfer_peripheral_stock(peripheral, from_area_id, to_area_id, quantity=None, user=None, note='', sync_total=True):
+    """Move units (all by default) between two area balances. The SKU total is unchanged."""
+    if quantity is None:
+        quantity = StockBalance.objects.filter(
+            peripheral_id=peripheral.pk, area_id=from_area_id
+        ).values_list('quantity', flat=True).first() or 0
+    if not quantity or from_area_id == to_area_id:
+        return 0
+    with transaction.atomic():
+        out = record_stock_movement(peripheral, 'TRANSFER', -quantity, from_area_id, user=user, note=note, strict=False, sync_total=sync_total)
+        if out is None:
+            return 0
+        record_stock_movement(peripheral, 'TRANSFER', -out.quantity, to_area_id, user=user, note=note, sync_total=sync_total)
+    return -out.quantity
+
+
+def retire_peripheral_stock(peripheral, user=None, note=''):
+    """Write off every balance of a retired peripheral. Returns the units written off."""
+    retired = 0
+    with transaction.atomic():
+        for area_id, quantity in StockBalance.objects.filter(peripheral_id=peripheral.pk, quantity__gt=0).values_list('area_id', 'quantity'):
+            movement = record_stock_movement(peripheral, 'RETIREMENT', -quantity, area_id, user=user, note=note, strict=False)
+            if movement:
+                retired -= movement.quantity
+        # Units not backed by a balance (should not happen) are cleared as well.
+        Peripheral.objects.filter(pk=peripheral.pk).update(quantity=0)
+        peripheral.quantity = 0
+    return retired
+
+
+def sync_peripheral_ledger(peripheral, created, before=None, user=None):
+    """
+    Record in the ledger a stock change made by saving the Peripheral itself
+    (creation, edit of quantity or area). before is {'area_id', 'quantity'}
+    as stored before the save.
+    """
+    if created:
+        if peripheral.quantity:
+            record_stock_movement(peripheral, 'RECEIPT', peripheral.quantity, peripheral.area_id,
+                                  user=user, note='Registro inicial', sync_total=False)
+        return
+    if before is None:
+        return
+    quantity = peripheral.quantity
+    if before['area_id'] != peripheral.area_id:
+        transfer_peripheral_stock(peripheral, before['area_id'], peripheral.area_id, user=user,
+                                  note='Cambio de área del periférico', sync_total=False)
+    delta = quantity - before['quantity']
+    if delta:
+        record_stock_movement(peripheral, 'ADJUSTMENT', delta, peripheral.area_id, user=user,
+                              note='Edición de cantidad', strict=False, sync_total=False)
+    peripheral.quantity = quantity
+
+
+def peripheral_stock_as_of(peripheral_id, timestamp):
+    """
+    Return {area_id: quantity} for one peripheral at timestamp.
+    One indexed (peripheral, area, date) lookup per area that ever held it.
+    """
+    balances = {}
+    area_ids = StockBalance.objects.filter(peripheral_id=peripheral_id).values_list('area_id', flat=True)
+    for area_id in area_ids:
+        last = StockMovement.objects.filter(
+            peripheral_id=peripheral_id, area_id=area_id, date__lte=timestamp
+        ).order_by('-date', '-id').values_list('balance_after', flat=True).first()
+        if last:
+            balances[area_id] = last
+    return balances
+
+
+def stock_balances_as_of(timestamp):
+    """
+    Return {(peripheral_id, area_id): quantity} for every SKU at timestamp.
+    The ledger is append-only with the date set on insert, so the latest
+    movement of each pair is the one with the highest id.
+    """
+    latest_ids = StockMovement.objects.filter(date__lte=timestamp).values(
+        'peripheral_id', 'area_id'
+    ).annotate(last_id=Max('id')).values_list('last_id', flat=True)
+    rows = StockMovement.objects.filter(id__in=Subquery(latest_ids)).values_list('peripheral_id', 'area_id', 'balance_after')
+    return {(p, a): q for p, a, q in rows if q}
+
+
+# ---------------------------------------------------------------------------
+# Handovers
+# ---------------------------------------------------------------------------
+
+def bulk_update_equipment(equipment, user=None, reason='', **values):
+    """
+    Set field values on many equipment with bulk UPDATEs plus one bulk insert
+    of history rows (values are attnames, e.g. area_id=3, status='RETIRED').
+    Equipment that already has the values is skipped. Returns the updated list.
+    """
+    now = timezone.now()
+    changed = [e for e in equipment if any(getattr(e, f) != v for f, v in values.items())]
+    for e in changed:
+        for field, value in values.items():
+            setattr(e, field, value)
+        e.updated_at = now
+    if changed:
+        fields = [Equipment._meta.get_field(f).name for f in values]
+        bulk_update_with_history(
+            changed, Equipment, [*fields, 'updated_at'], batch_size=500,
+            default_user=user, default_change_reason=reason or None,
+        )
+        if 'area_id' in values:
+            bump_area_maps_version()
+        bump_scan_index()
+    return changed
+
+
+def move_equipment_to_area(equipment, area_id, user=None, reason=''):
+    """
+    Reassign equipment to an area with one bulk UPDATE plus one bulk insert
+    of history rows. Returns the number of equipment moved.
+    """
+    return len(bulk_update_equipment(equipment, user=user, reason=reason, area_id=area_id))
+
+
+def store_handover_acta(handover_id):
+    """Render the acta of a saved handover and attach it (run after commit)."""
+    handover = Handover.objects.select_related(
+        'source_area', 'destination_area', 'client', 'technician'
+    ).filter(pk=handover_id).first()
+    if handover is None:
+        return
+    try:
+        pdf_content = generate_handover_pdf(handover)
+        handover.acta_pdf.save(f'acta_entrega_{handover.pk}.pdf', ContentFile(pdf_content), save=False)
+        Handover.objects.filter(pk=handover.pk).update(acta_pdf=handover.acta_pdf.name)
+    except Exception as e:
+        # The acta view renders it on demand when missing.
+        logger.error(f"Error generating acta for handover {handover_id}: {e}")
+
+
+def create_handover(handover, equipment, peripheral_rows, user=None):
+    """
+    Save a handover as one atomic unit.
+
+    - equipment links are inserted in one statement (M2M set),
+    - HandoverPeripheral rows with one bulk insert (repeated peripherals merged),
+    - stock is taken with reduce_peripheral_stock_bulk,
+    - all listed equipment moves to destination_area in one bulk UPDATE,
+    - the acta PDF is generated once the transaction commits.
+
+    peripheral_rows is an iterable of (peripheral, quantity).
+    """
+    equipment = list(equipment)
+    quantities = {}
+    for peripheral, quantity in peripheral_rows:
+        if peripheral and quantity:
+            quantities[peripheral.pk] = quantities.get(peripheral.pk, 0) + quantity
+
+    with transaction.atomic():
+        handover.technician = handover.technician or user
+        handover.save()
+        if equipment:
+            handover.equipment.set(equipment)
+        HandoverPeripheral.objects.bulk_create([
+            HandoverPeripheral(handover=handover, peripheral_id=pk, quantity=q) for pk, q in quantities.items()
+        ])
+        reduce_peripheral_stock_bulk(quantities, kind='HANDOVER', user=user, handover=handover)
+        if handover.destination_area_id and equipment:
+            move_equipment_to_area(
+                equipment, handover.destination_area_id, user=user,
+                reason=f'Acta de entrega #{handover.pk}',
+            )
+        transaction.on_commit(lambda: store_handover_acta(handover.pk))
+    return handover
+
+
+# ---------------------------------------------------------------------------
+# Equipment filters (list, export, label sheets)
+# ---------------------------------------------------------------------------
+
+def filter_equipment(params, queryset=None):
+    """
+    Apply the equipment list filters in params (a QueryDict or dict): q,
+    area, status, type, ownership and ids (comma separated primary keys).
+    """
+    queryset = queryset if queryset is not None else Equipment.objects.all()
+    query = params.get('q', '')
+    if query:
+        queryset = queryset.filter(
+            Q(serial_number__icontains=query) |
+            Q(brand__icontains=query) |
+            Q(model__icontains=query) |
+            Q(ip_address__icontains=query)
+        )
+    if params.get('area'):
+        queryset = queryset.filter(area_id=params['area'])
+    if params.get('status'):
+        queryset = queryset.filter(status=params['status'])
+    if params.get('type'):
+        queryset = queryset.filter(type=params['type'])
+    if params.get('ownership'):
+        queryset = queryset.filter(ownership_type=params['ownership'])
+    ids = [pk for pk in str(params.get('ids', '')).split(',') if pk.strip().isdigit()]
+    if ids:
+        queryset = queryset.filter(pk__in=ids)
+    return queryset
+
+
+# ---------------------------------------------------------------------------
+# Bulk asset actions (mass reassignment, status change, retirement)
+# ---------------------------------------------------------------------------
+
+def store_bulk_operation_acta(operation_id):
+    """Render the consolidated acta of a bulk operation and attach it (run after commit)."""
+    operation = BulkOperation.objects.select_related('area', 'performed_by').filter(pk=operation_id).first()
+    if operation is None:
+        return
+    try:
+        pdf_content = generate_bulk_operation_pdf(operation)
+        operation.acta_pdf.save(f'acta_masiva_{operation.pk}.pdf', ContentFile(pdf_content), save=False)
+        BulkOperation.objects.filter(pk=operation.pk).update(acta_pdf=operation.acta_pdf.name)
+    except Exception as e:
+        logger.error(f"Error generating acta for bulk operation {operation_id}: {e}")
+
+
+def apply_bulk_action(action, equipment, peripherals, user=None, area=None, status='', reason='', photo=None):
+    """
+    Apply a BulkOperation to many assets in one transaction and return it.
+
+    REASSIGN moves equipment and peripherals (and their stock) to area,
+    STATUS sets status, RETIRE sets RETIRED, writes off the peripheral stock
+    and inserts one RetirementLog per asset (sharing the uploaded evidence)
+    in a single statement. Equipment changes go through bulk_update_equipment
+    so every asset gets its history row; the acta is generated on commit.
+    """
+    equipment = list(equipment)
+    peripherals = list(peripherals)
+    with transaction.atomic():
+        operation = BulkOperation.objects.create(
+            action=action, area=area if action == 'REASSIGN' else None,
+            status=status if action == 'STATUS' else '',
+            reason=reason, photo=photo, performed_by=user,
+        )
+        operation.equipment.set(equipment)
+        operation.peripherals.set(peripherals)
+        change_reason = f'{operation.get_action_display()} #{operation.pk}'
+
+        if action == 'REASSIGN':
+            area_id = area.pk if area else None
+            bulk_update_equipment(equipment, user=user, reason=change_reason, area_id=area_id)
+            transfer_peripheral_stock_bulk(peripherals, area_id, user=user, note=change_reason)
+            for p in peripherals:
+                p.area_id = area_id
+            Peripheral.objects.bulk_update(peripherals, ['area'], batch_size=500)
+            if peripherals:
+                bump_area_maps_version()
+        else:
+            new_status = 'RETIRED' if action == 'RETIRE' else status
+            bulk_update_equipment(equipment, user=user, reason=change_reason, status=new_status)
+            for p in peripherals:
+                p.status = new_status
+            Peripheral.objects.bulk_update(peripherals, ['status'], batch_size=500)
+
+        if action == 'RETIRE':
+            retire_peripheral_stock_bulk([p.pk for p in peripherals], user=user, note=change_reason)
+            shared = dict(reason=reason, photo=operation.photo.name, date=operation.date,
+                          performed_by=user, operation=operation)
+            logs = RetirementLog.objects.bulk_create(
+                [RetirementLog(equipment=e, **shared) for e in equipment]
+                + [RetirementLog(peripheral=p, **shared) for p in peripherals],
+                batch_size=500,
+            )
+            # bulk_create skips the timeline signals
+            sync_equipment_events('RETIREMENT', [log.pk for log in logs if log.equipment_id])
+
+        transaction.on_commit(lambda: store_bulk_operation_acta(operation.pk))
+    return operation
+
+
+# ---------------------------------------------------------------------------
+# Equipment rounds
+# ---------------------------------------------------------------------------
+
+def create_round_sheet(rounds, user=None, keep_datetime=False):
+    """
+    Save a whole area round (unsaved EquipmentRound objects) in one
+    transaction: one bulk insert of rounds, one of their history rows and
+    the timeline events (bulk_create skips the signals). Returns the rounds.
+    Rounds are stamped with the current time unless keep_datetime (rounds
+    captured offline keep the time they were taken).
+    """
+    now = timezone.now()
+    for round_obj in rounds:
+        round_obj.performed_by = user
+        round_obj.sync_check_code()
+        if not keep_datetime:
+            round_obj.datetime = now
+    with transaction.atomic():
+        rounds = bulk_create_with_history(rounds, EquipmentRound, batch_size=500, default_user=user)
+        sync_equipment_events('ROUND', [r.pk for r in rounds])
+        bump_round_analytics()
+    return rounds
+
+
+# ---------------------------------------------------------------------------
+# Offline capture sync
+# ---------------------------------------------------------------------------
+
+def apply_offline_records(records, user=None):
+    """
+    Apply a batch of records captured offline, given as (client_id, kind,
+    unsaved instance) with kind ROUND, COMPONENT_LOG or MAINTENANCE.
+
+    Everything is applied in one transaction. Records whose client_id was
+    already synced are skipped, so a device can resend a batch whose answer
+    it never got. Rounds go in with one bulk insert; a component change
+    without enough stock is rolled back alone and reported.
+
+    Returns {client_id: {'status': 'created'|'duplicate'|'error', 'id', 'error'}}.
+    """
+    results = {}
+    with transaction.atomic():
+        synced = dict(
+            SyncedRecord.objects.filter(client_id__in=[r[0] for r in records])
+            .values_list('client_id', 'object_id')
+        )
+        pending = []
+        for client_id, kind, obj in records:
+            if client_id in synced or client_id in results:
+                results[client_id] = {'status': 'duplicate', 'id': synced.get(client_id)}
+            else:
+                results[client_id] = None
+                pending.append((client_id, kind, obj))
+
+        rounds = [(client_id, obj) for client_id, kind, obj in pending if kind == 'ROUND']
+        if rounds:
+            create_round_sheet([obj for _, obj in rounds], user=user, keep_datetime=True)
+
+        applied = list(rounds)
+        # Maintenance schedules are completed and synced once for the whole batch.
+        with deferred_schedule_sync():
+            for client_id, kind, obj in pending:
+                if kind == 'COMPONENT_LOG':
+                    error = _apply_offline_component_log(obj, user)
+                    if error:
+                        results[client_id] = {'status': 'error', 'id': None, 'error': error}
+                        continue
+                elif kind == 'MAINTENANCE':
+                    obj.performed_by = user
+                    obj.save()
+                else:
+                    continue
+                applied.append((client_id, obj))
+
+        kinds = {client_id: kind for client_id, kind, _ in pending}
+        SyncedRecord.objects.bulk_create([
+            SyncedRecord(client_id=client_id, kind=kinds[client_id], object_id=obj.pk, user=user)
+            for client_id, obj in applied
+        ])
+        for client_id, obj in applied:
+            results[client_id] = {'status': 'created', 'id': obj.pk}
+    logger.info(
+        "Offline sync by %s: %d created, %d duplicate, %d rejected",
+        user, len(applied), sum(r['status'] == 'duplicate' for r in results.values()),
+        sum(r['status'] == 'error' for r in results.values()),
+    )
+    return results
+
+
+def _apply_offline_component_log(log, user):
+    """Save a component change and deduct its stock; returns an error message or None."""
+    log.performed_by = user
+    deduct_stock = log.peripheral and log.action_type in ['ADDED', 'REPLACED']
+    if deduct_stock and not log.component_name:
+        log.component_name = str(log.peripheral)
+    with transaction.atomic():
+        log.save()
+        if deduct_stock:
+            success, remaining = reduce_peripheral_stock(log.peripheral, log.quantity, user=user, component_log=log)
+            if not success:
+                transaction.set_rollback(True)
+                log.pk = None
+                return f"No hay suficiente stock para el periférico seleccionado. Stock actual: {remaining}"
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Dashboard / Reports data computation
 # ---------------------------------------------------------------------------
@@ -132,8 +1011,13 @@ def get_lifespan_expired_queryset(queryset=None):
 
 
 def get_low_stock_peripherals():
-    """Return peripherals that are at or below their minimum stock level."""
-    return Peripheral.objects.filter(quantity__lte=F('min_stock_level'))
+    """
+    Return peripherals that are at or below their minimum stock level,
+    annotated with stock (sum of their materialized area balances).
+    """
+    return Peripheral.objects.annotate(
+        stock=Coalesce(Sum('stock_balances__quantity'), 0)
+    ).filter(stock__lte=F('min_stock_level')).select_related('type', 'area')
 
 
 def get_warranty_expired(queryset=None):
@@ -1,14 +1,30 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Maintenance, MaintenanceSchedule
+from simple_history.models import HistoricalRecords
+from .models import Maintenance, MaintenanceSchedule, Equipment, Handover, Peripheral, EquipmentRound
+from .area_maps import bump_area_maps_version
+from .maintenance_analytics import bump_maintenance_analytics
+from .round_analytics import bump_round_analytics
+from .scan_index import bump_scan_index
+from .services import next_pending_schedule_date, record_deferred_schedule_sync, sync_peripheral_ledger
+from .timeline import (
+    EVENT_TYPE_BY_MODEL, TIMELINE_IGNORED_FIELDS,
+    sync_equipment_events, delete_equipment_events,
+)
 from django.utils import timezone
 
 @receiver(post_save, sender=Maintenance)
-def sync_maintenance_to_schedule(sender, instance, created, **kwargs):
+def sync_maintenance_to_schedule(sender, instance, created, update_fields=None, **kwargs):
     """
     When Maintenance is saved, if next_maintenance_date is set,
     create a corresponding MaintenanceSchedule entry.
+    Skipped when the date was just synced from the schedule itself, so rule
+    occurrences are not materialized as rows.
     """
+    if update_fields is not None and set(update_fields) == {'next_maintenance_date'}:
+        return
+    if record_deferred_schedule_sync(instance, created=created):
+        return
     if instance.next_maintenance_date:
         MaintenanceSchedule.objects.get_or_create(
             equipment=instance.equipment,
@@ -22,36 +38,120 @@ def sync_schedule_to_maintenance(sender, instance, **kwargs):
     """
     When a Schedule is modified (added/removed), update the latest Maintenance
     record's 'next_maintenance_date' to reflect the *next* upcoming schedule.
+    Inside deferred_schedule_sync() the work is batched until the block exits.
     """
+    if record_deferred_schedule_sync(instance):
+        return
+
     equipment = instance.equipment
     
     # Find the latest performed maintenance
     last_maintenance = Maintenance.objects.filter(equipment=equipment).order_by('-date').first()
     
     if last_maintenance:
-        # Find the earliest PENDING schedule that is after the maintenance date
-        # (or just after today, depending on logic. Let's use after maintenance date for consistency)
-        
-        # We need schedules in the future relative to the last maintenance
-        next_schedule = MaintenanceSchedule.objects.filter(
-            equipment=equipment,
-            scheduled_date__gt=last_maintenance.date,
-            status='PENDING'
-        ).order_by('scheduled_date').first()
-        
-        if next_schedule:
-            # Update silence signals to avoid infinite recursion Loop A->B->A
-            # We must disconnect or use a flag, but save() usually triggers signals.
-            # To avoid recursion: check if value actually changed.
-            if last_maintenance.next_maintenance_date != next_schedule.scheduled_date:
-                last_maintenance.next_maintenance_date = next_schedule.scheduled_date
-                last_maintenance.save(update_fields=['next_maintenance_date'])
-        else:
-            # If no future schedule found, clear the field?
-            # Or keep user manual entry?
-            # "Vice versa" implies sync. If I delete the only schedule, next_maintenance should probably be cleared
-            # IF checks allow. Let's be safe: if it matched the deleted one, clear it.
-            # But simpler: Just sync to the next available.
-            if last_maintenance.next_maintenance_date != None:
-                 last_maintenance.next_maintenance_date = None
-                 last_maintenance.save(update_fields=['next_maintenance_date'])
+        # Earliest PENDING schedule after the maintenance date, whether stored as a
+        # row or generated by a recurrence rule.
+        next_date = next_pending_schedule_date(equipment.pk, last_maintenance.date)
+
+        # To avoid recursion (Loop A->B->A) only save when the value actually changed.
+        # If no future schedule is left, the field is cleared.
+        if last_maintenance.next_maintenance_date != next_date:
+            last_maintenance.next_maintenance_date = next_date
+            last_maintenance.save(update_fields=['next_maintenance_date'])
+
+
+def sync_timeline_on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Keep the EquipmentEvent row(s) of a timeline source in sync with the record."""
+    if raw:
+        return
+    if update_fields is not None and set(update_fields) <= TIMELINE_IGNORED_FIELDS:
+        return
+    if sender is Equipment and not created:
+        return
+    sync_equipment_events(EVENT_TYPE_BY_MODEL[sender], [instance.pk])
+
+
+def delete_timeline_on_delete(sender, instance, **kwargs):
+    delete_equipment_events(EVENT_TYPE_BY_MODEL[sender], [instance.pk])
+
+
+for _model in EVENT_TYPE_BY_MODEL:
+    post_save.connect(sync_timeline_on_save, sender=_model, dispatch_uid=f'timeline_save_{_model.__name__}')
+    if _model is not Equipment:  # Equipment events cascade with the equipment
+        post_delete.connect(delete_timeline_on_delete, sender=_model, dispatch_uid=f'timeline_delete_{_model.__name__}')
+
+
+@receiver(m2m_changed, sender=Handover.equipment.through)
+def sync_timeline_on_handover_equipment(sender, instance, action, reverse, pk_set, **kwargs):
+    """Equipment is linked to a handover after it is saved, so rebuild on M2M changes."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        sync_equipment_events('HANDOVER', [instance.pk])
+    elif action == 'post_clear':
+        # Reverse clear does not report which handovers lost this equipment.
+        instance.events.filter(event_type='HANDOVER').delete()
+    else:
+        sync_equipment_events('HANDOVER', pk_set)
+
+
+def _request_user():
+    """User of the current request (set by simple_history's HistoryRequestMiddleware), if any."""
+    request = getattr(HistoricalRecords.context, 'request', None)
+    user = getattr(request, 'user', None)
+    return user if user is not None and user.is_authenticated else None
+
+
+@receiver(pre_save, sender=Peripheral)
+def remember_peripheral_stock(sender, instance, raw=False, **kwargs):
+    """Keep the stored area/quantity so post_save can record what the save changed."""
+    if raw or not instance.pk:
+        return
+    instance._stock_before = Peripheral.objects.filter(pk=instance.pk).values('area_id', 'quantity').first()
+
+
+@receiver(post_save, sender=Peripheral)
+def sync_peripheral_stock_ledger(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Saving a Peripheral with a new quantity or area (form edits, imports) is
+    recorded in the stock ledger. The stock services use UPDATEs and never
+    reach this handler.
+    """
+    if raw:
+        return
+    if update_fields is not None and not {'quantity', 'area'} & set(update_fields):
+        return
+    sync_peripheral_ledger(instance, created, getattr(instance, '_stock_before', None), user=_request_user())
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=Peripheral)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_delete, sender=Peripheral)
+def invalidate_area_maps(sender, instance, update_fields=None, **kwargs):
+    """Saves that may change an item's area invalidate the handover form area maps."""
+    if update_fields is not None and 'area' not in update_fields:
+        return
+    bump_area_maps_version()
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def invalidate_scan_index(sender, instance, **kwargs):
+    """Any equipment change may alter a serial or a scan card."""
+    bump_scan_index()
+
+
+@receiver(post_save, sender=EquipmentRound)
+@receiver(post_delete, sender=EquipmentRound)
+def invalidate_round_analytics(sender, instance, **kwargs):
+    bump_round_analytics()
+
+
+@receiver(post_save, sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+def invalidate_maintenance_analytics(sender, instance, update_fields=None, **kwargs):
+    """Task flags, date, technician and equipment all feed the analytics; the acta file does not."""
+    if update_fields is not None and set(update_fields) <= {'acta_pdf', 'next_maintenance_date'}:
+        return
+    bump_maintenance_analytics()
@@ -0,0 +1,88 @@
+"""
+Point-in-time inventory snapshots built from HistoricalEquipment.
+
+The state of the inventory at a timestamp is the latest history row of every
+equipment recorded up to that moment (deletions drop the equipment). Instead
+of scanning the whole history table, snapshots start from the most recent
+InventoryCheckpoint before the timestamp and replay only the rows recorded
+after it, using the history_date index. The final rows are then loaded by
+primary key (history_id). History already moved to cold storage by
+archive_history is read back through the archive reader.
+"""
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from .history_archive import iter_archived_history, archived_history_instances
+from .models import Equipment, InventoryCheckpoint
+
+# Keeps the history_id__in lookups under the SQLite parameter limit.
+SNAPSHOT_CHUNK_SIZE = 900
+
+
+def equipment_versions_as_of(timestamp):
+    """
+    Return {equipment_id: history_id} with the version of every equipment
+    that existed at the given timestamp.
+    """
+    checkpoint = InventoryCheckpoint.objects.filter(taken_at__lte=timestamp).order_by('-taken_at').first()
+    versions = {}
+    after = None
+    history = Equipment.history.filter(history_date__lte=timestamp)
+    if checkpoint:
+        versions = {int(pk): history_id for pk, history_id in checkpoint.equipment_versions.items()}
+        after = checkpoint.taken_at
+        history = history.filter(history_date__gt=after)
+
+    # Archived rows of an equipment are older than its rows still in the table, so they are replayed first.
+    archived = sorted(
+        (row['history_date'], row['history_id'], row['id'], row['history_type'])
+        for row in iter_archived_history('equipment', start=after, end=timestamp)
+        if after is None or row['history_date'] > after
+    )
+    rows = history.order_by('history_date', 'history_id').values_list('id', 'history_id', 'history_type')
+    replay = [(equipment_id, history_id, history_type) for _, history_id, equipment_id, history_type in archived]
+    for equipment_id, history_id, history_type in (*replay, *rows.iterator(chunk_size=2000)):
+        if history_type == '-':
+            versions.pop(equipment_id, None)
+        else:
+            versions[equipment_id] = history_id
+    return versions
+
+
+def inventory_snapshot(timestamp, area_id=None, status=None):
+    """
+    Return the HistoricalEquipment rows describing the inventory at timestamp,
+    ordered by area and serial number. Optionally filtered by area and status
+    as they were at that moment.
+    """
+    history_ids = sorted(equipment_versions_as_of(timestamp).values())
+    rows = []
+    for start in range(0, len(history_ids), SNAPSHOT_CHUNK_SIZE):
+        chunk = history_ids[start:start + SNAPSHOT_CHUNK_SIZE]
+        rows.extend(Equipment.history.filter(history_id__in=chunk))
+
+    missing = set(history_ids) - {h.history_id for h in rows}
+    if missing:
+        rows.extend(archived_history_instances('equipment', history_ids=missing, end=timestamp))
+    # Prefetched rather than joined: history may live on its own database (HistoryRouter).
+    prefetch_related_objects(rows, 'area', 'history_user')
+
+    if area_id:
+        rows = [h for h in rows if str(h.area_id) == str(area_id)]
+    if status:
+        rows = [h for h in rows if h.status == status]
+    rows.sort(key=lambda h: (h.area.name if h.area else '', h.serial_number))
+    return rows
+
+
+def create_inventory_checkpoint(taken_at=None):
+    """
+    Store a checkpoint of the equipment versions at taken_at (now by default).
+    It is computed incrementally from the previous checkpoint.
+    """
+    taken_at = taken_at or timezone.now()
+    versions = equipment_versions_as_of(taken_at)
+    return InventoryCheckpoint.objects.create(
+        taken_at=taken_at,
+        equipment_versions={str(pk): history_id for pk, history_id in versions.items()},
+    )
@@ -0,0 +1,55 @@
+/*
+ * Service worker of the offline capture page (inventory/views/offline.py).
+ *
+ * The page is fetched from the network when possible (it carries the
+ * equipment list) and from the cache otherwise; static files of the shell
+ * are served from the cache. Nothing else is intercepted.
+ */
+const CACHE_NAME = 'hfps-offline-v{{ version }}';
+const PAGE_URL = '{{ shell.0|escapejs }}';
+const SHELL = [{% for url in shell %}'{{ url|escapejs }}'{% if not forloop.last %}, {% endif %}{% endfor %}];
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(
+                names.filter(name => name.startsWith('hfps-offline-') && name !== CACHE_NAME)
+                    .map(name => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (url.pathname === PAGE_URL) {
+        event.respondWith(
+            fetch(request)
+                .then(response => {
+                    // A redirect means the session expired: show the login, keep the old copy.
+                    if (response.ok && !response.redirected) {
+                        const copy = response.clone();
+                        caches.open(CACHE_NAME).then(cache => cache.put(PAGE_URL, copy));
+                    }
+                    return response;
+                })
+                .catch(() => caches.match(PAGE_URL))
+        );
+    } else if (SHELL.includes(url.pathname)) {
+        event.respondWith(
+            caches.match(url.pathname).then(cached => cached || fetch(request))
+        );
+    }
+});
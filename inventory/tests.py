@@ -4,18 +4,52 @@ Tests for the inventory application.
 Covers services (business logic), model properties, and basic view access.
 """
 import datetime
-from django.test import TestCase, Client as TestClient
+import tempfile
+import threading
+from unittest import mock
+from io import BytesIO, StringIO
+
+import pandas as pd
+from django.conf import settings
+from django.core import mail
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, OperationalError
+from django.test import TestCase, TransactionTestCase, Client as TestClient
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 from .models import (
     Equipment, Peripheral, Maintenance, MaintenanceSchedule,
-    Area, CostCenter, PeripheralType,
+    MaintenanceRecurrence, Area, CostCenter, PeripheralType, AlertLog, AlertSubscription,
+    Handover, EquipmentRound, EquipmentEvent, InventoryCheckpoint, StockMovement, StockBalance,
+    ComponentLog, StockForecast, BulkOperation, RetirementLog, SystemSettings,
 )
+from .alerts import send_alert_digests
+from .timeline import backfill_equipment_events, get_equipment_timeline
+from .snapshots import inventory_snapshot, create_inventory_checkpoint
+from .caching import RequestMemoMiddleware, bump_version, get_or_build, make_key
+from .qr import qr_digest, equipment_qr_data, render_qr, make_scan_code
+from .history_archive import archive_history, iter_archived_history
+from .round_checks import check_code_of, decode_check_codes, failure_rates, resync_check_codes
+from .round_analytics import build_round_failure_analytics, get_round_failure_analytics
+from .maintenance_analytics import build_maintenance_task_analytics, get_maintenance_task_analytics
+from .routers import HistoryRouter
+from .forms import ComponentLogForm, HandoverForm, BulkActionForm
+from .forecasting import build_reorder_table, consumption_frame, store_stock_forecasts, get_projected_stockouts
 from .services import (
     sync_maintenance_to_schedule,
+    expand_maintenance_schedule,
+    toggle_schedule_entry,
+    deferred_schedule_sync,
     reduce_peripheral_stock,
     reduce_peripheral_stock_floor,
+    receive_peripheral_stock,
+    retire_peripheral_stock,
+    peripheral_stock_as_of,
+    stock_balances_as_of,
     get_dashboard_stats,
     get_lifespan_expired_queryset,
     get_low_stock_peripherals,
@@ -82,6 +116,511 @@ class SyncMaintenanceToScheduleTest(TestCase):
         self.assertEqual(MaintenanceSchedule.objects.filter(equipment=self.equipment).count(), 1)
 
 
+class MaintenanceRecurrenceTest(TestCase):
+    """Test recurrence rules and the schedule expander."""
+
+    def setUp(self):
+        self.area = Area.objects.create(name='Urgencias')
+        self.eq1 = Equipment.objects.create(
+            serial_number='REC-1', type='PC', brand='Dell', model='OptiPlex',
+            status='ACTIVE', area=self.area
+        )
+        self.eq2 = Equipment.objects.create(
+            serial_number='REC-2', type='PC', brand='HP', model='ProDesk',
+            status='ACTIVE', area=self.area
+        )
+        self.year_start = datetime.date(2026, 1, 1)
+        self.year_end = datetime.date(2026, 12, 31)
+
+    def test_rule_expands_without_materializing_rows(self):
+        MaintenanceRecurrence.objects.create(
+            equipment=self.eq1, start_date=datetime.date(2025, 8, 31), interval_months=6
+        )
+        entries = expand_maintenance_schedule(self.year_start, self.year_end)
+        self.assertEqual(
+            [e.scheduled_date for e in entries],
+            [datetime.date(2026, 2, 28), datetime.date(2026, 8, 31)]
+        )
+        self.assertTrue(all(e.is_virtual and e.status == 'PENDING' for e in entries))
+        self.assertEqual(MaintenanceSchedule.objects.count(), 0)
+
+    def test_area_rule_targets_active_equipment_only(self):
+        Equipment.objects.create(
+            serial_number='REC-3', type='PC', brand='HP', model='Old',
+            status='RETIRED', area=self.area
+        )
+        MaintenanceRecurrence.objects.create(
+            area=self.area, start_date=datetime.date(2026, 1, 10), interval_months=12
+        )
+        entries = expand_maintenance_schedule(self.year_start, self.year_end)
+        self.assertEqual({e.equipment_id for e in entries}, {self.eq1.id, self.eq2.id})
+
+    def test_completion_in_same_month_replaces_occurrence(self):
+        MaintenanceRecurrence.objects.create(
+            equipment=self.eq1, start_date=datetime.date(2026, 3, 1), interval_months=6
+        )
+        MaintenanceSchedule.objects.create(
+            equipment=self.eq1, scheduled_date=datetime.date(2026, 3, 20), status='COMPLETED'
+        )
+        entries = expand_maintenance_schedule(self.year_start, self.year_end)
+        self.assertEqual(
+            [(e.scheduled_date, e.status) for e in entries],
+            [(datetime.date(2026, 3, 20), 'COMPLETED'), (datetime.date(2026, 9, 1), 'PENDING')]
+        )
+
+    def test_removing_occurrence_stores_cancelled_exception(self):
+        MaintenanceRecurrence.objects.create(
+            equipment=self.eq1, start_date=datetime.date(2026, 3, 1), interval_months=6
+        )
+        result = toggle_schedule_entry(self.eq1.id, datetime.date(2026, 3, 1))
+        self.assertEqual(result, 'removed')
+        self.assertEqual(MaintenanceSchedule.objects.get().status, 'CANCELLED')
+        entries = expand_maintenance_schedule(self.year_start, self.year_end)
+        self.assertEqual([e.scheduled_date for e in entries], [datetime.date(2026, 9, 1)])
+
+    def test_dashboard_keeps_long_overdue_pending_rows(self):
+        today = timezone.now().date()
+        overdue = MaintenanceSchedule.objects.create(
+            equipment=self.eq1, scheduled_date=today - datetime.timedelta(days=90), status='PENDING'
+        )
+        # Rule occurrences are only listed for the window (up to 30 days overdue).
+        MaintenanceRecurrence.objects.create(
+            equipment=self.eq2, start_date=today - datetime.timedelta(days=90), interval_months=12
+        )
+        client = TestClient()
+        client.force_login(User.objects.create_user('coord', password='x'))
+        response = client.get('/dashboard/')
+        self.assertEqual(
+            [(s.equipment_id, s.scheduled_date) for s in response.context['upcoming_schedules']],
+            [(self.eq1.id, overdue.scheduled_date)]
+        )
+
+
+class DeferredScheduleSyncTest(TestCase):
+    """Test that bulk blocks defer the signal cascade and reconcile once."""
+
+    def setUp(self):
+        self.equipments = [
+            Equipment.objects.create(serial_number=f'BULK-{i}', type='PC', brand='Dell', model='X', status='ACTIVE')
+            for i in range(3)
+        ]
+        self.user = User.objects.create_user('bulk', 'bulk@test.com', 'pass123')
+        # Existing acta so saves inside the block skip PDF rendering.
+        self.acta = 'maintenance_actas/existing.pdf'
+
+    def test_signals_deferred_until_block_exits(self):
+        with deferred_schedule_sync():
+            for eq in self.equipments:
+                Maintenance.objects.create(
+                    equipment=eq, date=datetime.date(2026, 3, 10), maintenance_type='PREVENTIVE',
+                    description='Bulk', performed_by=self.user, acta_pdf=self.acta,
+                    next_maintenance_date=datetime.date(2026, 9, 10),
+                )
+            self.assertEqual(MaintenanceSchedule.objects.count(), 0)
+
+        pending = MaintenanceSchedule.objects.filter(status='PENDING', scheduled_date=datetime.date(2026, 9, 10))
+        completed = MaintenanceSchedule.objects.filter(status='COMPLETED', scheduled_date=datetime.date(2026, 3, 10))
+        self.assertEqual(pending.count(), 3)
+        self.assertEqual(completed.count(), 3)
+
+    def test_reconcile_points_latest_maintenance_to_next_pending(self):
+        eq = self.equipments[0]
+        m = Maintenance.objects.create(
+            equipment=eq, date=datetime.date(2026, 1, 5), maintenance_type='PREVENTIVE',
+            description='Old', performed_by=self.user, acta_pdf=self.acta,
+        )
+        with deferred_schedule_sync():
+            for month in (4, 7, 10):
+                MaintenanceSchedule.objects.create(
+                    equipment=eq, scheduled_date=datetime.date(2026, month, 1), status='PENDING'
+                )
+            m.refresh_from_db()
+            self.assertIsNone(m.next_maintenance_date)
+
+        m.refresh_from_db()
+        self.assertEqual(m.next_maintenance_date, datetime.date(2026, 4, 1))
+        self.assertEqual(m.history.count(), 2)
+
+    def test_nothing_reconciled_when_block_fails(self):
+        with self.assertRaises(RuntimeError):
+            with deferred_schedule_sync():
+                Maintenance.objects.create(
+                    equipment=self.equipments[0], date=datetime.date(2026, 3, 10),
+                    maintenance_type='PREVENTIVE', description='Bulk', acta_pdf=self.acta,
+                    next_maintenance_date=datetime.date(2026, 9, 10),
+                )
+                raise RuntimeError('abort')
+        self.assertEqual(MaintenanceSchedule.objects.count(), 0)
+
+
+class AlertDigestTest(TestCase):
+    """Test the alert engine windows and its idempotent log."""
+
+    def setUp(self):
+        self.today = datetime.date(2026, 5, 10)
+        self.area = Area.objects.create(name='Quirofanos')
+        User.objects.create_user('admin1', 'admin1@test.com', 'pass123', is_staff=True)
+        User.objects.create_user('admin2', 'admin2@test.com', 'pass123', is_staff=True)
+        User.objects.create_user('nostaff', 'nostaff@test.com', 'pass123')
+
+    def _equipment(self, serial, **kwargs):
+        return Equipment.objects.create(
+            serial_number=serial, type='PC', brand='Dell', model='X', status='ACTIVE', area=self.area, **kwargs
+        )
+
+    def test_window_catches_alerts_missed_by_cron(self):
+        # Due in 2 days: an exact "today + 3" match would never see it again.
+        eq = self._equipment('AL-1')
+        MaintenanceSchedule.objects.create(equipment=eq, scheduled_date=self.today + datetime.timedelta(days=2))
+        self._equipment('AL-2', warranty_expiry=self.today + datetime.timedelta(days=12))
+
+        summary = send_alert_digests(['MAINTENANCE_UPCOMING', 'WARRANTY_EXPIRING'], today=self.today)
+
+        self.assertEqual(summary['digests'], 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['admin1@test.com', 'admin2@test.com'])
+        self.assertIn('AL-1', mail.outbox[0].body)
+        self.assertIn('AL-2', mail.outbox[0].body)
+
+    def test_alerts_are_not_sent_twice(self):
+        eq = self._equipment('AL-3')
+        MaintenanceSchedule.objects.create(equipment=eq, scheduled_date=self.today)
+        send_alert_digests(['MAINTENANCE_TODAY'], today=self.today)
+        summary = send_alert_digests(['MAINTENANCE_TODAY'], today=self.today + datetime.timedelta(days=1))
+
+        self.assertEqual(summary['digests'], 0)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(AlertLog.objects.count(), 2)
+
+    def test_query_count_does_not_grow_with_items(self):
+        for i in range(30):
+            eq = self._equipment(f'ALQ-{i}', warranty_expiry=self.today + datetime.timedelta(days=i % 20))
+            MaintenanceSchedule.objects.create(equipment=eq, scheduled_date=self.today + datetime.timedelta(days=i % 3))
+        with CaptureQueriesContext(connection) as ctx:
+            summary = send_alert_digests(['MAINTENANCE_UPCOMING', 'WARRANTY_EXPIRING'], today=self.today)
+        self.assertEqual(summary['items'], 120)
+        self.assertLess(len(ctx.captured_queries), 15)
+
+    def test_digests_routed_by_area_subscription(self):
+        other_area = Area.objects.create(name='Urgencias')
+        tech = User.objects.create_user('tech1', 'tech1@test.com', 'pass123')
+        AlertSubscription.objects.create(user=tech).areas.add(other_area)
+        admin2 = User.objects.get(username='admin2')
+        AlertSubscription.objects.create(user=admin2, is_active=False)
+
+        eq = self._equipment('AL-4')
+        MaintenanceSchedule.objects.create(equipment=eq, scheduled_date=self.today)
+        eq_other = self._equipment('AL-5')
+        eq_other.area = other_area
+        eq_other.save()
+        MaintenanceSchedule.objects.create(equipment=eq_other, scheduled_date=self.today)
+
+        send_alert_digests(['MAINTENANCE_TODAY'], today=self.today)
+
+        bodies = {m.to[0]: m.body for m in mail.outbox}
+        self.assertEqual(sorted(bodies), ['admin1@test.com', 'tech1@test.com'])
+        self.assertIn('AL-4', bodies['admin1@test.com'])
+        self.assertIn('AL-5', bodies['admin1@test.com'])
+        self.assertNotIn('AL-4', bodies['tech1@test.com'])
+        self.assertIn('AL-5', bodies['tech1@test.com'])
+
+    def test_digests_share_one_connection(self):
+        from django.core.mail.backends.locmem import EmailBackend
+
+        class CountingBackend(EmailBackend):
+            opened = 0
+
+            def open(self):
+                CountingBackend.opened += 1
+
+        eq = self._equipment('AL-6')
+        MaintenanceSchedule.objects.create(equipment=eq, scheduled_date=self.today)
+        summary = send_alert_digests(['MAINTENANCE_TODAY'], today=self.today, connection=CountingBackend())
+
+        self.assertEqual(summary['digests'], 2)
+        self.assertEqual(CountingBackend.opened, 1)
+
+
+class EquipmentTimelineTest(TestCase):
+    """Test the EquipmentEvent table behind the Hoja de Vida."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('tech', 'tech@test.com', 'pass123')
+        self.area = Area.objects.create(name='Laboratorio')
+        self.equipment = Equipment.objects.create(
+            serial_number='TL-001', type='PC', brand='HP', model='ProDesk', status='ACTIVE'
+        )
+
+    def test_signals_keep_events_in_sync(self):
+        round_ = EquipmentRound.objects.create(equipment=self.equipment, performed_by=self.user, general_status='BAD')
+        handover = Handover.objects.create(type='ASSIGNMENT', destination_area=self.area, technician=self.user)
+        handover.equipment.add(self.equipment)
+
+        events = {e.event_type: e for e in get_equipment_timeline(self.equipment)}
+        self.assertEqual(set(events), {'ENTRY', 'ROUND', 'HANDOVER'})
+        self.assertEqual(events['ROUND'].color, 'danger')
+        self.assertIn('Laboratorio', events['HANDOVER'].title)
+
+        round_.general_status = 'GOOD'
+        round_.save()
+        self.assertEqual(self.equipment.events.get(event_type='ROUND').color, 'success')
+
+        handover.equipment.remove(self.equipment)
+        round_.delete()
+        self.assertEqual(list(self.equipment.events.values_list('event_type', flat=True)), ['ENTRY'])
+
+    def test_pdf_rows_keep_short_label_and_destination(self):
+        from fpdf import FPDF
+        handover = Handover.objects.create(
+            type='ASSIGNMENT', destination_area=self.area, technician=self.user, receiver_name='Dra. Pérez'
+        )
+        handover.equipment.add(self.equipment)
+        Maintenance.objects.create(
+            equipment=self.equipment, performed_by=self.user, date=datetime.date(2026, 2, 1),
+            maintenance_type='CORRECTIVE', description='Cambio de fuente',
+            acta_pdf='maintenance_actas/existing.pdf',
+        )
+
+        cells = []
+        cell = FPDF.cell
+
+        def record_cell(pdf, *args, **kwargs):
+            cells.append(str(args[2]) if len(args) > 2 else str(kwargs.get('text', '')))
+            return cell(pdf, *args, **kwargs)
+
+        client = TestClient()
+        client.login(username='tech', password='pass123')
+        with mock.patch.object(FPDF, 'cell', record_cell):
+            response = client.get(f'/inventory/equipment/{self.equipment.pk}/history/pdf/')
+        self.assertEqual(response.status_code, 200)
+        # Row text goes through the cp1252 cleanup of the core fonts.
+        self.assertIn('Acta: Asignación', cells)
+        self.assertIn('Laboratorio \x97 Asignado a: Dra. Pérez', cells)
+        self.assertIn('Mant. Correctivo', cells)
+        # The web timeline keeps the full title.
+        self.assertEqual(self.equipment.events.get(event_type='HANDOVER').title, 'Acta: Asignación a Laboratorio')
+
+    def test_label_migration_matches_builders(self):
+        import importlib
+        from django.apps import apps
+        migration = importlib.import_module('inventory.migrations.0043_equipment_event_pdf_label')
+        handover = Handover.objects.create(type='TRANSFER', destination_area=self.area, technician=self.user)
+        handover.equipment.add(self.equipment)
+        Maintenance.objects.create(
+            equipment=self.equipment, performed_by=self.user, date=datetime.date(2026, 2, 1),
+            maintenance_type='PREVENTIVE', acta_pdf='maintenance_actas/existing.pdf',
+        )
+        expected = set(self.equipment.events.values_list('event_type', 'label', 'destination'))
+        EquipmentEvent.objects.update(label='', destination='')
+        migration.fill_labels(apps, mock.Mock(connection=connection))
+        rows = set(self.equipment.events.exclude(event_type='ENTRY').values_list('event_type', 'label', 'destination'))
+        self.assertEqual(rows, {row for row in expected if row[0] != 'ENTRY'})
+
+    def test_backfill_is_idempotent(self):
+        for _ in range(3):
+            EquipmentRound.objects.create(equipment=self.equipment, performed_by=self.user)
+        EquipmentEvent.objects.all().delete()
+
+        backfill_equipment_events()
+        backfill_equipment_events()
+        self.assertEqual(self.equipment.events.count(), 4)
+
+    def test_history_page_is_paginated(self):
+        for i in range(60):
+            EquipmentRound.objects.create(
+                equipment=self.equipment, performed_by=self.user,
+                datetime=timezone.now() - datetime.timedelta(days=i),
+            )
+        client = TestClient()
+        client.login(username='tech', password='pass123')
+        response = client.get(f'/inventory/equipment/{self.equipment.pk}/history/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['events']), 50)
+        response = client.get(f'/inventory/equipment/{self.equipment.pk}/history/?page=2')
+        self.assertEqual(len(response.context['events']), 11)
+        response = client.get(f'/inventory/equipment/{self.equipment.pk}/history/pdf/')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class InventorySnapshotTest(TestCase):
+    """Test point-in-time snapshots rebuilt from HistoricalEquipment."""
+
+    def setUp(self):
+        self.area_a = Area.objects.create(name='Farmacia')
+        self.area_b = Area.objects.create(name='Urgencias')
+        self.t0 = timezone.now() - datetime.timedelta(days=10)
+        self.moved = self._equipment('SN-1')
+        self.retired = self._equipment('SN-2')
+        self.deleted = self._equipment('SN-3')
+        self.t1 = timezone.now()
+
+    def _equipment(self, serial):
+        return Equipment.objects.create(
+            serial_number=serial, type='PC', brand='HP', model='X', status='ACTIVE', area=self.area_a
+        )
+
+    def _change(self):
+        self.moved.area = self.area_b
+        self.moved.save()
+        self.retired.status = 'RETIRED'
+        self.retired.save()
+        self.deleted.delete()
+        self._equipment('SN-4')
+
+    def _state(self, timestamp, **filters):
+        return {h.serial_number: (h.area_id, h.status) for h in inventory_snapshot(timestamp, **filters)}
+
+    def test_snapshot_returns_state_at_timestamp(self):
+        self._change()
+        self.assertEqual(self._state(self.t0), {})
+        before = self._state(self.t1)
+        self.assertEqual(before, {
+            'SN-1': (self.area_a.pk, 'ACTIVE'),
+            'SN-2': (self.area_a.pk, 'ACTIVE'),
+            'SN-3': (self.area_a.pk, 'ACTIVE'),
+        })
+        now = self._state(timezone.now())
+        self.assertEqual(now['SN-1'], (self.area_b.pk, 'ACTIVE'))
+        self.assertEqual(now['SN-2'], (self.area_a.pk, 'RETIRED'))
+        self.assertNotIn('SN-3', now)
+        self.assertIn('SN-4', now)
+        self.assertEqual(set(self._state(self.t1, area_id=self.area_a.pk)), {'SN-1', 'SN-2', 'SN-3'})
+
+    def test_checkpoint_gives_same_result_as_full_replay(self):
+        checkpoint = create_inventory_checkpoint(self.t1)
+        self.assertEqual(len(checkpoint.equipment_versions), 3)
+        self._change()
+        expected_now = self._state(timezone.now())
+        expected_t1 = self._state(self.t1)
+
+        InventoryCheckpoint.objects.all().delete()
+        self.assertEqual(self._state(timezone.now()), expected_now)
+        self.assertEqual(self._state(self.t1), expected_t1)
+
+    def test_snapshot_view(self):
+        User.objects.create_user('auditor', 'auditor@test.com', 'pass123')
+        client = TestClient()
+        client.login(username='auditor', password='pass123')
+        response = client.get('/reports/snapshot/', {'as_of': self.t1.strftime('%Y-%m-%dT%H:%M:%S'), 'area': self.area_a.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total'], 3)
+
+    def test_snapshot_view_ignores_invalid_input(self):
+        User.objects.create_user('auditor', 'auditor@test.com', 'pass123')
+        client = TestClient()
+        client.login(username='auditor', password='pass123')
+        response = client.get('/reports/snapshot/', {'as_of': '2026-13-01T00:00', 'area': 'x'})
+        self.assertEqual(response.status_code, 200)
+        # Falls back to the current minute, for every area.
+        as_of = timezone.make_aware(datetime.datetime.strptime(response.context['as_of'], '%Y-%m-%dT%H:%M'))
+        self.assertLess(timezone.now() - as_of, datetime.timedelta(minutes=2))
+        self.assertEqual(response.context['total'], len(inventory_snapshot(as_of)))
+        self.assertEqual(response.context['selected_area'], '')
+
+
+class HistoryArchiveTest(TestCase):
+    """Test pruning history rows to archive files and reading them back."""
+
+    def setUp(self):
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+        override = override_settings(HISTORY_ARCHIVE_ROOT=self.archive_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.area = Area.objects.create(name='Archivo')
+        self.old = timezone.now() - datetime.timedelta(days=800)
+        self.equipment = Equipment.objects.create(
+            serial_number='AR-1', type='PC', brand='HP', model='X', status='ACTIVE', area=self.area
+        )
+        self.equipment.status = 'MAINTENANCE'
+        self.equipment.save()
+        # Pretend both versions were recorded two years ago.
+        Equipment.history.update(history_date=self.old)
+        self.equipment.status = 'ACTIVE'
+        self.equipment.save()
+
+    def test_old_rows_are_moved_to_archive(self):
+        cutoff = timezone.now() - datetime.timedelta(days=30)
+        archived = archive_history('equipment', cutoff, batch_size=1)
+
+        self.assertEqual(archived, 2)
+        self.assertEqual(Equipment.history.count(), 1)
+        rows = list(iter_archived_history('equipment', ids=[self.equipment.pk]))
+        self.assertEqual([r['status'] for r in sorted(rows, key=lambda r: r['history_id'])], ['ACTIVE', 'MAINTENANCE'])
+        self.assertEqual(rows[0]['history_date'], self.old)
+        self.assertEqual(archive_history('equipment', cutoff), 0)
+
+    def test_snapshots_read_archived_ranges(self):
+        as_of = self.old + datetime.timedelta(days=1)
+        before = [(h.serial_number, h.status, h.area_id) for h in inventory_snapshot(as_of)]
+        archive_history('equipment', timezone.now() - datetime.timedelta(days=30))
+
+        self.assertEqual([(h.serial_number, h.status, h.area_id) for h in inventory_snapshot(as_of)], before)
+        self.assertEqual(before, [('AR-1', 'MAINTENANCE', self.area.pk)])
+        self.assertEqual([h.status for h in inventory_snapshot(timezone.now())], ['ACTIVE'])
+
+    def test_latest_and_checkpoint_versions_are_kept(self):
+        unchanged = Equipment.objects.create(
+            serial_number='AR-2', type='PC', brand='HP', model='X', status='ACTIVE', area=self.area
+        )
+        unchanged.history.update(history_date=self.old)
+        cutoff = timezone.now() - datetime.timedelta(days=30)
+        create_inventory_checkpoint(cutoff)
+
+        self.assertEqual(archive_history('equipment', cutoff, dry_run=True), 1)
+        self.assertEqual(archive_history('equipment', cutoff), 1)
+        self.assertEqual(unchanged.history.count(), 1)
+        self.assertEqual(list(self.equipment.history.order_by('history_id').values_list('status', flat=True)), ['MAINTENANCE', 'ACTIVE'])
+
+        # Snapshots after the cutoff are answered without opening any archive file.
+        with mock.patch('inventory.history_archive.gzip.open', side_effect=AssertionError('archive read')):
+            after_cutoff = inventory_snapshot(cutoff + datetime.timedelta(days=1))
+            now = inventory_snapshot(timezone.now())
+        self.assertEqual([(h.serial_number, h.status) for h in after_cutoff], [('AR-1', 'MAINTENANCE'), ('AR-2', 'ACTIVE')])
+        self.assertEqual([(h.serial_number, h.status) for h in now], [('AR-1', 'ACTIVE'), ('AR-2', 'ACTIVE')])
+
+
+class HistoryRouterTest(TestCase):
+    """Test that Historical* models are routed to the history database."""
+
+    def setUp(self):
+        self.router = HistoryRouter()
+
+    def test_history_models_use_history_database(self):
+        self.assertEqual(self.router.db_for_write(Equipment.history.model), 'history')
+        self.assertEqual(self.router.db_for_read(EquipmentRound.history.model), 'history')
+        self.assertEqual(self.router.db_for_write(Equipment), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_migrations_are_split_between_databases(self):
+        self.assertTrue(self.router.allow_migrate('history', 'inventory', 'historicalequipment'))
+        self.assertFalse(self.router.allow_migrate('default', 'inventory', 'historicalequipment'))
+        self.assertTrue(self.router.allow_migrate('default', 'inventory', 'equipment'))
+        self.assertFalse(self.router.allow_migrate('history', 'auth', 'user'))
+
+    def test_relations_across_databases_are_allowed(self):
+        area = Area.objects.create(name='Rel')
+        equipment = Equipment.objects.create(serial_number='RT-1', type='PC', brand='HP', model='X', area=area)
+        self.assertTrue(self.router.allow_relation(equipment.history.first(), area))
+        self.assertIsNone(self.router.allow_relation(equipment, area))
+
+    def test_deleting_a_user_leaves_history_untouched(self):
+        user = User.objects.create_user(username='auditado', password='x')
+        equipment = Equipment(serial_number='RT-2', type='PC', brand='HP', model='X')
+        equipment._history_user = user
+        equipment.save()
+        user_id = user.pk
+
+        with override_settings(DATABASE_ROUTERS=['inventory.routers.HistoryRouter']):
+            with CaptureQueriesContext(connection) as ctx:
+                user.delete()
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'historical' in q['sql'].lower()])
+        self.assertFalse(User.objects.filter(pk=user_id).exists())
+        # The audit row keeps the id of the deleted user.
+        self.assertEqual(equipment.history.get().history_user_id, user_id)
+
+
 class ReducePeripheralStockTest(TestCase):
     """Test stock reduction services."""
 
@@ -117,6 +656,905 @@ class ReducePeripheralStockTest(TestCase):
         self.assertEqual(self.peripheral.quantity, 0)
 
 
+class ConcurrentStockTest(TransactionTestCase):
+    """Hammer one SKU from many threads: no lost updates, never below zero."""
+
+    def test_concurrent_reductions_do_not_oversell(self):
+        ptype = PeripheralType.objects.create(name='Teclado')
+        peripheral = Peripheral.objects.create(
+            type=ptype, brand='Genius', model='KB', serial_number='P-CC', quantity=25
+        )
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(5):
+                    while True:
+                        try:
+                            success, remaining = reduce_peripheral_stock(Peripheral(pk=peripheral.pk), 1)
+                            break
+                        except OperationalError:
+                            # SQLite reports lock contention instead of waiting; retry.
+                            continue
+                    with lock:
+                        results.append((success, remaining))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        peripheral.refresh_from_db()
+        self.assertEqual(peripheral.quantity, 0)
+        self.assertEqual(sum(1 for success, _ in results if success), 25)
+        self.assertEqual(len(results), 40)
+        self.assertTrue(all(remaining >= 0 for _, remaining in results))
+
+
+class StockLedgerTest(TestCase):
+    """Stock movements are logged and applied to the per-area balances."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('almacen', password='x')
+        self.ptype = PeripheralType.objects.create(name='Mouse')
+        self.bodega = Area.objects.create(name='Bodega')
+        self.urgencias = Area.objects.create(name='Urgencias')
+        self.peripheral = Peripheral.objects.create(
+            type=self.ptype, brand='Logitech', model='M100', serial_number='P-LED',
+            quantity=10, min_stock_level=2, area=self.bodega,
+        )
+
+    def balance(self, area):
+        return StockBalance.objects.get(peripheral=self.peripheral, area=area).quantity
+
+    def test_creation_opens_balance(self):
+        self.assertEqual(self.balance(self.bodega), 10)
+        movement = self.peripheral.stock_movements.get()
+        self.assertEqual((movement.kind, movement.quantity, movement.balance_after), ('RECEIPT', 10, 10))
+
+    def test_reduction_is_logged(self):
+        reduce_peripheral_stock(self.peripheral, 3, user=self.user)
+        receive_peripheral_stock(self.peripheral, 5, user=self.user)
+        self.assertEqual(self.balance(self.bodega), 12)
+        self.peripheral.refresh_from_db()
+        self.assertEqual(self.peripheral.quantity, 12)
+        kinds = list(self.peripheral.stock_movements.order_by('id').values_list('kind', 'quantity', 'balance_after'))
+        self.assertEqual(kinds, [('RECEIPT', 10, 10), ('COMPONENT', -3, 7), ('RECEIPT', 5, 12)])
+
+    def test_failed_reduction_is_not_logged(self):
+        success, _ = reduce_peripheral_stock(self.peripheral, 50)
+        self.assertFalse(success)
+        self.assertEqual(self.peripheral.stock_movements.count(), 1)
+
+    def test_edit_records_adjustment_and_transfer(self):
+        self.peripheral.quantity = 7
+        self.peripheral.area = self.urgencias
+        self.peripheral.save()
+        self.assertEqual(self.balance(self.bodega), 0)
+        self.assertEqual(self.balance(self.urgencias), 7)
+        self.assertEqual(
+            list(self.peripheral.stock_movements.order_by('id').values_list('kind', flat=True)),
+            ['RECEIPT', 'TRANSFER', 'TRANSFER', 'ADJUSTMENT'],
+        )
+        self.peripheral.refresh_from_db()
+        self.assertEqual(self.peripheral.quantity, 7)
+
+    def test_retirement_writes_off_all_balances(self):
+        receive_peripheral_stock(self.peripheral, 4, area_id=self.urgencias.pk)
+        self.assertEqual(retire_peripheral_stock(self.peripheral, user=self.user), 14)
+        self.assertFalse(StockBalance.objects.filter(peripheral=self.peripheral, quantity__gt=0).exists())
+        self.peripheral.refresh_from_db()
+        self.assertEqual(self.peripheral.quantity, 0)
+
+    def test_balance_as_of(self):
+        before = timezone.now()
+        reduce_peripheral_stock(self.peripheral, 4)
+        self.assertEqual(peripheral_stock_as_of(self.peripheral.pk, before), {self.bodega.pk: 10})
+        self.assertEqual(stock_balances_as_of(timezone.now()), {(self.peripheral.pk, self.bodega.pk): 6})
+
+    def test_low_stock_reads_balances(self):
+        reduce_peripheral_stock(self.peripheral, 8)
+        low = get_low_stock_peripherals()
+        self.assertEqual([p.stock for p in low], [2])
+
+
+class StockForecastTest(TestCase):
+    """Consumption rates, projected stockouts and reorder quantities."""
+
+    def setUp(self):
+        self.today = datetime.date(2026, 3, 31)
+        self.ptype = PeripheralType.objects.create(name='Toner')
+        self.equipment = Equipment.objects.create(serial_number='SN-FC', type='PRINTER', brand='HP', model='M400')
+        self.toner = Peripheral.objects.create(
+            type=self.ptype, brand='HP', model='26A', serial_number='T-01', quantity=30, min_stock_level=2
+        )
+        self.idle = Peripheral.objects.create(
+            type=self.ptype, brand='HP', model='05A', serial_number='T-02', quantity=5, min_stock_level=1
+        )
+        # 2 units a day over the last 10 days (components + handovers)
+        for offset in range(10):
+            day = timezone.make_aware(datetime.datetime.combine(self.today - datetime.timedelta(days=offset), datetime.time(10)))
+            ComponentLog.objects.create(
+                equipment=self.equipment, action_type='REPLACED', peripheral=self.toner,
+                quantity=1, description='Cambio de tóner', date=day,
+            )
+            handover = Handover.objects.create(type='ASSIGNMENT')
+            handover.handoverperipheral_set.create(peripheral=self.toner, quantity=1)
+            Handover.objects.filter(pk=handover.pk).update(date=day)
+
+    def test_reorder_table(self):
+        table = build_reorder_table(today=self.today, window_days=10, lead_time_days=5, cover_days=10)
+        toner = table.loc[self.toner.pk]
+        self.assertAlmostEqual(toner.daily_rate, 2.0)
+        self.assertAlmostEqual(toner.days_to_stockout, 15.0)
+        self.assertEqual(toner.stockout_date.date(), self.today + datetime.timedelta(days=15))
+        # No deviation: reorder point = 2 * 5 + min 2; 30 on hand is above it.
+        self.assertEqual(toner.reorder_point, 12)
+        self.assertEqual(toner.reorder_quantity, 0)
+
+        idle = table.loc[self.idle.pk]
+        self.assertEqual(idle.daily_rate, 0)
+        self.assertTrue(idle.stockout_date is pd.NaT)
+
+    def test_reorder_quantity_when_below_reorder_point(self):
+        reduce_peripheral_stock(self.toner, 20)
+        table = build_reorder_table(today=self.today, window_days=10, lead_time_days=5, cover_days=10)
+        # Target = 2 * (5 + 10) + min 2 = 32, 10 on hand.
+        self.assertEqual(table.loc[self.toner.pk].reorder_quantity, 22)
+
+    def test_removed_parts_are_not_consumption(self):
+        day = timezone.make_aware(datetime.datetime.combine(self.today, datetime.time(12)))
+        ComponentLog.objects.create(
+            equipment=self.equipment, action_type='REMOVED', peripheral=self.idle,
+            quantity=3, description='Retiro de tóner', date=day,
+        )
+        frame = consumption_frame(self.today - datetime.timedelta(days=9), self.today)
+        self.assertNotIn(self.idle.pk, set(frame['peripheral_id']))
+        self.assertEqual(frame['quantity'].sum(), 20)
+        table = build_reorder_table(today=self.today, window_days=10, lead_time_days=5, cover_days=10)
+        self.assertEqual(table.loc[self.idle.pk].daily_rate, 0)
+
+    def test_stored_forecast_feeds_dashboard(self):
+        store_stock_forecasts(build_reorder_table(today=self.today, window_days=10, lead_time_days=5, cover_days=10))
+        self.assertEqual(StockForecast.objects.count(), 2)
+        projected = get_projected_stockouts(days=30, today=self.today)
+        self.assertEqual([f.peripheral_id for f in projected], [self.toner.pk])
+
+        user = User.objects.create_user('bodega', password='x')
+        client = TestClient()
+        client.force_login(user)
+        response = client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([f.peripheral_id for f in response.context['projected_stockouts']], [self.toner.pk])
+
+
+class HandoverAreaMapsTest(TestCase):
+    """The handover form area maps are cached, versioned and served with an ETag."""
+
+    def setUp(self):
+        cache.clear()
+        self.area_a = Area.objects.create(name='A')
+        self.area_b = Area.objects.create(name='B')
+        self.equipment = Equipment.objects.create(serial_number='SN-MAP', type='PC', brand='Dell', model='X', area=self.area_a)
+        self.client = TestClient()
+        self.client.force_login(User.objects.create_user('tec', password='x'))
+
+    def test_form_page_does_not_embed_maps(self):
+        response = self.client.get('/handovers/new/')
+        self.assertNotIn('equipment_area_map', response.context)
+        self.assertContains(response, '/handovers/area-maps/')
+
+    def test_etag_revalidation_and_invalidation(self):
+        response = self.client.get('/handovers/area-maps/')
+        self.assertEqual(response.json()['equipment'], {str(self.equipment.pk): self.area_a.pk})
+        etag = response['ETag']
+
+        with self.assertNumQueries(2):  # session + user, maps come from the cache
+            response = self.client.get('/handovers/area-maps/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.equipment.area = self.area_b
+            self.equipment.save()
+        response = self.client.get('/handovers/area-maps/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['equipment'], {str(self.equipment.pk): self.area_b.pk})
+
+
+class AutocompleteTest(TestCase):
+    """Search-select endpoint and widgets that only render the selected options."""
+
+    def setUp(self):
+        self.area = Area.objects.create(name='Sistemas')
+        self.ptype = PeripheralType.objects.create(name='Mouse')
+        for i in range(30):
+            Equipment.objects.create(serial_number=f'PC-{i:03d}', type='PC', brand='Dell', model='Optiplex',
+                                     area=self.area if i % 2 else None)
+        self.mouse = Peripheral.objects.create(type=self.ptype, brand='Logitech', model='M100', quantity=3)
+        self.empty = Peripheral.objects.create(type=self.ptype, brand='Logitech', model='M90', quantity=0)
+        self.client = TestClient()
+        self.client.force_login(User.objects.create_user('tec', password='x'))
+
+    def test_prefix_search_is_limited(self):
+        data = self.client.get('/autocomplete/equipment/', {'q': 'pc-0'}).json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertTrue(data['more'])
+        self.assertEqual(data['results'][0]['text'], str(Equipment.objects.get(serial_number='PC-000')))
+
+        data = self.client.get('/autocomplete/equipment/', {'q': 'PC-02', 'area': self.area.pk}).json()
+        self.assertEqual([r['id'] for r in data['results']],
+                         list(Equipment.objects.filter(serial_number__in=['PC-021', 'PC-023', 'PC-025', 'PC-027', 'PC-029']).order_by('serial_number').values_list('pk', flat=True)))
+
+    def test_peripheral_filters_and_ids(self):
+        data = self.client.get('/autocomplete/peripheral/', {'q': 'logi', 'in_stock': 1}).json()
+        self.assertEqual([r['id'] for r in data['results']], [self.mouse.pk])
+        data = self.client.get('/autocomplete/peripheral/', {'ids': f'{self.empty.pk}'}).json()
+        self.assertEqual(data['results'][0]['text'], str(self.empty))
+        self.assertEqual(self.client.get('/autocomplete/client/').status_code, 404)
+
+    def test_widgets_render_selected_options_only(self):
+        with self.assertNumQueries(0):
+            html = str(ComponentLogForm()['peripheral'])
+        self.assertIn('data-autocomplete-url="/autocomplete/peripheral/"', html)
+        self.assertNotIn(str(self.mouse), html)
+
+        form = ComponentLogForm(data={'peripheral': self.mouse.pk})
+        form.is_valid()
+        with self.assertNumQueries(1):
+            html = str(form['peripheral'])
+        self.assertIn(f'<option value="{self.mouse.pk}" selected>', html)
+
+        equipment = Equipment.objects.filter(serial_number__in=['PC-001', 'PC-002'])
+        html = str(HandoverForm(data={'equipment': [e.pk for e in equipment]})['equipment'])
+        self.assertEqual(html.count('<option'), 2)
+
+    def test_form_pages_do_not_list_the_inventory(self):
+        equipment = Equipment.objects.get(serial_number='PC-000')
+        for url in ['/handovers/new/', '/maintenance/new/', '/rounds/new/', '/maintenance/schedule/rules/new/',
+                    '/inventory/peripherals/new/', f'/inventory/equipment/{equipment.pk}/component/add/']:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotContains(response, 'PC-001')
+            self.assertLess(len(ctx.captured_queries), 10, url)
+
+    def test_search_indexes_use_pattern_ops_on_postgresql(self):
+        from django.db.backends.postgresql.base import DatabaseWrapper
+        index = next(i for i in Equipment._meta.indexes if i.name == 'equipment_serial_upper_idx')
+        postgres = DatabaseWrapper({**connection.settings_dict, 'ENGINE': 'django.db.backends.postgresql'})
+        sql = str(index.create_sql(Equipment, postgres.schema_editor(collect_sql=True)))
+        self.assertIn('(UPPER("serial_number")) text_pattern_ops', sql)
+        # SQLite has no operator classes: the same migration indexes the plain expression.
+        sql = str(index.create_sql(Equipment, connection.schema_editor(collect_sql=True)))
+        self.assertIn('(UPPER("serial_number"))', sql)
+        self.assertNotIn('text_pattern_ops', sql)
+
+
+class BulkHandoverTest(TestCase):
+    """A whole-area move is saved in one transaction with set-based statements."""
+
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user('tec', password='x')
+        self.old_area = Area.objects.create(name='Consulta Externa')
+        self.new_area = Area.objects.create(name='Torre Nueva')
+        self.ptype = PeripheralType.objects.create(name='Mouse')
+        self.mouse = Peripheral.objects.create(type=self.ptype, brand='Genius', model='DX', quantity=50, area=self.old_area)
+        self.keyboard = Peripheral.objects.create(type=self.ptype, brand='Genius', model='KB', quantity=3, area=self.old_area)
+        self.client = TestClient()
+        self.client.force_login(self.user)
+
+    def post_handover(self, equipment):
+        data = {
+            'type': 'ASSIGNMENT', 'source_area': self.old_area.pk, 'destination_area': self.new_area.pk,
+            'equipment': [e.pk for e in equipment], 'action': 'save',
+            'handoverperipheral_set-TOTAL_FORMS': '2', 'handoverperipheral_set-INITIAL_FORMS': '0',
+            'handoverperipheral_set-0-peripheral': self.mouse.pk, 'handoverperipheral_set-0-quantity': '40',
+            'handoverperipheral_set-1-peripheral': self.keyboard.pk, 'handoverperipheral_set-1-quantity': '5',
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post('/handovers/new/', data)
+        self.assertEqual(response.status_code, 302)
+        return len(ctx.captured_queries)
+
+    def make_equipment(self, count, prefix):
+        return [
+            Equipment.objects.create(serial_number=f'{prefix}-{i}', type='PC', brand='HP', model='400', area=self.old_area)
+            for i in range(count)
+        ]
+
+    def test_move_is_set_based(self):
+        few = self.post_handover(self.make_equipment(3, 'A'))
+        self.mouse.quantity = 50
+        self.mouse.save()
+        self.keyboard.quantity = 3
+        self.keyboard.save()
+        many = self.post_handover(self.make_equipment(80, 'B'))
+        self.assertEqual(few, many)
+
+    def test_handover_effects(self):
+        equipment = self.make_equipment(5, 'C')
+        self.post_handover(equipment)
+        handover = Handover.objects.get()
+
+        self.assertEqual(handover.equipment.count(), 5)
+        self.assertEqual(Equipment.objects.filter(area=self.new_area).count(), 5)
+        self.assertEqual(
+            Equipment.history.filter(area=self.new_area, history_change_reason=f'Acta de entrega #{handover.pk}').count(), 5
+        )
+        self.assertEqual(
+            dict(handover.handoverperipheral_set.values_list('peripheral_id', 'quantity')),
+            {self.mouse.pk: 40, self.keyboard.pk: 5},
+        )
+        self.mouse.refresh_from_db()
+        self.keyboard.refresh_from_db()
+        self.assertEqual((self.mouse.quantity, self.keyboard.quantity), (10, 0))
+        self.assertEqual(
+            list(StockMovement.objects.filter(handover=handover).order_by('peripheral_id').values_list('quantity', flat=True)),
+            [-40, -3],
+        )
+        self.assertTrue(handover.acta_pdf.name.endswith('.pdf'))
+
+
+class BulkActionTest(TestCase):
+    """Mass reassignment/retirement updates every asset and writes one consolidated acta."""
+
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user('tec', password='x')
+        self.old_area = Area.objects.create(name='Urgencias')
+        self.new_area = Area.objects.create(name='Hospitalización')
+        self.ptype = PeripheralType.objects.create(name='Monitor')
+        self.equipment = [
+            Equipment.objects.create(serial_number=f'BLK-{i}', type='PC', brand='HP', model='400', area=self.old_area)
+            for i in range(4)
+        ]
+        self.monitor = Peripheral.objects.create(type=self.ptype, brand='LG', model='22MK', quantity=6, area=self.old_area)
+        self.client = TestClient()
+        self.client.force_login(self.user)
+
+    def photo(self):
+        from PIL import Image
+        buffer = BytesIO()
+        Image.new('RGB', (2, 2), 'red').save(buffer, format='PNG')
+        return SimpleUploadedFile('evidencia.png', buffer.getvalue(), content_type='image/png')
+
+    def post(self, data, files=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/bulk/', {**data, **(files or {})})
+
+    def test_reassign_whole_area(self):
+        response = self.post({'action': 'REASSIGN', 'source_area': self.old_area.pk, 'area': self.new_area.pk})
+        operation = BulkOperation.objects.get()
+        self.assertRedirects(response, f'/bulk/{operation.pk}/')
+
+        self.assertEqual(Equipment.objects.filter(area=self.new_area).count(), 4)
+        self.assertEqual(operation.equipment.count(), 4)
+        self.assertEqual(
+            self.equipment[0].history.first().history_change_reason, f'Reasignación de Área #{operation.pk}'
+        )
+        self.monitor.refresh_from_db()
+        self.assertEqual(self.monitor.area, self.new_area)
+        self.assertEqual(StockBalance.objects.get(peripheral=self.monitor, area=self.new_area).quantity, 6)
+        self.assertEqual(StockBalance.objects.get(peripheral=self.monitor, area=self.old_area).quantity, 0)
+        self.assertTrue(BulkOperation.objects.get().acta_pdf)
+        self.assertContains(self.client.get(f'/bulk/{operation.pk}/'), 'BLK-3')
+        self.assertContains(self.client.get('/bulk/'), 'Operaciones Recientes')
+
+    def test_retire_writes_one_log_per_asset(self):
+        data = {'action': 'RETIRE', 'equipment': [e.pk for e in self.equipment[:2]],
+                'peripherals': [self.monitor.pk], 'reason': 'Daño por inundación'}
+        self.post(data, {'photo': self.photo()})
+        operation = BulkOperation.objects.get()
+
+        self.assertEqual(Equipment.objects.filter(status='RETIRED').count(), 2)
+        logs = RetirementLog.objects.filter(operation=operation)
+        self.assertEqual(logs.count(), 3)
+        self.assertEqual({log.photo.name for log in logs}, {operation.photo.name})
+        self.monitor.refresh_from_db()
+        self.assertEqual((self.monitor.status, self.monitor.quantity), ('RETIRED', 0))
+        self.assertFalse(StockBalance.objects.filter(peripheral=self.monitor, quantity__gt=0).exists())
+        self.assertEqual(EquipmentEvent.objects.filter(event_type='RETIREMENT').count(), 2)
+        self.assertTrue(BulkOperation.objects.get().acta_pdf)
+
+        response = self.client.get(f'/bulk/{operation.pk}/acta/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_form_validation(self):
+        form = BulkActionForm({'action': 'REASSIGN', 'equipment': [self.equipment[0].pk]})
+        self.assertFalse(form.is_valid())
+        self.assertIn('area', form.errors)
+
+        form = BulkActionForm({'action': 'RETIRE', 'equipment': [self.equipment[0].pk]})
+        self.assertFalse(form.is_valid())
+        self.assertIn('reason', form.errors)
+        self.assertIn('photo', form.errors)
+
+        form = BulkActionForm({'action': 'STATUS', 'status': 'ACTIVE'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('__all__', form.errors)
+
+
+class EquipmentQrTest(TestCase):
+    """QR images are encoded once per payload and revalidated by ETag."""
+
+    def setUp(self):
+        cache.clear()
+        self.area = Area.objects.create(name='Laboratorio')
+        self.equipment = Equipment.objects.create(serial_number='QR-1', type='PC', brand='HP', model='400', area=self.area)
+        self.client = TestClient()
+        self.client.force_login(User.objects.create_user('tec', password='x'))
+        self.url = f'/inventory/equipment/{self.equipment.pk}/qr/'
+
+    def test_png_cached_with_etag(self):
+        with mock.patch('inventory.qr.render_qr', side_effect=render_qr) as render:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first['Content-Type'], 'image/png')
+        self.assertEqual(first.content, second.content)
+        self.assertIn('no-cache', first['Cache-Control'])
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        # Moving the equipment changes the encoded text, hence the ETag.
+        self.equipment.area = Area.objects.create(name='Farmacia')
+        self.equipment.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_svg_and_immutable_link(self):
+        digest = qr_digest(equipment_qr_data(self.equipment, 'http://testserver'))
+        response = self.client.get(f'/inventory/equipment/{self.equipment.pk}/qr/svg/', {'v': digest})
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertTrue(response.content.lstrip().startswith(b'<?xml'))
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertContains(self.client.get(f'/inventory/equipment/{self.equipment.pk}/'), f'?v={digest}')
+
+
+class QrLabelSheetTest(TestCase):
+    """Label sheets reuse cached QR images and honour the list filters."""
+
+    def setUp(self):
+        cache.clear()
+        self.area = Area.objects.create(name='UCI')
+        other = Area.objects.create(name='Cirugía')
+        for i in range(5):
+            Equipment.objects.create(serial_number=f'LBL-{i}', type='PC', brand='HP', model='400', area=self.area)
+        Equipment.objects.create(serial_number='OTHER-1', type='PC', brand='HP', model='400', area=other)
+        self.client = TestClient()
+        self.client.force_login(User.objects.create_user('tec', password='x'))
+
+    def test_sheet_for_area_encodes_once(self):
+        with mock.patch('inventory.qr.render_qr', side_effect=render_qr) as render:
+            response = self.client.get('/inventory/equipment/labels/', {'area': self.area.pk})
+            self.assertEqual(render.call_count, 5)
+            self.client.get('/inventory/equipment/labels/', {'area': self.area.pk})
+            self.assertEqual(render.call_count, 5)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_view_never_starts_a_process_pool(self):
+        with mock.patch('inventory.qr.QR_POOL_MIN_SIZE', 1), mock.patch('inventory.qr.ProcessPoolExecutor') as pool:
+            response = self.client.get('/inventory/equipment/labels/', {'area': self.area.pk})
+        self.assertEqual(response.status_code, 200)
+        pool.assert_not_called()
+
+    def test_command_with_process_pool(self):
+        ids = ','.join(str(pk) for pk in Equipment.objects.filter(area=self.area).values_list('pk', flat=True)[:3])
+        with tempfile.TemporaryDirectory() as tmp, mock.patch('inventory.qr.QR_POOL_MIN_SIZE', 1):
+            output = f'{tmp}/labels.pdf'
+            call_command('print_qr_labels', output, '--base-url', 'http://testserver', '--ids', ids,
+                         '--workers', '2', stdout=StringIO())
+            with open(output, 'rb') as f:
+                self.assertTrue(f.read().startswith(b'%PDF'))
+            # The pool results were stored for the next sheet.
+            with mock.patch('inventory.qr.render_qr') as render:
+                call_command('print_qr_labels', output, '--base-url', 'http://testserver', '--ids', ids, stdout=StringIO())
+            render.assert_not_called()
+
+
+class ScanLookupTest(TestCase):
+    """Scans resolve from the in-memory index and cached cards."""
+
+    def setUp(self):
+        cache.clear()
+        self.area = Area.objects.create(name='Quirófanos')
+        self.equipment = Equipment.objects.create(serial_number='SCN-01', type='PC', brand='Dell', model='7090', area=self.area)
+        self.client = TestClient()
+
+    def test_signed_code_needs_no_login(self):
+        url = f'/scan/{make_scan_code(self.equipment.pk)}/'
+        response = self.client.get(url, {'format': 'json'})
+        self.assertEqual(response.json()['equipment']['serial'], 'SCN-01')
+        self.assertEqual(response.json()['equipment']['area'], 'Quirófanos')
+        self.assertIn('max-age', response['Cache-Control'])
+
+        # Warm: no query at all, and a matching ETag gives 304.
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), 'SCN-01')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.assertEqual(self.client.get(f'/scan/{self.equipment.pk}:forged/').status_code, 404)
+
+    def test_serial_lookup_refreshes_on_change(self):
+        self.assertEqual(self.client.get('/scan/', {'serial': 'SCN-01'}).status_code, 302)
+        self.client.force_login(User.objects.create_user('tec', password='x'))
+
+        response = self.client.get('/scan/', {'serial': ' scn-01 '}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['equipment']['id'], self.equipment.pk)
+
+        self.equipment.serial_number = 'SCN-02'
+        self.equipment.status = 'MAINTENANCE'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.equipment.save()
+        self.assertEqual(self.client.get('/scan/', {'serial': 'SCN-01', 'format': 'json'}).status_code, 404)
+        card = self.client.get('/scan/', {'serial': 'SCN-02', 'format': 'json'}).json()['equipment']
+        self.assertEqual(card['status'], 'MAINTENANCE')
+
+    def test_qr_points_to_scan_endpoint(self):
+        data = equipment_qr_data(self.equipment, 'http://testserver')
+        self.assertTrue(data.startswith(f'http://testserver/scan/{make_scan_code(self.equipment.pk)}/?'))
+
+
+class RoundSheetTest(TestCase):
+    """A whole-area round is saved in one request with bulk inserts."""
+
+    def setUp(self):
+        self.area = Area.objects.create(name='Urgencias')
+        self.user = User.objects.create_user('tec', password='x')
+        self.client = TestClient()
+        self.client.force_login(self.user)
+
+    def make_equipment(self, count):
+        Equipment.objects.filter(area=self.area).delete()
+        return [
+            Equipment.objects.create(serial_number=f'RND-{count}-{i:02d}', type='PC', brand='HP', model='400', area=self.area)
+            for i in range(count)
+        ]
+
+    def post_sheet(self, equipment):
+        data = {
+            'area': self.area.pk,
+            'rounds-TOTAL_FORMS': str(len(equipment)), 'rounds-INITIAL_FORMS': '0',
+        }
+        for i, e in enumerate(equipment):
+            data[f'rounds-{i}-equipment_id'] = e.pk
+            data[f'rounds-{i}-general_status'] = 'GOOD'
+            for name in EquipmentRound.CHECK_FIELDS:
+                data[f'rounds-{i}-{name}'] = 'PASS'
+        data['rounds-0-network_status'] = 'FAIL'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/rounds/sheet/', data)
+        self.assertRedirects(response, '/rounds/')
+        return len(ctx.captured_queries)
+
+    def test_sheet_lists_area_equipment(self):
+        equipment = self.make_equipment(3)
+        response = self.client.get('/rounds/sheet/', {'area': self.area.pk})
+        self.assertContains(response, equipment[2].serial_number)
+        self.assertEqual(len(response.context['rows']), 3)
+
+    def test_bulk_save_is_set_based(self):
+        few = self.post_sheet(self.make_equipment(3))
+        equipment = self.make_equipment(40)
+        many = self.post_sheet(equipment)
+        self.assertEqual(few, many)
+
+        rounds = EquipmentRound.objects.filter(equipment__area=self.area)
+        self.assertEqual(rounds.count(), 40)
+        self.assertEqual(rounds.get(equipment=equipment[0]).network_status, 'FAIL')
+        self.assertEqual(set(rounds.values_list('performed_by', flat=True)), {self.user.pk})
+        self.assertEqual(EquipmentRound.history.filter(equipment_id__in=[e.pk for e in equipment]).count(), 40)
+        self.assertEqual(rounds.get(equipment=equipment[0]).check_code, EquipmentRound.encode_checks(
+            ['PASS'] * 4 + ['FAIL'] + ['PASS'] * 5
+        ))
+        self.assertEqual(EquipmentEvent.objects.filter(event_type='ROUND', equipment__in=equipment).count(), 40)
+
+
+class RoundCheckCodeTest(TestCase):
+    """The checklist is mirrored into check_code, two bits per check."""
+
+    def setUp(self):
+        self.equipment = Equipment.objects.create(serial_number='CHK-1', type='PC', brand='HP', model='400')
+
+    def make_round(self, **checks):
+        return EquipmentRound.objects.create(equipment=self.equipment, **checks)
+
+    def test_save_encodes_and_decoder_round_trips(self):
+        round_obj = self.make_round(hw_status='WARN', network_status='FAIL', printer_status='PASS')
+        decoded = decode_check_codes([round_obj.check_code])[0]
+        expected = [
+            EquipmentRound.CHECK_CODES[getattr(round_obj, name)] for name in EquipmentRound.CHECK_FIELDS
+        ]
+        self.assertEqual(decoded.tolist(), expected)
+        self.assertEqual(decoded[EquipmentRound.CHECK_FIELDS.index('network_status')], 2)
+
+        round_obj.network_status = 'PASS'
+        round_obj.save(update_fields=['network_status'])
+        round_obj.refresh_from_db()
+        self.assertEqual(decode_check_codes([round_obj.check_code])[0][4], 0)
+
+    def test_sql_extraction_and_resync(self):
+        self.make_round(os_status='FAIL')
+        self.make_round()
+        failing = EquipmentRound.objects.annotate(os=check_code_of('os_status')).filter(os=2)
+        self.assertEqual(failing.count(), 1)
+
+        EquipmentRound.objects.update(os_status='WARN')
+        self.assertEqual(resync_check_codes(), 2)
+        codes = EquipmentRound.objects.values_list('check_code', flat=True)
+        self.assertEqual(set(decode_check_codes(codes)[:, 5].tolist()), {1})
+
+    def test_failure_rates_skip_not_applicable(self):
+        self.make_round(hw_status='FAIL', ups_status='NA')
+        self.make_round(hw_status='WARN', ups_status='NA')
+        self.make_round(hw_status='PASS', ups_status='NA')
+        self.make_round(hw_status='PASS', ups_status='NA')
+        rates = failure_rates(EquipmentRound.objects.values_list('check_code', flat=True))
+        self.assertEqual(rates['hw_status'], 0.5)
+        self.assertEqual(rates['powers_on'], 0.0)
+        self.assertIsNone(rates['ups_status'])
+
+    def test_backfill_migration_matches_save(self):
+        import importlib
+        from django.apps import apps
+        migration = importlib.import_module('inventory.migrations.0041_round_check_code')
+        round_obj = self.make_round(monitor_status='FAIL', cables_status='WARN', ups_status='PASS')
+        EquipmentRound.objects.update(check_code=0)
+        EquipmentRound.history.update(check_code=0)
+        schema_editor = mock.Mock(connection=connection)
+        migration.backfill_check_codes(apps, schema_editor)
+        migration.backfill_history_check_codes(apps, schema_editor)
+        self.assertEqual(EquipmentRound.objects.get().check_code, round_obj.check_code)
+        self.assertEqual(EquipmentRound.history.get().check_code, round_obj.check_code)
+
+    def test_backfill_migration_skips_other_databases(self):
+        import importlib
+        from django.apps import apps
+        migration = importlib.import_module('inventory.migrations.0041_round_check_code')
+        self.make_round(monitor_status='FAIL')
+        EquipmentRound.history.update(check_code=0)
+        # With HistoryRouter the round history lives on 'history': running on 'default' leaves it alone.
+        with override_settings(DATABASE_ROUTERS=['inventory.routers.HistoryRouter']):
+            with CaptureQueriesContext(connection) as ctx:
+                migration.backfill_history_check_codes(apps, mock.Mock(connection=connection))
+        self.assertEqual(ctx.captured_queries, [])
+        self.assertEqual(EquipmentRound.history.get().check_code, 0)
+
+
+class RoundFailureAnalyticsTest(TestCase):
+    """Failure heatmap per area and check, and equipment failing in consecutive rounds."""
+
+    def setUp(self):
+        cache.clear()
+        self.urgencias = Area.objects.create(name='URGENCIAS')
+        self.quirofanos = Area.objects.create(name='QUIROFANOS')
+        self.pc1 = Equipment.objects.create(serial_number='HM-1', type='PC', brand='HP', model='400', area=self.urgencias)
+        self.pc2 = Equipment.objects.create(serial_number='HM-2', type='PC', brand='HP', model='400', area=self.urgencias)
+        self.pc3 = Equipment.objects.create(serial_number='HM-3', type='PC', brand='HP', model='400', area=self.quirofanos)
+        self.start = timezone.now() - datetime.timedelta(days=10)
+        self.today = timezone.localdate()
+        # pc1: network FAIL, FAIL, PASS, WARN ; pc2: network FAIL once ; pc3: all good
+        for day, status in enumerate(['FAIL', 'FAIL', 'PASS', 'WARN']):
+            self.make_round(self.pc1, day, network_status=status)
+        self.make_round(self.pc2, 0, network_status='FAIL')
+        self.make_round(self.pc2, 1)
+        self.make_round(self.pc3, 0)
+
+    def make_round(self, equipment, day, **checks):
+        return EquipmentRound.objects.create(
+            equipment=equipment, datetime=self.start + datetime.timedelta(days=day), **checks
+        )
+
+    def analytics(self, **kwargs):
+        return build_round_failure_analytics(self.today - datetime.timedelta(days=30), self.today, **kwargs)
+
+    def test_heatmap_rates_per_area(self):
+        result = self.analytics()
+        self.assertEqual(result['round_count'], 7)
+        areas = {a['area']: a for a in result['areas']}
+        self.assertEqual(result['areas'][0]['area'], 'URGENCIAS')
+        network = {c['field']: c for c in areas['URGENCIAS']['cells']}['network_status']
+        self.assertEqual((network['warn'], network['fail'], network['applicable']), (1, 3, 6))
+        self.assertAlmostEqual(network['rate'], 4 / 6)
+        ups = {c['field']: c for c in areas['URGENCIAS']['cells']}['ups_status']
+        self.assertIsNone(ups['rate'])
+        self.assertEqual(areas['QUIROFANOS']['rate'], 0)
+
+    def test_repeat_offenders_need_consecutive_failures(self):
+        offenders = self.analytics()['repeat_offenders']
+        self.assertEqual(len(offenders), 1)
+        self.assertEqual(offenders[0]['serial'], 'HM-1')
+        self.assertEqual(offenders[0]['field'], 'network_status')
+        self.assertEqual(offenders[0]['streak'], 2)
+        self.assertTrue(offenders[0]['ongoing'])
+        self.assertEqual(self.analytics(min_streak=3)['repeat_offenders'], [])
+
+    def test_cached_until_rounds_or_areas_change(self):
+        start, end = self.today - datetime.timedelta(days=30), self.today
+        with self.captureOnCommitCallbacks(execute=True):
+            first = get_round_failure_analytics(start, end)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_round_failure_analytics(start, end), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_round(self.pc3, 2, hw_status='FAIL')
+        self.assertEqual(get_round_failure_analytics(start, end)['round_count'], 8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pc3.area = self.urgencias
+            self.pc3.save()
+        self.assertEqual([a['area'] for a in get_round_failure_analytics(start, end)['areas']], ['URGENCIAS'])
+
+    def test_view_and_report_pdf(self):
+        user = User.objects.create_user('supervisor', password='x')
+        client = TestClient()
+        client.force_login(user)
+        response = client.get('/reports/rounds/', {'start_date': (self.today - datetime.timedelta(days=30)).isoformat()})
+        self.assertContains(response, 'HM-1')
+        self.assertContains(response, 'QUIROFANOS')
+        response = client.get('/reports/export/pdf/', {'start_date': (self.today - datetime.timedelta(days=30)).isoformat()})
+        self.assertEqual(response.status_code, 200)
+
+
+class MaintenanceTaskAnalyticsTest(TestCase):
+    """Checklist task frequency per grouping and co-occurrence, one aggregate query each."""
+
+    def setUp(self):
+        cache.clear()
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.ana = User.objects.create_user('ana', password='x')
+        self.luis = User.objects.create_user('luis', password='x')
+        urgencias = Area.objects.create(name='URGENCIAS')
+        self.pc1 = Equipment.objects.create(serial_number='MT-1', type='PC', brand='HP', model='400', area=urgencias)
+        self.pc2 = Equipment.objects.create(serial_number='MT-2', type='PC', brand='HP', model='400')
+        self.start, self.end = datetime.date(2026, 1, 1), datetime.date(2026, 3, 31)
+        self.make(self.pc1, self.ana, datetime.date(2026, 1, 10), type_cleaning=True, hw_fans=True, hw_power_supply=True)
+        self.make(self.pc1, self.ana, datetime.date(2026, 1, 20), type_cleaning=True, hw_fans=True)
+        self.make(self.pc2, self.luis, datetime.date(2026, 2, 5), type_updates=True)
+        self.make(self.pc2, self.luis, datetime.date(2025, 12, 5), type_cleaning=True)  # outside the window
+
+    def make(self, equipment, user, date, **tasks):
+        return Maintenance.objects.create(
+            equipment=equipment, performed_by=user, date=date, maintenance_type='PREVENTIVE',
+            description='Rutina', **tasks,
+        )
+
+    def test_frequencies_per_grouping(self):
+        with self.assertNumQueries(5):
+            result = build_maintenance_task_analytics(self.start, self.end)
+        cleaning = Maintenance.TASK_FIELDS.index('type_cleaning')
+        self.assertEqual(result['overall']['total'], 3)
+        self.assertEqual(result['overall']['counts'][cleaning], 2)
+        self.assertEqual(
+            [(r['key'], r['total'], r['counts'][cleaning]) for r in result['by_period']],
+            [('2026-01', 2, 2), ('2026-02', 1, 0)],
+        )
+        self.assertEqual([(r['key'], r['total']) for r in result['by_area']], [('URGENCIAS', 2), ('Sin Área', 1)])
+        technicians = {r['key']: r for r in result['by_technician']}
+        self.assertEqual(technicians['ana']['rates'][cleaning], 1.0)
+        self.assertEqual(technicians['luis']['counts'][cleaning], 0)
+
+    def test_co_occurrence(self):
+        pairs = build_maintenance_task_analytics(self.start, self.end)['co_occurrence']
+        self.assertEqual(
+            {(p['task'], p['with_task']): p['count'] for p in pairs},
+            {('type_cleaning', 'hw_fans'): 2, ('hw_power_supply', 'type_cleaning'): 1, ('hw_power_supply', 'hw_fans'): 1},
+        )
+        top = pairs[0]
+        self.assertEqual(top['confidence'], 1.0)
+        self.assertAlmostEqual(top['lift'], 1.5)
+
+    def test_cached_until_maintenance_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            get_maintenance_task_analytics(self.start, self.end)
+        with self.assertNumQueries(0):
+            get_maintenance_task_analytics(self.start, self.end)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make(self.pc2, self.ana, datetime.date(2026, 3, 1), hw_screen=True)
+        self.assertEqual(get_maintenance_task_analytics(self.start, self.end)['overall']['total'], 4)
+
+    def test_report_dashboard_and_pdf(self):
+        client = TestClient()
+        client.force_login(self.ana)
+        params = {'start_date': '2026-01-01', 'end_date': '2026-03-31'}
+        response = client.get('/reports/', params)
+        self.assertContains(response, 'Frecuencia de Tareas de Mantenimiento')
+        self.assertContains(response, 'Limpieza Ventiladores')
+        response = client.get('/reports/export/pdf/', params)
+        self.assertEqual(response.status_code, 200)
+
+
+class VersionedCacheTest(TestCase):
+    """get_or_build entries are shared, versioned and memoized per request."""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def build(self):
+        self.calls += 1
+        return {'built': self.calls}
+
+    def test_tests_use_a_private_cache(self):
+        # cache.clear() in these tests must never reach the cache of a running instance.
+        self.assertEqual(settings.CACHES['default']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+
+    def test_bump_invalidates_namespace(self):
+        self.assertEqual(get_or_build('report', self.build, 2026), {'built': 1})
+        self.assertEqual(get_or_build('report', self.build, 2026), {'built': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_version('report')
+        self.assertEqual(get_or_build('report', self.build, 2026), {'built': 2})
+
+    def test_request_memo(self):
+        def view(request):
+            first = get_or_build('report', self.build)
+            # Later reads in the same request skip the shared cache.
+            cache.delete(make_key('report'))
+            return get_or_build('report', self.build), first
+
+        second, first = RequestMemoMiddleware(view)(None)
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+        # Outside the request the shared cache is read again.
+        self.assertEqual(get_or_build('report', self.build), {'built': 2})
+
+
+class SystemSettingsCacheTest(TestCase):
+    """The settings singleton is served from the cache until it is saved."""
+
+    def setUp(self):
+        cache.clear()
+        SystemSettings._loaded = (None, None)
+
+    def test_load_is_cached_and_invalidated_on_save(self):
+        self.assertEqual(SystemSettings.load().site_name, 'HFPS TIC')
+        with self.assertNumQueries(0):
+            SystemSettings.load()
+
+        settings_row = SystemSettings.objects.get(pk=1)
+        settings_row.site_name = 'Hospital Central'
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row.save()
+        self.assertEqual(SystemSettings.load().site_name, 'Hospital Central')
+
+    def test_shared_cache_survives_process_cache_reset(self):
+        SystemSettings.load()
+        # Another process: empty in-process cache, same shared cache.
+        SystemSettings._loaded = (None, None)
+        with self.assertNumQueries(0):
+            self.assertEqual(SystemSettings.load().pk, 1)
+
+    def test_favicon_redirect_is_query_free(self):
+        SystemSettings.load()
+        with self.assertNumQueries(0):
+            response = TestClient().get('/favicon.ico')
+        self.assertEqual(response.status_code, 302)
+
+
 class DashboardStatsTest(TestCase):
     """Test get_dashboard_stats service."""
 
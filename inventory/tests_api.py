@@ -1,8 +1,14 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth.models import User
-from .models import Equipment, Maintenance, Handover, Area, PeripheralType, Peripheral
+from django.test import override_settings
+from .models import (
+    Equipment, Maintenance, Handover, Area, PeripheralType, Peripheral,
+    EquipmentRound, ComponentLog, SyncedRecord, MaintenanceSchedule,
+)
 import datetime
+import tempfile
+import uuid
 
 class InventoryAPITest(APITestCase):
     def setUp(self):
@@ -49,3 +55,148 @@ class InventoryAPITest(APITestCase):
         url = '/api/equipment/'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class MaintenanceTaskAnalyticsAPITest(APITestCase):
+    """GET /api/maintenance/task-analytics/ returns the cached task statistics."""
+
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username='tec', password='x')
+        self.client.login(username='tec', password='x')
+        equipment = Equipment.objects.create(serial_number='TA-1', type='PC', brand='HP', model='400')
+        Maintenance.objects.create(
+            equipment=equipment, performed_by=self.user, date=datetime.date(2026, 2, 1),
+            maintenance_type='PREVENTIVE', description='Rutina', type_cleaning=True, hw_fans=True,
+        )
+
+    def test_task_analytics(self):
+        response = self.client.get('/api/maintenance/task-analytics/', {'start_date': '2026-01-01', 'end_date': '2026-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['overall']['total'], 1)
+        self.assertEqual(response.data['by_technician'][0]['key'], 'tec')
+        self.assertEqual(response.data['co_occurrence'][0]['count'], 1)
+
+    def test_invalid_period(self):
+        response = self.client.get('/api/maintenance/task-analytics/', {'start_date': '2026-12-31', 'end_date': '2026-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class OfflineSyncAPITest(APITestCase):
+    """Records captured offline are applied in batches, once per client id."""
+
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username='tec', password='x')
+        self.client.login(username='tec', password='x')
+        self.area = Area.objects.create(name='QUIROFANOS')
+        self.equipment = Equipment.objects.create(
+            serial_number='OR-001', type='PC', brand='HP', model='ProDesk', status='ACTIVE', area=self.area
+        )
+        self.peripheral = Peripheral.objects.create(
+            type=PeripheralType.objects.create(name='Mouse'), brand='Logitech', model='M100', quantity=2
+        )
+
+    def batch(self):
+        return {'records': [
+            {'client_id': str(uuid.uuid4()), 'kind': 'ROUND', 'data': {
+                'equipment': self.equipment.pk, 'datetime': '2026-03-02T08:15:00Z',
+                'network_status': 'FAIL', 'observations': 'Sin red en sala 2',
+            }},
+            {'client_id': str(uuid.uuid4()), 'kind': 'COMPONENT_LOG', 'data': {
+                'equipment': self.equipment.pk, 'action_type': 'REPLACED',
+                'peripheral': self.peripheral.pk, 'quantity': 1, 'description': 'Mouse dañado',
+            }},
+            {'client_id': str(uuid.uuid4()), 'kind': 'MAINTENANCE', 'data': {
+                'equipment': self.equipment.pk, 'date': '2026-03-02', 'maintenance_type': 'PREVENTIVE',
+                'description': 'Limpieza general', 'type_cleaning': True, 'hw_fans': True,
+            }},
+        ]}
+
+    def test_batch_is_applied_and_retries_are_idempotent(self):
+        batch = self.batch()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/sync/', batch, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created'] * 3)
+
+        round_obj = EquipmentRound.objects.get()
+        self.assertEqual(round_obj.network_status, 'FAIL')
+        self.assertEqual(round_obj.performed_by, self.user)
+        self.assertEqual(round_obj.datetime, datetime.datetime(2026, 3, 2, 8, 15, tzinfo=datetime.timezone.utc))
+        log = ComponentLog.objects.get()
+        self.assertEqual(log.component_name, str(self.peripheral))
+        self.peripheral.refresh_from_db()
+        self.assertEqual(self.peripheral.quantity, 1)
+        maintenance = Maintenance.objects.get()
+        self.assertTrue(maintenance.type_cleaning and maintenance.hw_fans)
+        self.assertEqual(maintenance.performed_by, self.user)
+
+        # The device never got the answer and sends the same batch again.
+        response = self.client.post('/api/sync/', batch, format='json')
+        self.assertEqual([r['status'] for r in response.data['results']], ['duplicate'] * 3)
+        self.assertEqual(
+            [r['id'] for r in response.data['results']], [round_obj.pk, log.pk, maintenance.pk]
+        )
+        self.assertEqual(EquipmentRound.objects.count(), 1)
+        self.assertEqual(ComponentLog.objects.count(), 1)
+        self.assertEqual(Maintenance.objects.count(), 1)
+        self.assertEqual(SyncedRecord.objects.count(), 3)
+
+    def test_maintenance_batch_completes_the_schedule(self):
+        MaintenanceSchedule.objects.create(equipment=self.equipment, scheduled_date=datetime.date(2026, 3, 20), status='PENDING')
+        batch = self.batch()
+        second = dict(batch['records'][2], client_id=str(uuid.uuid4()))
+        second['data'] = dict(second['data'], date='2026-03-25', next_maintenance_date='2026-09-25')
+        response = self.client.post('/api/sync/', {'records': [batch['records'][2], second]}, format='json')
+        self.assertEqual([r['status'] for r in response.data['results']], ['created'] * 2)
+
+        # Same result as creating them one by one: the first one completes the
+        # month's schedule, the second one adds its own COMPLETED row.
+        self.assertEqual(
+            list(MaintenanceSchedule.objects.order_by('scheduled_date').values_list('scheduled_date', 'status')),
+            [(datetime.date(2026, 3, 2), 'COMPLETED'), (datetime.date(2026, 3, 25), 'COMPLETED'),
+             (datetime.date(2026, 9, 25), 'PENDING')],
+        )
+        latest = Maintenance.objects.get(date=datetime.date(2026, 3, 25))
+        self.assertEqual(latest.next_maintenance_date, datetime.date(2026, 9, 25))
+
+    def test_invalid_records_are_reported_without_blocking_the_batch(self):
+        self.peripheral.quantity = 0
+        self.peripheral.save()
+        batch = self.batch()
+        batch['records'][0]['data']['network_status'] = 'ROTO'
+        response = self.client.post('/api/sync/', batch, format='json')
+
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, ['error', 'error', 'created'])
+        self.assertIn('network_status', response.data['results'][0]['errors'])
+        self.assertIn('stock', response.data['results'][1]['errors']['non_field_errors'][0])
+        self.assertFalse(EquipmentRound.objects.exists())
+        self.assertFalse(ComponentLog.objects.exists())
+        self.assertEqual(SyncedRecord.objects.get().kind, 'MAINTENANCE')
+
+    def test_malformed_batch_is_rejected(self):
+        response = self.client.post('/api/sync/', {'records': [{'client_id': 'x', 'kind': 'ROUND', 'data': {}}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.logout()
+        response = self.client.post('/api/sync/', self.batch(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_offline_page_and_service_worker(self):
+        response = self.client.get('/offline/')
+        self.assertContains(response, 'OR-001')
+        self.assertContains(response, 'data-sync-url="/api/sync/"')
+        self.client.logout()
+        response = self.client.get('/offline/sw.js')
+        self.assertEqual(response['Content-Type'], 'application/javascript')
+        self.assertContains(response, "'/offline/'")
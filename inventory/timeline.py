@@ -0,0 +1,178 @@
+"""
+Equipment timeline (Hoja de Vida) backed by the EquipmentEvent table.
+
+Each source record (maintenance, handover, round, component change,
+retirement and the equipment registration itself) is turned into one
+EquipmentEvent row per equipment. Signals keep the rows in sync and the
+backfill_equipment_events command rebuilds them, so both the HTML timeline and
+the PDF export read a single indexed query.
+"""
+import datetime
+
+from django.utils import timezone
+
+from .models import (
+    Equipment, Maintenance, Handover, EquipmentRound, ComponentLog,
+    RetirementLog, EquipmentEvent,
+)
+
+# Fields whose partial saves never change what the timeline shows.
+TIMELINE_IGNORED_FIELDS = {'acta_pdf', 'next_maintenance_date'}
+
+ROUND_COLORS = {'GOOD': 'success', 'REGULAR': 'warning'}
+
+
+def _as_datetime(value):
+    """Date fields are placed at midnight so they sort together with datetimes."""
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time.min)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.get_current_timezone())
+    return value
+
+
+def _username(user):
+    return user.username if user else 'N/A'
+
+
+def equipment_entry_events(equipments):
+    for e in equipments:
+        yield EquipmentEvent(
+            equipment_id=e.pk, event_type='ENTRY', source_id=e.pk,
+            date=_as_datetime(e.created_at),
+            title='Registro Inicial',
+            label='Registro Inicial',
+            description='Equipo dado de alta en el sistema.',
+            color='primary',
+        )
+
+
+def maintenance_events(maintenances):
+    for m in maintenances:
+        yield EquipmentEvent(
+            equipment_id=m.equipment_id, event_type='MAINTENANCE', source_id=m.pk,
+            date=_as_datetime(m.date),
+            title=f'Mantenimiento {m.get_maintenance_type_display()}',
+            label=f'Mant. {m.get_maintenance_type_display()}',
+            description=m.description or '',
+            user=_username(m.performed_by),
+            color='info',
+        )
+
+
+def handover_events(handovers):
+    """Handovers need their equipment prefetched (one event per equipment)."""
+    for h in handovers:
+        dest = h.destination_area.name if h.destination_area else 'N/A'
+        client = h.client.name if h.client else (h.receiver_name or 'N/A')
+        for equipment in h.equipment.all():
+            yield EquipmentEvent(
+                equipment_id=equipment.pk, event_type='HANDOVER', source_id=h.pk,
+                date=_as_datetime(h.date),
+                title=f'Acta: {h.get_type_display()} a {dest}',
+                label=f'Acta: {h.get_type_display()}',
+                destination=dest,
+                description=f'Asignado a: {client}',
+                user=_username(h.technician),
+                color='warning',
+            )
+
+
+def round_events(rounds):
+    for r in rounds:
+        yield EquipmentEvent(
+            equipment_id=r.equipment_id, event_type='ROUND', source_id=r.pk,
+            date=_as_datetime(r.datetime),
+            title=f'Ronda: {r.get_general_status_display()}',
+            label=f'Ronda: {r.get_general_status_display()}',
+            description=r.observations or 'Revisión técnica de rutina.',
+            user=_username(r.performed_by),
+            color=ROUND_COLORS.get(r.general_status, 'danger'),
+        )
+
+
+def component_events(logs):
+    for c in logs:
+        yield EquipmentEvent(
+            equipment_id=c.equipment_id, event_type='COMPONENT', source_id=c.pk,
+            date=_as_datetime(c.date),
+            title=f'{c.get_action_type_display()}: {c.component_name}',
+            label=f'{c.get_action_type_display()}: {c.component_name}',
+            description=c.description or '',
+            user=_username(c.performed_by),
+            color='secondary',
+        )
+
+
+def retirement_events(logs):
+    for r in logs:
+        if not r.equipment_id:
+            continue
+        yield EquipmentEvent(
+            equipment_id=r.equipment_id, event_type='RETIREMENT', source_id=r.pk,
+            date=_as_datetime(r.date),
+            title='Equipo Dado de Baja',
+            label='Baja de Equipo',
+            description=r.reason or '',
+            user=_username(r.performed_by),
+            color='danger',
+            photo=r.photo.name if r.photo else '',
+        )
+
+
+# event_type -> (model, queryset factory, event builder)
+EVENT_SOURCES = {
+    'ENTRY': (Equipment, lambda: Equipment.objects.all(), equipment_entry_events),
+    'MAINTENANCE': (Maintenance, lambda: Maintenance.objects.select_related('performed_by'), maintenance_events),
+    'HANDOVER': (Handover, lambda: Handover.objects.select_related(
+        'destination_area', 'client', 'technician').prefetch_related('equipment'), handover_events),
+    'ROUND': (EquipmentRound, lambda: EquipmentRound.objects.select_related('performed_by'), round_events),
+    'COMPONENT': (ComponentLog, lambda: ComponentLog.objects.select_related('performed_by'), component_events),
+    'RETIREMENT': (RetirementLog, lambda: RetirementLog.objects.select_related('performed_by'), retirement_events),
+}
+
+EVENT_TYPE_BY_MODEL = {model: event_type for event_type, (model, _, _) in EVENT_SOURCES.items()}
+
+
+def sync_equipment_events(event_type, source_ids):
+    """
+    Rebuild the events of the given source records.
+    Existing rows are replaced, so edits and removed M2M links are reflected.
+    """
+    source_ids = list(source_ids)
+    if not source_ids:
+        return 0
+    _, queryset, build = EVENT_SOURCES[event_type]
+    events = list(build(queryset().filter(pk__in=source_ids)))
+    EquipmentEvent.objects.filter(event_type=event_type, source_id__in=source_ids).delete()
+    EquipmentEvent.objects.bulk_create(events)
+    return len(events)
+
+
+def delete_equipment_events(event_type, source_ids):
+    EquipmentEvent.objects.filter(event_type=event_type, source_id__in=list(source_ids)).delete()
+
+
+def backfill_equipment_events(event_types=None, batch_size=500):
+    """
+    Create the missing events for every existing source record.
+    Already present rows are kept (unique constraint + ignore_conflicts).
+    Returns {event_type: rows inserted or already present}.
+    """
+    counts = {}
+    for event_type in event_types or EVENT_SOURCES:
+        _, queryset, build = EVENT_SOURCES[event_type]
+        total = 0
+        ids = list(queryset().order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            events = list(build(queryset().filter(pk__in=chunk)))
+            EquipmentEvent.objects.bulk_create(events, ignore_conflicts=True)
+            total += len(events)
+        counts[event_type] = total
+    return counts
+
+
+def get_equipment_timeline(equipment):
+    """Newest-first timeline of an equipment, served by the (equipment, date) index."""
+    return EquipmentEvent.objects.filter(equipment=equipment).order_by('-date', '-id')
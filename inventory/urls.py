@@ -14,7 +14,11 @@ urlpatterns = [
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('inventory/import/', views.import_equipment_view, name='import_equipment'),
     path('inventory/', views.equipment_list_view, name='equipment_list'),
+    path('inventory/equipment/labels/', views.equipment_labels_view, name='equipment_labels'),
+    path('scan/', views.scan_lookup_view, name='scan_lookup'),
+    path('scan/<str:code>/', views.scan_lookup_view, name='scan_code'),
     path('inventory/equipment/<int:pk>/qr/', views.generate_qr_view, name='equipment_qr'),
+    path('inventory/equipment/<int:pk>/qr/svg/', views.generate_qr_view, {'fmt': 'svg'}, name='equipment_qr_svg'),
     path('inventory/equipment/<int:pk>/', views.equipment_detail_view, name='equipment_detail'),
     path('inventory/equipment/<int:pk>/edit/', views.equipment_edit_view, name='equipment_edit'),
     path('inventory/equipment/<int:pk>/history/', views.equipment_history_view, name='equipment_history'),
@@ -32,13 +36,21 @@ urlpatterns = [
     path('maintenance/<int:pk>/success/', views.maintenance_success_view, name='maintenance_success'),
     path('clients/new/', views.client_create_view, name='client_create'),
     path('handovers/new/', views.handover_create_view, name='handover_create'),
+    path('autocomplete/<str:source>/', views.autocomplete_view, name='autocomplete'),
+    path('handovers/area-maps/', views.handover_area_maps_view, name='handover_area_maps'),
     path('handovers/<int:pk>/success/', views.handover_success_view, name='handover_success'),
     path('handovers/', views.handover_list_view, name='handover_list'),
+    path('bulk/', views.bulk_action_view, name='bulk_action'),
+    path('bulk/<int:pk>/', views.bulk_action_detail_view, name='bulk_action_detail'),
+    path('bulk/<int:pk>/acta/', views.bulk_action_acta_view, name='bulk_action_acta'),
     path('maintenance/', views.maintenance_list_view, name='maintenance_list'),
     path('maintenance/schedule/', views.maintenance_schedule_view, name='maintenance_schedule'),
     path('maintenance/schedule/toggle/', views.toggle_schedule_view, name='toggle_schedule'),
+    path('maintenance/schedule/rules/new/', views.maintenance_recurrence_create_view, name='maintenance_recurrence_create'),
     path('reports/', views.reports_dashboard_view, name='reports_dashboard'),
     path('reports/export/pdf/', views.export_report_pdf, name='export_report_pdf'),
+    path('reports/snapshot/', views.inventory_snapshot_view, name='inventory_snapshot'),
+    path('reports/rounds/', views.round_analytics_view, name='round_analytics'),
     path('inventory/peripherals/', views.peripheral_list_view, name='peripheral_list'),
     path('inventory/peripherals/<int:pk>/', views.peripheral_detail_view, name='peripheral_detail'),
     path('inventory/peripherals/<int:pk>/edit/', views.peripheral_edit_view, name='peripheral_edit'),
@@ -51,6 +63,9 @@ urlpatterns = [
     # Equipment Rounds URLs
     path('rounds/', views.equipment_round_list_view, name='equipment_round_list'),
     path('rounds/new/', views.equipment_round_create_view, name='equipment_round_create'),
+    path('rounds/sheet/', views.equipment_round_sheet_view, name='equipment_round_sheet'),
+    path('offline/', views.offline_capture_view, name='offline_capture'),
+    path('offline/sw.js', views.offline_service_worker_view, name='offline_service_worker'),
 
     # Footer informational pages
     path('support/', views.support_view, name='support_help_desk'),
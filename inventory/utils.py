@@ -393,6 +393,154 @@ def generate_handover_pdf(handover, equipment_list=None, peripheral_list=None):
         return pdf_content.encode('latin-1')
     return bytes(pdf_content)
 
+def generate_bulk_operation_pdf(operation):
+    """Consolidated acta of a BulkOperation listing every asset it touched."""
+    pdf = PDF(orientation='P', unit='mm', format='A4')
+    pdf.add_page()
+
+    titles = {
+        'REASSIGN': "ACTA DE TRASLADO MASIVO\nEQUIPOS DE COMPUTO Y PERIFERICOS",
+        'STATUS': "ACTA DE CAMBIO DE ESTADO\nEQUIPOS DE COMPUTO Y PERIFERICOS",
+        'RETIRE': "ACTA DE BAJA MASIVA\nEQUIPOS DE COMPUTO Y PERIFERICOS",
+    }
+    draw_header(pdf, titles.get(operation.action, "ACTA DE OPERACION MASIVA"), "FR-GT-06 V.01", operation.date)
+
+    equipment = list(operation.equipment.select_related('area').order_by('serial_number'))
+    peripherals = list(operation.peripherals.select_related('type', 'area').order_by('brand', 'model'))
+
+    draw_section_title(pdf, f"1. INFORMACION DE LA OPERACION No. {operation.pk}")
+    draw_field(pdf, "Accion:", operation.get_action_display(), 40, 55)
+    draw_field(pdf, "Activos:", f"{len(equipment)} equipos, {len(peripherals)} perifericos", 40, 55, ln=1)
+    if operation.action == 'REASSIGN':
+        draw_field(pdf, "Area Destino:", str(operation.area or "Sin Asignar"), 40, 150, ln=1)
+    elif operation.action == 'STATUS':
+        from .choices import EQUIPMENT_STATUS_CHOICES, PERIPHERAL_STATUS_CHOICES
+        labels = dict(PERIPHERAL_STATUS_CHOICES) | dict(EQUIPMENT_STATUS_CHOICES)
+        draw_field(pdf, "Nuevo Estado:", labels.get(operation.status, operation.status), 40, 150, ln=1)
+    responsible = (operation.performed_by.get_full_name() or operation.performed_by.username) if operation.performed_by else "N/A"
+    draw_field(pdf, "Responsable:", responsible, 40, 150, ln=1)
+    pdf.ln(2)
+
+    draw_section_title(pdf, "2. EQUIPOS")
+    pdf.set_font("Arial", 'B', 8)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.cell(10, 6, "#", border=1, fill=True, align='C')
+    pdf.cell(25, 6, "TIPO", border=1, fill=True)
+    pdf.cell(35, 6, "MARCA", border=1, fill=True)
+    pdf.cell(40, 6, "MODELO", border=1, fill=True)
+    pdf.cell(40, 6, "SERIAL / CODIGO", border=1, fill=True)
+    pdf.cell(40, 6, "AREA", border=1, ln=1, fill=True)
+    pdf.set_font("Arial", size=8)
+    if not equipment:
+        pdf.cell(190, 6, "No aplica / Ninguno", border=1, ln=1, align='C')
+    for i, eq in enumerate(equipment, 1):
+        pdf.cell(10, 6, str(i), border=1, align='C')
+        pdf.cell(25, 6, clean_text(eq.get_type_display()[:15]), border=1)
+        pdf.cell(35, 6, clean_text(eq.brand[:20]), border=1)
+        pdf.cell(40, 6, clean_text(eq.model[:22]), border=1)
+        pdf.cell(40, 6, clean_text(eq.serial_number[:22]), border=1)
+        pdf.cell(40, 6, clean_text(str(eq.area or "Sin Asignar")[:22]), border=1, ln=1)
+    pdf.ln(2)
+
+    draw_section_title(pdf, "3. PERIFERICOS / ACCESORIOS")
+    pdf.set_font("Arial", 'B', 8)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.cell(10, 6, "#", border=1, fill=True, align='C')
+    pdf.cell(25, 6, "TIPO", border=1, fill=True)
+    pdf.cell(35, 6, "MARCA", border=1, fill=True)
+    pdf.cell(40, 6, "MODELO", border=1, fill=True)
+    pdf.cell(40, 6, "SERIAL", border=1, fill=True)
+    pdf.cell(40, 6, "AREA", border=1, ln=1, fill=True)
+    pdf.set_font("Arial", size=8)
+    if not peripherals:
+        pdf.cell(190, 6, "No aplica / Ninguno", border=1, ln=1, align='C')
+    for i, p in enumerate(peripherals, 1):
+        pdf.cell(10, 6, str(i), border=1, align='C')
+        pdf.cell(25, 6, clean_text(p.type.name[:15]), border=1)
+        pdf.cell(35, 6, clean_text(p.brand[:20]), border=1)
+        pdf.cell(40, 6, clean_text(p.model[:22]), border=1)
+        pdf.cell(40, 6, clean_text((p.serial_number or "-")[:22]), border=1)
+        pdf.cell(40, 6, clean_text(str(p.area or "Sin Asignar")[:22]), border=1, ln=1)
+    pdf.ln(2)
+
+    draw_section_title(pdf, "4. JUSTIFICACION")
+    pdf.multi_cell(0, 5, clean_text(operation.reason or "Sin observaciones adicionales."), border=1)
+
+    if operation.photo and operation.photo.name:
+        try:
+            pdf.ln(2)
+            draw_section_title(pdf, "5. EVIDENCIA FOTOGRAFICA")
+            if pdf.get_y() > 200:
+                pdf.add_page()
+            pdf.image(operation.photo.path, w=80)
+        except Exception:
+            pdf.cell(0, 6, "Evidencia no disponible.", border=1, ln=1)
+
+    pdf.ln(20)
+    y_sig = pdf.get_y()
+    if y_sig > 250:
+        pdf.add_page()
+        y_sig = pdf.get_y() + 20
+    pdf.line(20, y_sig, 90, y_sig)
+    pdf.set_xy(20, y_sig + 1)
+    pdf.set_font("Arial", 'B', 8)
+    pdf.cell(70, 5, "RESPONSABLE:", align='C', ln=1)
+    pdf.set_x(20)
+    pdf.set_font("Arial", '', 8)
+    pdf.cell(70, 5, clean_text(responsible), align='C', ln=1)
+    pdf.line(120, y_sig, 190, y_sig)
+    pdf.set_xy(120, y_sig + 1)
+    pdf.set_font("Arial", 'B', 8)
+    pdf.cell(70, 5, "VO. BO. COORDINACION:", align='C', ln=1)
+
+    pdf_content = pdf.output(dest='S')
+    if isinstance(pdf_content, str):
+        return pdf_content.encode('latin-1')
+    return bytes(pdf_content)
+
+# Label sheet layout: A4, 3 x 7 labels of 63.5 x 38.1 mm (standard 21-up sheets)
+LABEL_COLUMNS, LABEL_ROWS = 3, 7
+LABEL_WIDTH, LABEL_HEIGHT = 63.5, 38.1
+LABEL_MARGIN_LEFT, LABEL_MARGIN_TOP = 7.2, 15.1
+
+
+def generate_qr_labels_pdf(labels):
+    """
+    Printable sheet of equipment labels, built in a single pass.
+    labels: iterable of (png_bytes, serial, area, description).
+    """
+    pdf = PDF(orientation='P', unit='mm', format='A4')
+    pdf.set_auto_page_break(False)
+    per_page = LABEL_COLUMNS * LABEL_ROWS
+    qr_size = LABEL_HEIGHT - 4
+    text_width = LABEL_WIDTH - qr_size - 5
+
+    for i, (image, serial, area, description) in enumerate(labels):
+        slot = i % per_page
+        if slot == 0:
+            pdf.add_page()
+        x = LABEL_MARGIN_LEFT + (slot % LABEL_COLUMNS) * LABEL_WIDTH
+        y = LABEL_MARGIN_TOP + (slot // LABEL_COLUMNS) * LABEL_HEIGHT
+
+        pdf.image(io.BytesIO(image), x=x + 2, y=y + 2, w=qr_size, h=qr_size)
+        # Plain cells (no line wrapping) keep thousands of labels fast.
+        text_x = x + qr_size + 3
+        for offset, style, size, text in ((8, 'B', 9, serial), (14, '', 7, area), (19, 'I', 6, description)):
+            pdf.set_xy(text_x, y + offset)
+            pdf.set_font("Arial", style, size)
+            text = clean_text(text)
+            while text and pdf.get_string_width(text) > text_width:
+                text = text[:-1]
+            pdf.cell(text_width, 4, text)
+
+    if pdf.page_no() == 0:
+        pdf.add_page()
+    pdf_content = pdf.output(dest='S')
+    if isinstance(pdf_content, str):
+        return pdf_content.encode('latin-1')
+    return bytes(pdf_content)
+
+
 def generate_equipment_history_pdf(equipment, events):
     from django.utils import timezone
     pdf = PDF(orientation='P', unit='mm', format='A4')
@@ -12,3 +12,7 @@ from .peripheral import *
 from .reports import *
 from .exports import *
 from .pages import *
+from .autocomplete import *
+from .bulk import *
+from .scan import *
+from .offline import *
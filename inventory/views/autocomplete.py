@@ -0,0 +1,72 @@
+import logging
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+
+from ..models import Equipment, Peripheral
+
+logger = logging.getLogger('inventory')
+
+__all__ = ['autocomplete_view']
+
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# source -> (base queryset factory, prefix-searched fields, ordering)
+AUTOCOMPLETE_SOURCES = {
+    'equipment': (
+        lambda: Equipment.objects.all(),
+        ('serial_number', 'brand', 'model'),
+        ('serial_number',),
+    ),
+    'peripheral': (
+        lambda: Peripheral.objects.select_related('type'),
+        ('serial_number', 'brand', 'model'),
+        ('brand', 'model', 'id'),
+    ),
+}
+
+
+@login_required
+def autocomplete_view(request, source):
+    """
+    Search-select backend: {'results': [{'id', 'text', 'area_id'}], 'more': bool}.
+
+    q matches a prefix of serial, brand or model (indexed columns); area,
+    status and in_stock (peripherals with quantity > 0) narrow the results.
+    ids=1,2 returns those rows, used to label preselected values.
+    """
+    if source not in AUTOCOMPLETE_SOURCES:
+        raise Http404
+    queryset_factory, search_fields, ordering = AUTOCOMPLETE_SOURCES[source]
+    queryset = queryset_factory()
+
+    ids = [pk for pk in request.GET.get('ids', '').split(',') if pk.isdigit()]
+    if ids:
+        queryset = queryset.filter(pk__in=ids)
+    else:
+        query = request.GET.get('q', '').strip()
+        if query:
+            prefix = Q()
+            for field in search_fields:
+                prefix |= Q(**{f'{field}__istartswith': query})
+            queryset = queryset.filter(prefix)
+        area_id = request.GET.get('area', '')
+        if area_id.isdigit():
+            queryset = queryset.filter(area_id=area_id)
+        status = request.GET.get('status', '')
+        if status:
+            queryset = queryset.filter(status=status)
+        if source == 'peripheral' and request.GET.get('in_stock'):
+            queryset = queryset.filter(quantity__gt=0)
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', AUTOCOMPLETE_LIMIT)), AUTOCOMPLETE_MAX_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    rows = list(queryset.order_by(*ordering)[:limit + 1])
+    return JsonResponse({
+        'results': [{'id': obj.pk, 'text': str(obj), 'area_id': obj.area_id} for obj in rows[:limit]],
+        'more': len(rows) > limit,
+    })
@@ -0,0 +1,63 @@
+import logging
+
+from django.shortcuts import get_object_or_404, render, redirect
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, FileResponse
+
+from ..models import BulkOperation
+from ..forms import BulkActionForm
+from ..services import apply_bulk_action
+from ..utils import generate_bulk_operation_pdf
+
+logger = logging.getLogger('inventory')
+
+__all__ = ['bulk_action_view', 'bulk_action_detail_view', 'bulk_action_acta_view']
+
+
+@login_required
+def bulk_action_view(request):
+    """Reassign, change status or retire many equipment/peripherals at once."""
+    if request.method == 'POST':
+        form = BulkActionForm(request.POST, request.FILES)
+        if form.is_valid():
+            data = form.cleaned_data
+            operation = apply_bulk_action(
+                data['action'], data['equipment_list'], data['peripheral_list'],
+                user=request.user, area=data.get('area'), status=data.get('status', ''),
+                reason=data.get('reason', ''), photo=data.get('photo'),
+            )
+            messages.success(
+                request,
+                f'{operation.get_action_display()} aplicada a {len(data["equipment_list"])} equipos '
+                f'y {len(data["peripheral_list"])} periféricos.'
+            )
+            return redirect('inventory:bulk_action_detail', pk=operation.pk)
+    else:
+        form = BulkActionForm(initial={'action': request.GET.get('action', 'REASSIGN')})
+
+    recent = BulkOperation.objects.select_related('area', 'performed_by').order_by('-date')[:10]
+    return render(request, 'inventory/bulk_action_form.html', {'form': form, 'recent_operations': recent})
+
+
+@login_required
+def bulk_action_detail_view(request, pk):
+    operation = get_object_or_404(BulkOperation.objects.select_related('area', 'performed_by'), pk=pk)
+    context = {
+        'operation': operation,
+        'equipment': operation.equipment.select_related('area').order_by('serial_number'),
+        'peripherals': operation.peripherals.select_related('type', 'area').order_by('brand', 'model'),
+    }
+    return render(request, 'inventory/bulk_action_detail.html', context)
+
+
+@login_required
+def bulk_action_acta_view(request, pk):
+    operation = get_object_or_404(BulkOperation, pk=pk)
+    if operation.acta_pdf:
+        return FileResponse(operation.acta_pdf, as_attachment=False, filename=f"acta_masiva_{pk}.pdf")
+
+    # Fallback if the acta was not generated yet
+    response = HttpResponse(generate_bulk_operation_pdf(operation), content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename="acta_masiva_{pk}.pdf"'
+    return response
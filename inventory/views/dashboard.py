@@ -3,12 +3,13 @@ from datetime import timedelta
 
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, F
+from django.db.models import Count
 from django.utils import timezone
 
-from ..models import Equipment, Maintenance, Handover, Peripheral, MaintenanceSchedule
+from ..models import Equipment, Maintenance, Handover, MaintenanceSchedule
 from ..choices import EQUIPMENT_STATUS_CHOICES, EQUIPMENT_TYPE_CHOICES
-from ..services import get_lifespan_expired_queryset
+from ..services import get_lifespan_expired_queryset, expand_maintenance_schedule, get_low_stock_peripherals
+from ..forecasting import get_projected_stockouts
 
 logger = logging.getLogger('inventory')
 
@@ -39,7 +40,11 @@ def dashboard_view(request):
     area_data = list(Equipment.objects.exclude(area__isnull=True).values('area__name').annotate(count=Count('id')).order_by('-count')[:5])
 
     # Low Stock Alerts
-    low_stock_peripherals = Peripheral.objects.filter(quantity__lte=F('min_stock_level'))
+    low_stock_peripherals = list(get_low_stock_peripherals().select_related('forecast'))
+    # SKUs still above their minimum but projected to run out soon (nightly forecast)
+    projected_stockouts = get_projected_stockouts().exclude(
+        peripheral_id__in=[p.pk for p in low_stock_peripherals]
+    )
 
     # Expired Alerts
     today = timezone.now().date()
@@ -51,11 +56,19 @@ def dashboard_view(request):
     # Upcoming Maintenance Alerts (30 days)
     upcoming_limit = today + timezone.timedelta(days=30)
     
-    # 1. From Schedule (Pending)
-    upcoming_schedules = MaintenanceSchedule.objects.filter(
+    # 1. From Schedule: every PENDING row up to the limit, however overdue, plus
+    # the recurrence rule occurrences of the window (including the last 30 days).
+    pending_rows = MaintenanceSchedule.objects.filter(
         status='PENDING',
         scheduled_date__lte=upcoming_limit
-    ).select_related('equipment').order_by('scheduled_date')
+    ).select_related('equipment')
+    rule_occurrences = [
+        entry for entry in expand_maintenance_schedule(today - timedelta(days=30), upcoming_limit, status='PENDING')
+        if entry.is_virtual
+    ]
+    upcoming_schedules = sorted(
+        [*pending_rows, *rule_occurrences], key=lambda s: (s.scheduled_date, s.equipment_id)
+    )
 
     # 2. From Maintenance Records (Next Date)
     upcoming_maintenance_records = Maintenance.objects.filter(
@@ -74,6 +87,7 @@ def dashboard_view(request):
         'type_data': type_data,
         'area_data': area_data,
         'low_stock_peripherals': low_stock_peripherals,
+        'projected_stockouts': projected_stockouts,
         'warranty_expired': warranty_expired,
         'lifespan_expired': lifespan_expired,
         'upcoming_schedules': upcoming_schedules,
@@ -1,61 +1,70 @@
 import logging
-from urllib.parse import urlencode
 
 from django.shortcuts import get_object_or_404, render, redirect
 from django.http import HttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Q
 from django.core.paginator import Paginator
-from django.urls import reverse
-from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 
-import qrcode
 import openpyxl
 
 from ..models import Equipment, Maintenance, Handover, Area, ComponentLog, EquipmentRound
-from ..forms import EquipmentForm, ExcelImportForm, ComponentLogForm, RetirementForm
+from ..forms import EquipmentForm, ExcelImportForm, ComponentLogForm, RetirementForm, RoundSheetFormSet
 from ..choices import EQUIPMENT_STATUS_CHOICES, EQUIPMENT_TYPE_CHOICES, OWNERSHIP_CHOICES
+from ..timeline import get_equipment_timeline
+from ..qr import QR_CACHE_TIMEOUT, QR_FORMATS, equipment_qr_data, get_qr_image, qr_digest, equipment_label_sheet
+from ..services import reduce_peripheral_stock, filter_equipment, create_round_sheet
 
 logger = logging.getLogger('inventory')
 
 __all__ = [
     'equipment_list_view', 'equipment_create_view', 'equipment_edit_view',
     'equipment_detail_view', 'equipment_retire_view', 'equipment_history_view',
-    'generate_qr_view', 'import_equipment_view',
+    'generate_qr_view', 'equipment_labels_view', 'import_equipment_view',
     'component_log_create_view',
-    'equipment_round_list_view', 'equipment_round_create_view',
+    'equipment_round_list_view', 'equipment_round_create_view', 'equipment_round_sheet_view',
 ]
 
 
 @login_required
-def generate_qr_view(request, pk):
-    equipment = get_object_or_404(Equipment, pk=pk)
-    
-    url = request.build_absolute_uri(reverse('inventory:equipment_detail', args=[pk]))
-    
-    params = {
-        'serial': equipment.serial_number,
-        'model': f"{equipment.brand} {equipment.model}",
-        'type': equipment.get_type_display(),
-        'area': equipment.area.name if equipment.area else 'N/A',
-        'status': equipment.get_status_display()
-    }
-    
-    full_url = f"{url}?{urlencode(params)}"
-
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(full_url)
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
-    response = HttpResponse(content_type="image/png")
-    img.save(response, "PNG")
+def generate_qr_view(request, pk, fmt='png'):
+    """
+    QR label of an equipment as PNG or SVG, served from the QR cache.
+    Links carrying the current ?v= digest are immutable; others revalidate
+    with the ETag, since the code changes when area or status change.
+    """
+    equipment = get_object_or_404(Equipment.objects.select_related('area'), pk=pk)
+    data = equipment_qr_data(equipment, f"{request.scheme}://{request.get_host()}")
+    digest = qr_digest(data)
+    etag = quote_etag(f'{digest}-{fmt}')
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(get_qr_image(data, fmt), content_type=QR_FORMATS[fmt])
+    response['ETag'] = etag
+    if request.GET.get('v') == digest:
+        patch_cache_control(response, private=True, max_age=QR_CACHE_TIMEOUT, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+def equipment_labels_view(request):
+    """
+    PDF sheet of QR labels for the equipment matching the list filters (or ?ids=1,2,3).
+    Misses are encoded in the request process: a request must not fork one
+    process per CPU inside the app server. Large sheets are warmed or
+    printed with `manage.py print_qr_labels`, which uses the process pool.
+    """
+    equipment = filter_equipment(request.GET, Equipment.objects.select_related('area')).order_by('area__name', 'serial_number')
+    pdf = equipment_label_sheet(equipment, f"{request.scheme}://{request.get_host()}", workers=1)
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = 'inline; filename="etiquetas_qr.pdf"'
     return response
 
 
@@ -115,25 +124,8 @@ def equipment_list_view(request):
     eq_type = request.GET.get('type', '')
     ownership = request.GET.get('ownership', '')
     
-    equipments_list = Equipment.objects.all().order_by('-created_at')
-    
-    if query:
-        equipments_list = equipments_list.filter(
-            Q(serial_number__icontains=query) | 
-            Q(brand__icontains=query) | 
-            Q(model__icontains=query) |
-            Q(ip_address__icontains=query)
-        )
-    
-    if area_id:
-        equipments_list = equipments_list.filter(area_id=area_id)
-    if status:
-        equipments_list = equipments_list.filter(status=status)
-    if eq_type:
-        equipments_list = equipments_list.filter(type=eq_type)
-    if ownership:
-        equipments_list = equipments_list.filter(ownership_type=ownership)
-    
+    equipments_list = filter_equipment(request.GET).order_by('-created_at')
+
     paginator = Paginator(equipments_list, 20)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -192,6 +184,7 @@ def equipment_detail_view(request, pk):
         'equipment': equipment,
         'maintenances': maintenances,
         'handovers': handovers,
+        'qr_version': qr_digest(equipment_qr_data(equipment, f"{request.scheme}://{request.get_host()}")),
     }
     return render(request, 'inventory/equipment_detail.html', context)
 
@@ -270,11 +263,54 @@ def equipment_round_create_view(request):
             round_obj.save()
             return redirect('inventory:equipment_round_list')
     else:
-        form = EquipmentRoundForm()
+        # ?equipment=<id> preselects the equipment (links from scan cards).
+        form = EquipmentRoundForm(initial={'equipment': request.GET.get('equipment')})
     
     return render(request, 'inventory/equipment_round_form.html', {'form': form, 'title': 'Nueva Ronda de Equipos'})
 
 
+@login_required
+def equipment_round_sheet_view(request):
+    """Round of every equipment of an area in one page and one submission."""
+    area_id = request.POST.get('area') or request.GET.get('area', '')
+    area = get_object_or_404(Area, pk=area_id) if area_id.isdigit() else None
+    equipment = {}
+    if area:
+        equipment = {
+            e.pk: e for e in Equipment.objects.filter(area=area).exclude(status='RETIRED').order_by('serial_number')
+        }
+
+    if request.method == 'POST' and area:
+        formset = RoundSheetFormSet(request.POST, prefix='rounds')
+        if formset.is_valid():
+            rounds = []
+            for form in formset:
+                if form.cleaned_data['equipment_id'] not in equipment:
+                    continue  # moved out of the area while the sheet was open
+                round_obj = form.save(commit=False)
+                round_obj.equipment_id = form.cleaned_data['equipment_id']
+                rounds.append(round_obj)
+            create_round_sheet(rounds, user=request.user)
+            messages.success(request, f'Ronda de {area.name} registrada: {len(rounds)} equipos revisados.')
+            return redirect('inventory:equipment_round_list')
+    else:
+        formset = RoundSheetFormSet(prefix='rounds', initial=[{'equipment_id': pk} for pk in equipment])
+
+    rows = []
+    for form in formset:
+        equipment_id = str(form['equipment_id'].value())
+        rows.append((form, equipment.get(int(equipment_id)) if equipment_id.isdigit() else None))
+    context = {
+        'areas': Area.objects.all(),
+        'area': area,
+        'formset': formset,
+        'rows': rows,
+        'check_labels': [EquipmentRound._meta.get_field(name).verbose_name for name in EquipmentRound.CHECK_FIELDS],
+        'title': f'Ronda por Área: {area.name}' if area else 'Ronda por Área',
+    }
+    return render(request, 'inventory/equipment_round_sheet.html', context)
+
+
 @login_required
 def component_log_create_view(request, pk):
     equipment = get_object_or_404(Equipment, pk=pk)
@@ -286,24 +322,26 @@ def component_log_create_view(request, pk):
             log.equipment = equipment
             log.performed_by = request.user
             
-            # Stock reduction logic
-            if log.peripheral and log.action_type in ['ADDED', 'REPLACED']:
-                if log.peripheral.quantity >= log.quantity:
-                    log.peripheral.quantity -= log.quantity
-                    log.peripheral.save()
-                    
-                    if not log.component_name:
-                        log.component_name = str(log.peripheral)
-                else:
-                    messages.error(request, f"No hay suficiente stock para el periférico seleccionado. Stock actual: {log.peripheral.quantity}")
-                    return render(request, 'inventory/component_log_form.html', {'form': form, 'equipment': equipment})
-            
             # Require component_name if no peripheral
             if not log.peripheral and not log.component_name:
                 messages.error(request, "Debe ingresar una Descripción de Pieza manual si no selecciona una del inventario.")
                 return render(request, 'inventory/component_log_form.html', {'form': form, 'equipment': equipment})
 
-            log.save()
+            with transaction.atomic():
+                deduct_stock = log.peripheral and log.action_type in ['ADDED', 'REPLACED']
+                if deduct_stock and not log.component_name:
+                    log.component_name = str(log.peripheral)
+                log.save()
+
+                # Stock reduction logic (ledger movement + atomic conditional UPDATE)
+                if deduct_stock:
+                    success, remaining = reduce_peripheral_stock(
+                        log.peripheral, log.quantity, user=request.user, component_log=log
+                    )
+                    if not success:
+                        transaction.set_rollback(True)
+                        messages.error(request, f"No hay suficiente stock para el periférico seleccionado. Stock actual: {remaining}")
+                        return render(request, 'inventory/component_log_form.html', {'form': form, 'equipment': equipment})
             messages.success(request, f"¡Cambio de componente '{log.component_name}' registrado exitosamente!")
             return redirect('inventory:equipment_history', pk=equipment.pk)
     else:
@@ -318,97 +356,15 @@ def component_log_create_view(request, pk):
 
 @login_required
 def equipment_history_view(request, pk):
-    equipment = get_object_or_404(Equipment, pk=pk)
-    
-    events = []
-    
-    # 1. Registration
-    events.append({
-        'type': 'entry',
-        'date': equipment.created_at,
-        'title': 'Registro Inicial',
-        'description': f'Equipo dado de alta en el sistema.',
-        'icon': 'fa-plus-circle',
-        'color': 'primary'
-    })
-    
-    # 2. Maintenances
-    for m in equipment.maintenances.all():
-        sort_dt = timezone.datetime.combine(m.date, timezone.datetime.min.time())
-        if timezone.is_aware(equipment.created_at):
-            sort_dt = timezone.make_aware(sort_dt, timezone.get_current_timezone())
-            
-        events.append({
-            'type': 'maintenance',
-            'date': sort_dt,
-            'title': f'Mantenimiento {m.get_maintenance_type_display()}',
-            'description': m.description,
-            'user': m.performed_by.username if m.performed_by else 'N/A',
-            'icon': 'fa-tools',
-            'color': 'info'
-        })
-        
-    # 3. Handovers
-    for h in equipment.handovers.all():
-        dest = h.destination_area.name if h.destination_area else 'N/A'
-        client = h.client.name if h.client else (h.receiver_name or 'N/A')
-        events.append({
-            'type': 'handover',
-            'date': h.date,
-            'title': f'Acta: {h.get_type_display()} a {dest}',
-            'description': f'Asignado a: {client}',
-            'user': h.technician.username if h.technician else 'N/A',
-            'icon': 'fa-exchange-alt',
-            'color': 'warning'
-        })
-        
-    # 4. Rounds
-    for r in equipment.rounds.all():
-        events.append({
-            'type': 'round',
-            'date': r.datetime,
-            'title': f"Ronda: {r.get_general_status_display()}",
-            'description': r.observations if r.observations else "Revisión técnica de rutina.",
-            'user': r.performed_by.username if r.performed_by else 'N/A',
-            'icon': 'fa-clipboard-check',
-            'color': 'success' if r.general_status == 'GOOD' else ('warning' if r.general_status == 'REGULAR' else 'danger')
-        })
-        
-    # 5. Component Logs
-    for c in equipment.component_logs.all():
-        events.append({
-            'type': 'component',
-            'date': c.date,
-            'title': f"{c.get_action_type_display()}: {c.component_name}",
-            'description': c.description,
-            'user': c.performed_by.username if c.performed_by else 'N/A',
-            'icon': 'fa-microchip',
-            'color': 'secondary'
-        })
-        
-    # 6. Retirement Logs
-    for r in equipment.retirement_logs.all():
-        sort_dt = timezone.datetime.combine(r.date, timezone.datetime.min.time()) if hasattr(r.date, 'hour') is False else r.date
-        if timezone.is_aware(equipment.created_at) and not timezone.is_aware(sort_dt):
-            sort_dt = timezone.make_aware(sort_dt, timezone.get_current_timezone())
-            
-        events.append({
-            'type': 'retirement',
-            'date': sort_dt,
-            'title': 'Equipo Dado de Baja',
-            'description': r.reason,
-            'user': r.performed_by.username if r.performed_by else 'N/A',
-            'icon': 'fa-ban',
-            'color': 'danger',
-            'photo_url': r.photo.url if r.photo else None,
-            'photo_path': r.photo.path if r.photo else None
-        })
-        
-    # Sort descending
-    events.sort(key=lambda x: x['date'], reverse=True)
-    
+    equipment = get_object_or_404(Equipment.objects.select_related('area'), pk=pk)
+
+    # Timeline rows are kept in EquipmentEvent by signals; one indexed query per page.
+    paginator = Paginator(get_equipment_timeline(equipment), 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
     context = {
         'equipment': equipment,
-        'events': events,
+        'events': page_obj,
+        'page_obj': page_obj,
     }
     return render(request, 'inventory/equipment_history.html', context)
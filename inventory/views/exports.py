@@ -13,6 +13,8 @@ from django.utils import timezone
 from fpdf import FPDF
 
 from ..utils import export_to_excel
+from ..timeline import get_equipment_timeline
+from ..services import filter_equipment
 from ..models import Equipment, Maintenance, Handover
 
 logger = logging.getLogger('inventory')
@@ -69,28 +71,8 @@ def export_data_view(request, model_name):
 
     # Apply filters based on model name
     if model_name == 'equipment':
-        query = request.GET.get('q', '')
-        area_id = request.GET.get('area', '')
-        status = request.GET.get('status', '')
-        eq_type = request.GET.get('type', '')
-        ownership = request.GET.get('ownership', '')
+        queryset = filter_equipment(request.GET, queryset)
 
-        if query:
-            queryset = queryset.filter(
-                Q(serial_number__icontains=query) | 
-                Q(brand__icontains=query) | 
-                Q(model__icontains=query) |
-                Q(ip_address__icontains=query)
-            )
-        if area_id:
-            queryset = queryset.filter(area_id=area_id)
-        if status:
-            queryset = queryset.filter(status=status)
-        if eq_type:
-            queryset = queryset.filter(type=eq_type)
-        if ownership:
-            queryset = queryset.filter(ownership_type=ownership)
-            
     elif model_name == 'maintenance':
         date_start = request.GET.get('date_start', '')
         date_end = request.GET.get('date_end', '')
@@ -138,59 +120,8 @@ def export_equipment_history_pdf(request, pk):
     """Generate a PDF with equipment specs + full history (Hoja de Vida)."""
     equipment = get_object_or_404(Equipment, pk=pk)
 
-    # --- Collect events (same logic as equipment_history_view) ---
-    events = []
-    events.append({
-        'type': 'Registro Inicial',
-        'date': equipment.created_at,
-        'description': 'Equipo dado de alta en el sistema.',
-        'user': '-',
-    })
-    for m in equipment.maintenances.all().order_by('-date'):
-        sort_dt = timezone.datetime.combine(m.date, timezone.datetime.min.time())
-        if timezone.is_aware(equipment.created_at):
-            sort_dt = timezone.make_aware(sort_dt, timezone.get_current_timezone())
-        events.append({
-            'type': f'Mant. {m.get_maintenance_type_display()}',
-            'date': sort_dt,
-            'description': m.description or '-',
-            'user': m.performed_by.username if m.performed_by else 'N/A',
-        })
-    for h in equipment.handovers.all().order_by('-date'):
-        dest = h.destination_area.name if h.destination_area else 'N/A'
-        client = h.client.name if h.client else (h.receiver_name or 'N/A')
-        events.append({
-            'type': f'Acta: {h.get_type_display()}',
-            'date': h.date,
-            'description': f'{dest} — Asignado a: {client}',
-            'user': h.technician.username if h.technician else 'N/A',
-        })
-    for r in equipment.rounds.all().order_by('-datetime'):
-        events.append({
-            'type': f'Ronda: {r.get_general_status_display()}',
-            'date': r.datetime,
-            'description': r.observations or 'Revisión técnica de rutina.',
-            'user': r.performed_by.username if r.performed_by else 'N/A',
-        })
-    for c in equipment.component_logs.all().order_by('-date'):
-        events.append({
-            'type': f'{c.get_action_type_display()}: {c.component_name}',
-            'date': c.date,
-            'description': c.description or '-',
-            'user': c.performed_by.username if c.performed_by else 'N/A',
-        })
-    for r in equipment.retirement_logs.all().order_by('-date'):
-        sort_dt = timezone.datetime.combine(r.date, timezone.datetime.min.time()) if hasattr(r.date, 'hour') is False else r.date
-        if timezone.is_aware(equipment.created_at) and not timezone.is_aware(sort_dt):
-            sort_dt = timezone.make_aware(sort_dt, timezone.get_current_timezone())
-        events.append({
-            'type': 'Baja de Equipo',
-            'date': sort_dt,
-            'description': r.reason or '-',
-            'user': r.performed_by.username if r.performed_by else 'N/A',
-            'photo_path': r.photo.path if r.photo else None
-        })
-    events.sort(key=lambda x: x['date'], reverse=True)
+    # --- Collect events (same EquipmentEvent query as equipment_history_view) ---
+    events = get_equipment_timeline(equipment)
 
     # --- Build PDF ---
     class PDF(FPDF):
@@ -259,6 +190,13 @@ def export_equipment_history_pdf(request, pk):
         spec_row('Proveedor:', equipment.provider_name or '-')
     pdf.ln(5)
 
+    # Clean text to avoid latin-1 encoding errors (core fonts only cover cp1252)
+    def clean_text(text):
+        try:
+            return str(text).encode('cp1252', 'replace').decode('latin-1')
+        except Exception:
+            return str(text)
+
     # --- History Table ---
     pdf.set_font('Arial', 'B', 12)
     pdf.cell(0, 10, '2. Historial Cronológico', 0, 1, 'L', fill=True)
@@ -273,25 +211,33 @@ def export_equipment_history_pdf(request, pk):
     pdf.ln()
 
     pdf.set_font('Arial', '', 7)
-    for ev in events:
-        date_str = ev['date'].strftime('%d/%m/%Y %H:%M') if hasattr(ev['date'], 'strftime') else str(ev['date'])[:16]
-        desc = (ev['description'] or '-').replace('\n', ' ')
+    events_with_photos = []
+    row_count = 0
+    for ev in events.iterator(chunk_size=500):
+        row_count += 1
+        date_str = timezone.localtime(ev.date).strftime('%d/%m/%Y %H:%M')
+        desc = (ev.description or '-').replace('\n', ' ')
+        if ev.destination:
+            desc = f'{ev.destination} — {desc}'
         if len(desc) > 55:
             desc = desc[:55] + '...'
-        ev_type = ev['type'][:22] if len(ev['type']) > 22 else ev['type']
+        # Events stored before the label existed fall back to the web title.
+        label = ev.label or ev.title
+        ev_type = label[:22] if len(label) > 22 else label
 
         pdf.cell(28, 7, date_str[:16], 1)
-        pdf.cell(40, 7, ev_type, 1)
-        pdf.cell(82, 7, desc, 1)
-        pdf.cell(30, 7, str(ev['user'] or '-')[:16], 1)
+        pdf.cell(40, 7, clean_text(ev_type), 1)
+        pdf.cell(82, 7, clean_text(desc), 1)
+        pdf.cell(30, 7, clean_text(str(ev.user or '-')[:16]), 1)
         pdf.ln()
+        if ev.photo:
+            events_with_photos.append(ev)
 
-    if not events:
+    if not row_count:
         pdf.set_font('Arial', 'I', 9)
         pdf.cell(0, 10, 'Sin historial registrado.', 0, 1, 'C')
 
     # --- Annex Fotos ---
-    events_with_photos = [e for e in events if e.get('photo_path')]
     if events_with_photos:
         pdf.add_page()
         pdf.set_fill_color(240, 240, 240)
@@ -302,21 +248,14 @@ def export_equipment_history_pdf(request, pk):
         for e in events_with_photos:
             try:
                 import os
-                if os.path.exists(e['photo_path']):
-                    date_str = e['date'].strftime('%Y-%m-%d %H:%M') if hasattr(e['date'], 'strftime') else str(e['date'])[:16]
+                if os.path.exists(e.photo_path):
+                    date_str = timezone.localtime(e.date).strftime('%Y-%m-%d %H:%M')
                     pdf.set_font("Arial", 'B', 9)
-                    # Clean text to avoid latin-1 encoding errors with accents
-                    def clean_text_annex(text):
-                        try:
-                            return str(text).encode('cp1252', 'replace').decode('latin-1')
-                        except Exception:
-                            return str(text)
-                    
-                    pdf.cell(0, 8, clean_text_annex(f"Evidencia: {e['type']} - Fecha: {date_str}"), ln=1)
+                    pdf.cell(0, 8, clean_text(f"Evidencia: {e.title} - Fecha: {date_str}"), ln=1)
                     
                     x_pos = pdf.get_x()
                     y_pos = pdf.get_y()
-                    pdf.image(e['photo_path'], x=x_pos, y=y_pos, w=100) # w=100mm
+                    pdf.image(e.photo_path, x=x_pos, y=y_pos, w=100) # w=100mm
                     pdf.ln(80) 
             except Exception as ex:
                 pdf.cell(0, 8, f"[ Error al cargar imagen de evidencia: {ex} ]", ln=1)
@@ -1,25 +1,28 @@
-import json
 import logging
 from types import SimpleNamespace
 
 from django.shortcuts import get_object_or_404, render, redirect
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from django.core.paginator import Paginator
 from django.forms import inlineformset_factory
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django import forms
 
-from ..models import Equipment, Handover, HandoverPeripheral, Peripheral, Area
+from ..models import Handover, HandoverPeripheral, Area
+from ..area_maps import get_area_maps, get_area_maps_version
 from ..forms import HandoverForm
+from ..widgets import RemoteSelect
 from ..utils import generate_handover_pdf
-from ..services import reduce_peripheral_stock_floor
+from ..services import create_handover
 
 logger = logging.getLogger('inventory')
 
 __all__ = [
-    'handover_create_view', 'handover_success_view', 'handover_list_view',
+    'handover_create_view', 'handover_area_maps_view', 'handover_success_view', 'handover_list_view',
 ]
 
 
@@ -31,7 +34,7 @@ def handover_create_view(request):
         extra=1,
         can_delete=True,
         widgets={
-            'peripheral': forms.Select(attrs={'class': 'form-select'}),
+            'peripheral': RemoteSelect('peripheral', attrs={'class': 'form-select'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'min': 1, 'style': 'width: 80px;'}),
         }
     )
@@ -67,33 +70,46 @@ def handover_create_view(request):
             else:
                 handover = form.save(commit=False)
                 handover.technician = request.user
-                handover.save()
-                form.save_m2m() 
-                
-                instances = formset.save(commit=False)
-                for instance in instances:
-                    instance.handover = handover
-                    reduce_peripheral_stock_floor(instance.peripheral, instance.quantity)
-                    instance.save()
+                peripheral_rows = [
+                    (f.cleaned_data.get('peripheral'), f.cleaned_data.get('quantity'))
+                    for f in formset
+                    if f.cleaned_data and not f.cleaned_data.get('DELETE', False)
+                ]
+                create_handover(handover, form.cleaned_data.get('equipment') or [], peripheral_rows, user=request.user)
                 
                 return redirect('inventory:handover_success', pk=handover.pk)
     else:
         form = HandoverForm()
         formset = HandoverPeripheralFormSet()
     
-    equipment_area_map = {e.id: e.area_id for e in Equipment.objects.all() if e.area_id}
-    peripheral_area_map = {p.id: p.area_id for p in Peripheral.objects.all() if p.area_id}
-    
+    # The equipment/peripheral -> area maps are loaded by the page from handover_area_maps_view.
     context = {
         'form': form, 
         'formset': formset, 
         'title': 'Nueva Entrega / Acta',
-        'equipment_area_map': json.dumps(equipment_area_map),
-        'peripheral_area_map': json.dumps(peripheral_area_map)
     }
     return render(request, 'inventory/handover_form.html', context)
 
 
+def _area_maps_etag(request):
+    return f'area-maps-{get_area_maps_version()}'
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_area_maps_etag)
+def handover_area_maps_view(request):
+    """
+    JSON {'equipment': {id: area_id}, 'peripheral': {id: area_id}} for the
+    handover form. Revalidated by ETag (the cache version), so browsers only
+    download it again after an item changed area.
+    """
+    version, maps = get_area_maps()
+    response = JsonResponse(maps)
+    response['ETag'] = f'"area-maps-{version}"'
+    return response
+
+
 @login_required
 def handover_success_view(request, pk):
     return render(request, 'inventory/handover_success.html', {'pk': pk})
@@ -1,3 +1,4 @@
+import datetime
 import json
 import logging
 
@@ -7,17 +8,19 @@ from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.utils import timezone
 
-from ..models import Equipment, Maintenance, MaintenanceSchedule, Area
-from ..forms import MaintenanceForm
+from ..models import Equipment, Maintenance, Area
+from ..forms import MaintenanceForm, MaintenanceRecurrenceForm
 from ..choices import MAINTENANCE_TYPE_CHOICES
-from ..services import sync_maintenance_to_schedule
+from ..services import (
+    sync_maintenance_to_schedule, expand_maintenance_schedule, toggle_schedule_entry,
+)
 
 logger = logging.getLogger('inventory')
 
 __all__ = [
     'maintenance_create_view', 'maintenance_success_view',
     'maintenance_list_view', 'maintenance_schedule_view',
-    'toggle_schedule_view',
+    'toggle_schedule_view', 'maintenance_recurrence_create_view',
 ]
 
 
@@ -91,7 +94,10 @@ def maintenance_schedule_view(request):
     if area_id:
         equipments = equipments.filter(area_id=area_id)
 
-    schedules = MaintenanceSchedule.objects.filter(scheduled_date__year=year)
+    schedules = expand_maintenance_schedule(
+        datetime.date(year, 1, 1), datetime.date(year, 12, 31),
+        area_id=area_id if area_id and area_id.isdigit() else None,
+    )
     
     schedule_map = {}
     for s in schedules:
@@ -106,7 +112,8 @@ def maintenance_schedule_view(request):
         schedule_map[(s.equipment_id, month, v_week)] = {
             'status': s.status,
             'day': day,
-            'date': s.scheduled_date.strftime('%Y-%m-%d')
+            'date': s.scheduled_date.strftime('%Y-%m-%d'),
+            'recurring': s.is_virtual,
         }
     
     for eq in equipments:
@@ -147,19 +154,24 @@ def toggle_schedule_view(request):
             if not date_str:
                  return JsonResponse({'error': 'Date required'}, status=400)
 
-            schedule = MaintenanceSchedule.objects.filter(
-                equipment_id=equipment_id, scheduled_date=date_str
-            ).first()
-            
-            if schedule:
-                schedule.delete()
-                return JsonResponse({'status': 'removed'})
-            else:
-                MaintenanceSchedule.objects.create(
-                    equipment_id=equipment_id, scheduled_date=date_str, status='PENDING'
-                )
+            result = toggle_schedule_entry(int(equipment_id), datetime.date.fromisoformat(date_str))
+            if result == 'added':
                 return JsonResponse({'status': 'added', 'state': 'PENDING'})
+            return JsonResponse({'status': 'removed'})
                 
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     return JsonResponse({'error': 'Invalid method'}, status=405)
+
+
+@login_required
+def maintenance_recurrence_create_view(request):
+    if request.method == 'POST':
+        form = MaintenanceRecurrenceForm(request.POST)
+        if form.is_valid():
+            form.save()
+            return redirect('inventory:maintenance_schedule')
+    else:
+        form = MaintenanceRecurrenceForm()
+
+    return render(request, 'inventory/maintenance_recurrence_form.html', {'form': form, 'title': 'Nueva Regla de Mantenimiento Recurrente'})
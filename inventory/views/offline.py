@@ -0,0 +1,78 @@
+import logging
+
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+from django.templatetags.static import static
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
+
+from ..choices import COMPONENT_ACTION_CHOICES, MAINTENANCE_TYPE_CHOICES
+from ..models import Equipment, EquipmentRound, Maintenance, Peripheral
+
+logger = logging.getLogger('inventory')
+
+__all__ = ['offline_capture_view', 'offline_service_worker_view']
+
+# Bump when the cached shell changes in a way old copies must not survive.
+OFFLINE_SHELL_VERSION = 1
+
+
+@login_required
+def offline_capture_view(request):
+    """
+    Capture rounds, component changes and maintenance without connection.
+
+    The page carries the equipment and peripheral lists it needs, is cached
+    by the service worker and keeps captured records in a local queue that
+    is sent to the batched sync API (api/sync/) when there is connection.
+    """
+    equipment = list(
+        Equipment.objects.exclude(status='RETIRED')
+        .order_by('area__name', 'serial_number')
+        .values('id', 'serial_number', 'brand', 'model', 'area__name')
+    )
+    peripherals = [
+        {'id': p.pk, 'text': f"{p} (stock: {p.quantity})"}
+        for p in Peripheral.objects.filter(quantity__gt=0).select_related('type').order_by('brand', 'model')
+    ]
+    check_fields = [
+        {'name': name, 'label': EquipmentRound._meta.get_field(name).verbose_name,
+         'default': EquipmentRound._meta.get_field(name).default}
+        for name in EquipmentRound.CHECK_FIELDS
+    ]
+    maintenance_tasks = [
+        {'name': name, 'label': Maintenance._meta.get_field(name).verbose_name}
+        for name in Maintenance.TASK_FIELDS
+    ]
+    context = {
+        'equipment': equipment,
+        'peripherals': peripherals,
+        'check_fields': check_fields,
+        'check_choices': EquipmentRound.CHECK_CHOICES,
+        'round_status_choices': EquipmentRound.STATUS_CHOICES,
+        'component_action_choices': COMPONENT_ACTION_CHOICES,
+        'maintenance_type_choices': MAINTENANCE_TYPE_CHOICES,
+        'maintenance_tasks': maintenance_tasks,
+        'sync_url': reverse('api_offline_sync'),
+    }
+    return render(request, 'inventory/offline_capture.html', context)
+
+
+@never_cache
+def offline_service_worker_view(request):
+    """
+    Service worker of the offline page. Served from offline/ so its scope
+    covers the page; it never needs a login (the browser fetches it on its own).
+    """
+    context = {
+        'version': OFFLINE_SHELL_VERSION,
+        'shell': [
+            reverse('inventory:offline_capture'),
+            static('css/main.css'),
+            static('js/main.js'),
+            static('js/remote_select.js'),
+            static('js/offline_capture.js'),
+            static('img/hfps.jpg'),
+        ],
+    }
+    return render(request, 'inventory/offline_sw.js', context, content_type='application/javascript')
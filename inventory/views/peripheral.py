@@ -2,11 +2,13 @@ import logging
 
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Q
 from django.core.paginator import Paginator
 
 from ..models import Peripheral, Handover
 from ..forms import PeripheralForm, PeripheralTypeForm, RetirementForm
+from ..services import retire_peripheral_stock
 
 logger = logging.getLogger('inventory')
 
@@ -41,10 +43,14 @@ def peripheral_list_view(request):
 def peripheral_detail_view(request, pk):
     peripheral = get_object_or_404(Peripheral, pk=pk)
     handovers = Handover.objects.filter(peripherals=peripheral).order_by('-date')
-    
+    stock_balances = peripheral.stock_balances.select_related('area').filter(quantity__gt=0).order_by('area__name')
+    stock_movements = peripheral.stock_movements.select_related('area', 'performed_by', 'handover')[:20]
+
     context = {
         'peripheral': peripheral,
         'handovers': handovers,
+        'stock_balances': stock_balances,
+        'stock_movements': stock_movements,
     }
     return render(request, 'inventory/peripheral_detail.html', context)
 
@@ -100,14 +106,16 @@ def retire_peripheral_view(request, pk):
     if request.method == 'POST':
         form = RetirementForm(request.POST, request.FILES)
         if form.is_valid():
-            retirement_log = form.save(commit=False)
-            retirement_log.peripheral = peripheral
-            retirement_log.performed_by = request.user
-            retirement_log.save()
-            
-            peripheral.status = 'RETIRED'
-            peripheral.quantity = 0  # Logic to retire: set quantity to 0
-            peripheral.save()
+            with transaction.atomic():
+                retirement_log = form.save(commit=False)
+                retirement_log.peripheral = peripheral
+                retirement_log.performed_by = request.user
+                retirement_log.save()
+
+                # Remaining stock is written off in the ledger (quantity ends at 0)
+                retire_peripheral_stock(peripheral, user=request.user, note=f'Acta de baja #{retirement_log.pk}')
+                peripheral.status = 'RETIRED'
+                peripheral.save(update_fields=['status'])
             
             messages.success(request, f'El periférico {peripheral.brand} {peripheral.model} ha sido dado de baja.')
             return redirect('inventory:peripheral_detail', pk=pk)
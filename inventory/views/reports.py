@@ -7,14 +7,19 @@ from datetime import timedelta
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q, F
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from fpdf import FPDF
 
-from ..models import Equipment, Maintenance, Handover, Peripheral, EquipmentRound, ComponentLog
-from ..choices import MAINTENANCE_TYPE_CHOICES
-from ..services import get_lifespan_expired_queryset
+from ..models import Equipment, Maintenance, Handover, EquipmentRound, ComponentLog, Area
+from ..choices import MAINTENANCE_TYPE_CHOICES, EQUIPMENT_STATUS_CHOICES
+from ..services import get_lifespan_expired_queryset, get_low_stock_peripherals
+from ..round_analytics import DEFAULT_MIN_STREAK, get_round_failure_analytics
+from ..maintenance_analytics import get_maintenance_task_analytics, summarize_task_analytics
+from ..snapshots import inventory_snapshot
 from ..charts import (
     generate_equipment_by_type_chart, 
     generate_maintenance_by_type_chart, 
@@ -26,31 +31,28 @@ from ..charts import (
 
 logger = logging.getLogger('inventory')
 
-__all__ = ['reports_dashboard_view', 'export_report_pdf']
+__all__ = ['reports_dashboard_view', 'export_report_pdf', 'inventory_snapshot_view', 'round_analytics_view']
+
+
+def _report_period(request):
+    """(start_date, end_date) of ?start_date/?end_date; defaults to the current year up to today."""
+    today = timezone.now().date()
+    try:
+        start_date = datetime.datetime.strptime(request.GET.get('start_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        start_date = today.replace(month=1, day=1)
+    try:
+        end_date = datetime.datetime.strptime(request.GET.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        end_date = today
+    return start_date, end_date
 
 
 @login_required
 def reports_dashboard_view(request):
     # 1. Date Filtering
     today = timezone.now().date()
-    start_str = request.GET.get('start_date', '')
-    end_str = request.GET.get('end_date', '')
-    
-    if not start_str:
-        start_date = today.replace(month=1, day=1)
-    else:
-        try:
-            start_date = datetime.datetime.strptime(start_str, '%Y-%m-%d').date()
-        except ValueError:
-            start_date = today.replace(month=1, day=1)
-            
-    if not end_str:
-        end_date = today
-    else:
-        try:
-            end_date = datetime.datetime.strptime(end_str, '%Y-%m-%d').date()
-        except ValueError:
-            end_date = today
+    start_date, end_date = _report_period(request)
 
     # 2. Main QuerySets
     maintenances = Maintenance.objects.filter(date__range=[start_date, end_date])
@@ -77,7 +79,7 @@ def reports_dashboard_view(request):
     # 5. Actionable Lists
     limit_date = today + datetime.timedelta(days=90)
     warranty_expiring = equipments.filter(warranty_expiry__range=[today, limit_date]).order_by('warranty_expiry')
-    low_stock_peripherals = Peripheral.objects.filter(quantity__lte=F('min_stock_level'))
+    low_stock_peripherals = get_low_stock_peripherals()
     warranty_expired = equipments.filter(warranty_expiry__lt=today).exclude(status='RETIRED').order_by('warranty_expiry')
     
     # Calculate lifespan expired using service (cross-database compatible)
@@ -102,6 +104,7 @@ def reports_dashboard_view(request):
         'handover_by_area': handover_by_area,
         'round_count': round_count,
         'round_by_status': round_by_status,
+        'task_summary': summarize_task_analytics(get_maintenance_task_analytics(start_date, end_date)),
     }
     return render(request, 'inventory/reports_dashboard.html', context)
 
@@ -110,24 +113,7 @@ def reports_dashboard_view(request):
 def export_report_pdf(request):
     # 1. Date Filtering (Same logic as dashboard)
     today = timezone.now().date()
-    start_str = request.GET.get('start_date', '')
-    end_str = request.GET.get('end_date', '')
-    
-    if not start_str:
-        start_date = today.replace(month=1, day=1)
-    else:
-        try:
-            start_date = datetime.datetime.strptime(start_str, '%Y-%m-%d').date()
-        except ValueError:
-            start_date = today.replace(month=1, day=1)
-            
-    if not end_str:
-        end_date = today
-    else:
-        try:
-            end_date = datetime.datetime.strptime(end_str, '%Y-%m-%d').date()
-        except ValueError:
-            end_date = today
+    start_date, end_date = _report_period(request)
 
     # 2. Fetch Data
     maintenances = Maintenance.objects.filter(date__range=[start_date, end_date])
@@ -144,7 +130,7 @@ def export_report_pdf(request):
     
     limit_date = today + datetime.timedelta(days=90)
     warranty_expiring = equipments.filter(warranty_expiry__range=[today, limit_date]).order_by('warranty_expiry')
-    low_stock_peripherals = Peripheral.objects.filter(quantity__lte=F('min_stock_level'))
+    low_stock_peripherals = get_low_stock_peripherals()
     warranty_expired = equipments.filter(warranty_expiry__lt=today).exclude(status='RETIRED').order_by('warranty_expiry')
     
     lifespan_expired = get_lifespan_expired_queryset(equipments)
@@ -283,11 +269,11 @@ def export_report_pdf(request):
             p_name = f"{p.type.name} - {p.brand} {p.model}"
             pdf.cell(90, 8, p_name[:50], 1)
             
-            if p.quantity == 0:
+            if p.stock == 0:
                 pdf.set_text_color(220, 50, 50)
                 pdf.set_font('Arial', 'B', 9)
             
-            pdf.cell(25, 8, str(p.quantity), 1)
+            pdf.cell(25, 8, str(p.stock), 1)
             
             pdf.set_text_color(0, 0, 0)
             pdf.set_font('Arial', '', 9)
@@ -373,6 +359,66 @@ def export_report_pdf(request):
         pdf.ln()
     pdf.ln(5)
 
+    # --- Maintenance Task Frequency ---
+    if maintenance_count > 0:
+        task_summary = summarize_task_analytics(get_maintenance_task_analytics(start_date, end_date))
+        if pdf.get_y() > 180:
+            pdf.add_page()
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, '3.1 Frecuencia de Tareas de Mantenimiento', 0, 1, 'L', fill=True)
+        pdf.ln(2)
+
+        pdf.set_font('Arial', 'B', 9)
+        pdf.cell(90, 8, 'Tarea', 1)
+        pdf.cell(30, 8, 'Veces', 1, 0, 'C')
+        pdf.cell(40, 8, '% de Mantenimientos', 1, 0, 'C')
+        pdf.ln()
+        pdf.set_font('Arial', '', 9)
+        for task in task_summary['tasks']:
+            pdf.cell(90, 7, task['label'], 1)
+            pdf.cell(30, 7, str(task['count']), 1, 0, 'C')
+            pdf.cell(40, 7, f"{task['rate']:.0%}", 1, 0, 'C')
+            pdf.ln()
+        pdf.ln(5)
+
+        for title, rows in (('Área', task_summary['by_area']), ('Técnico', task_summary['by_technician'])):
+            if pdf.get_y() > 230:
+                pdf.add_page()
+            pdf.set_font('Arial', 'B', 9)
+            pdf.cell(50, 8, title, 1)
+            pdf.cell(20, 8, 'Mant.', 1, 0, 'C')
+            pdf.cell(120, 8, 'Tareas más Frecuentes', 1)
+            pdf.ln()
+            pdf.set_font('Arial', '', 8)
+            for row in rows:
+                top = ', '.join(f"{t['label']} ({t['rate']:.0%})" for t in row['top']) or '-'
+                pdf.cell(50, 7, str(row['key'])[:28], 1)
+                pdf.cell(20, 7, str(row['total']), 1, 0, 'C')
+                pdf.cell(120, 7, top[:85], 1)
+                pdf.ln()
+            pdf.ln(5)
+
+        if task_summary['pairs']:
+            if pdf.get_y() > 220:
+                pdf.add_page()
+            pdf.set_font('Arial', 'B', 9)
+            pdf.cell(0, 8, 'Tareas que se Realizan Juntas', 0, 1, 'L')
+            pdf.cell(65, 8, 'Tarea', 1)
+            pdf.cell(65, 8, 'Se Realiza con', 1)
+            pdf.cell(20, 8, 'Veces', 1, 0, 'C')
+            pdf.cell(20, 8, 'Confianza', 1, 0, 'C')
+            pdf.cell(20, 8, 'Lift', 1, 0, 'C')
+            pdf.ln()
+            pdf.set_font('Arial', '', 8)
+            for pair in task_summary['pairs']:
+                pdf.cell(65, 7, pair['task_label'][:38], 1)
+                pdf.cell(65, 7, pair['with_label'][:38], 1)
+                pdf.cell(20, 7, str(pair['count']), 1, 0, 'C')
+                pdf.cell(20, 7, f"{pair['confidence']:.0%}", 1, 0, 'C')
+                pdf.cell(20, 7, f"{pair['lift']:.2f}", 1, 0, 'C')
+                pdf.ln()
+            pdf.ln(5)
+
     # --- Warranty Alerts ---
     if warranty_expiring.exists():
         pdf.add_page()
@@ -515,11 +561,69 @@ def export_report_pdf(request):
             pdf.cell(30, 8, h.get_type_display()[:15], 1)
             pdf.ln()
 
+    # --- Round Failure Analysis ---
+    if round_count > 0:
+        analytics = get_round_failure_analytics(start_date, end_date)
+        pdf.add_page()
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, '7. Mapa de Fallas de Rondas (% Regular + Malo por Área)', 0, 1, 'L', fill=True)
+        pdf.ln(2)
+
+        pdf.set_font('Arial', 'B', 7)
+        pdf.cell(35, 8, 'Área', 1)
+        pdf.cell(10, 8, 'Rondas', 1, 0, 'C')
+        for check in analytics['checks']:
+            pdf.cell(14.5, 8, check['label'][:10], 1, 0, 'C')
+        pdf.ln()
+
+        pdf.set_font('Arial', '', 7)
+        for area in analytics['areas']:
+            pdf.cell(35, 7, area['area'][:22], 1)
+            pdf.cell(10, 7, str(area['rounds']), 1, 0, 'C')
+            for cell in area['cells']:
+                rate = cell['rate']
+                if rate is None:
+                    pdf.cell(14.5, 7, '-', 1, 0, 'C')
+                    continue
+                # White to red with the failure rate.
+                shade = int(255 - 175 * min(rate * 2, 1))
+                pdf.set_fill_color(255, shade, shade)
+                pdf.cell(14.5, 7, f'{rate:.0%}', 1, 0, 'C', fill=True)
+            pdf.ln()
+        pdf.set_fill_color(240, 240, 240)
+        pdf.ln(5)
+
+        if analytics['repeat_offenders']:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.set_text_color(220, 50, 50)
+            pdf.cell(0, 10, '7.1 Equipos con Fallas Repetidas en Rondas Consecutivas', 0, 1, 'L', fill=False)
+            pdf.set_text_color(0, 0, 0)
+            pdf.ln(2)
+
+            pdf.set_font('Arial', 'B', 8)
+            pdf.cell(40, 8, 'Serial', 1)
+            pdf.cell(45, 8, 'Área', 1)
+            pdf.cell(30, 8, 'Punto', 1)
+            pdf.cell(25, 8, 'Rondas Seguidas', 1, 0, 'C')
+            pdf.cell(20, 8, 'Persiste', 1, 0, 'C')
+            pdf.cell(30, 8, 'Última Ronda', 1)
+            pdf.ln()
+
+            pdf.set_font('Arial', '', 8)
+            for offender in analytics['repeat_offenders']:
+                pdf.cell(40, 8, str(offender['serial'])[:22], 1)
+                pdf.cell(45, 8, offender['area'][:25], 1)
+                pdf.cell(30, 8, offender['label'], 1)
+                pdf.cell(25, 8, str(offender['streak']), 1, 0, 'C')
+                pdf.cell(20, 8, 'Sí' if offender['ongoing'] else 'No', 1, 0, 'C')
+                pdf.cell(30, 8, timezone.localtime(offender['last_round']).strftime('%Y-%m-%d'), 1)
+                pdf.ln()
+
     # --- Detailed Rounds Log ---
     if rounds.exists():
         pdf.add_page()
         pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 10, '7. Súper-Detalle de Rondas de Inspección', 0, 1, 'L', fill=True)
+        pdf.cell(0, 10, '7.2 Súper-Detalle de Rondas de Inspección', 0, 1, 'L', fill=True)
         pdf.ln(2)
         
         pdf.set_font('Arial', 'I', 8)
@@ -628,3 +732,71 @@ def export_report_pdf(request):
             pass
     
     return response
+
+
+@login_required
+def inventory_snapshot_view(request):
+    """Inventory as it was at a given date and time (area and status at that moment)."""
+    as_of_str = request.GET.get('as_of', '')
+    area_id = request.GET.get('area', '')
+    status = request.GET.get('status', '')
+
+    if not area_id.isdigit():
+        area_id = ''
+
+    try:
+        as_of = parse_datetime(as_of_str) if as_of_str else None
+    except ValueError:
+        # Well formatted but not a real date (e.g. month 13).
+        as_of = None
+    if as_of is None:
+        as_of = timezone.localtime().replace(second=0, microsecond=0)
+    elif timezone.is_naive(as_of):
+        as_of = timezone.make_aware(as_of, timezone.get_current_timezone())
+
+    rows = inventory_snapshot(as_of, area_id=area_id or None, status=status or None)
+    status_counts = {}
+    for row in rows:
+        label = row.get_status_display()
+        status_counts[label] = status_counts.get(label, 0) + 1
+
+    paginator = Paginator(rows, 100)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    query = request.GET.copy()
+    query.pop('page', None)
+
+    context = {
+        'page_obj': page_obj,
+        'total': len(rows),
+        'status_counts': status_counts,
+        'as_of': timezone.localtime(as_of).strftime('%Y-%m-%dT%H:%M'),
+        'areas': Area.objects.all().order_by('name'),
+        'status_choices': EQUIPMENT_STATUS_CHOICES,
+        'selected_area': area_id,
+        'selected_status': status,
+        'querystring': query.urlencode(),
+    }
+    return render(request, 'inventory/inventory_snapshot.html', context)
+
+
+@login_required
+def round_analytics_view(request):
+    """Round failure heatmap (area x checklist item) and repeat offenders of a period."""
+    start_date, end_date = _report_period(request)
+    try:
+        min_streak = max(2, int(request.GET.get('min_streak', DEFAULT_MIN_STREAK)))
+    except ValueError:
+        min_streak = DEFAULT_MIN_STREAK
+
+    analytics = get_round_failure_analytics(start_date, end_date, min_streak)
+    for area in analytics['areas']:
+        for cell in area['cells']:
+            # Cell color: transparent at 0 %, full red from 50 % failing.
+            cell['alpha'] = f"{min((cell['rate'] or 0) * 2, 1):.2f}"
+    context = {
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'min_streak': min_streak,
+        'analytics': analytics,
+    }
+    return render(request, 'inventory/round_analytics.html', context)
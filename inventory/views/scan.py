@@ -0,0 +1,54 @@
+import logging
+
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from ..caching import get_version
+from ..qr import read_scan_code
+from ..scan_index import SCAN_NAMESPACE, get_scan_card, get_scan_index
+
+logger = logging.getLogger('inventory')
+
+__all__ = ['scan_lookup_view']
+
+# Browsers may reuse a card this long before revalidating it with the ETag.
+SCAN_MAX_AGE = 30
+
+
+def _wants_json(request):
+    return request.GET.get('format') == 'json' or 'application/json' in request.headers.get('Accept', '')
+
+
+def scan_lookup_view(request, code=None):
+    """
+    Result of scanning an equipment: a minimal HTML card, or compact JSON
+    with ?format=json / Accept: application/json.
+
+    scan/<code>/ takes the signed id printed in QR labels and needs no login;
+    scan/?serial=... looks a serial up in the in-memory index (login required).
+    """
+    if code is not None:
+        pk = read_scan_code(code)
+        version = get_version(SCAN_NAMESPACE)
+    else:
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        version, index = get_scan_index()
+        pk = index.get(request.GET.get('serial', '').strip().upper())
+
+    card = get_scan_card(pk, version=version) if pk is not None else None
+    etag = quote_etag(f'{version}-{pk}')
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        status = 200 if card else 404
+        if _wants_json(request):
+            response = JsonResponse({'found': card is not None, 'equipment': card}, status=status)
+        else:
+            response = render(request, 'inventory/scan_card.html', {'card': card, 'code': code}, status=status)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=SCAN_MAX_AGE)
+    patch_vary_headers(response, ['Accept', 'Cookie'])
+    return response
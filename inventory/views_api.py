@@ -1,6 +1,15 @@
-from rest_framework import viewsets, permissions
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import Equipment, Maintenance, Handover, Area
-from .serializers import EquipmentSerializer, MaintenanceSerializer, HandoverSerializer, AreaSerializer
+from .serializers import (
+    EquipmentSerializer, MaintenanceSerializer, HandoverSerializer, AreaSerializer,
+    OfflineBatchSerializer, OFFLINE_RECORD_SERIALIZERS, ReportPeriodSerializer,
+)
+from .maintenance_analytics import get_maintenance_task_analytics
+from .services import apply_offline_records
 
 class EquipmentViewSet(viewsets.ModelViewSet):
     queryset = Equipment.objects.select_related('area', 'ownership').all().order_by('-created_at')
@@ -15,6 +24,19 @@ class MaintenanceViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['maintenance_type', 'performed_by', 'equipment']
 
+    @action(detail=False, url_path='task-analytics')
+    def task_analytics(self, request):
+        """
+        Checklist task frequency per month, area and technician, and task
+        co-occurrence, for ?start_date=&end_date= (default: this year to date).
+        """
+        period = ReportPeriodSerializer(data=request.query_params)
+        period.is_valid(raise_exception=True)
+        today = timezone.localdate()
+        start_date = period.validated_data.get('start_date') or today.replace(month=1, day=1)
+        end_date = period.validated_data.get('end_date') or today
+        return Response(get_maintenance_task_analytics(start_date, end_date))
+
 class HandoverViewSet(viewsets.ModelViewSet):
     queryset = Handover.objects.select_related(
         'source_area', 'destination_area', 'client', 'technician'
@@ -27,3 +49,50 @@ class AreaViewSet(viewsets.ModelViewSet):
     queryset = Area.objects.all().order_by('name')
     serializer_class = AreaSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+class OfflineSyncView(APIView):
+    """
+    Batched sync of records captured offline (rounds, component changes,
+    maintenance). POST {"records": [{"client_id": uuid, "kind": ..., "data": {...}}]}.
+
+    Valid records are applied in one transaction; a record already synced
+    under its client_id is reported as duplicate instead of created again.
+    The answer lists {client_id, status, id, errors} in request order, and
+    the device drops every record that is not an error.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        batch = OfflineBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        records = batch.validated_data['records']
+
+        equipment_ids = set()
+        for record in records:
+            try:
+                equipment_ids.add(int(record['data'].get('equipment')))
+            except (TypeError, ValueError):
+                pass
+        context = {'request': request, 'equipment': Equipment.objects.in_bulk(equipment_ids)}
+
+        valid, errors = [], {}
+        for record in records:
+            serializer = OFFLINE_RECORD_SERIALIZERS[record['kind']](data=record['data'], context=context)
+            if serializer.is_valid():
+                valid.append((record['client_id'], record['kind'], serializer.Meta.model(**serializer.validated_data)))
+            else:
+                errors[record['client_id']] = serializer.errors
+
+        applied = apply_offline_records(valid, user=request.user) if valid else {}
+        results = []
+        for record in records:
+            client_id = record['client_id']
+            if client_id in errors:
+                results.append({'client_id': client_id, 'status': 'error', 'id': None, 'errors': errors[client_id]})
+            else:
+                result = applied[client_id]
+                results.append({
+                    'client_id': client_id, 'status': result['status'], 'id': result['id'],
+                    'errors': {'non_field_errors': [result['error']]} if result.get('error') else {},
+                })
+        return Response({'results': results}, status=status.HTTP_200_OK)
@@ -0,0 +1,66 @@
+"""
+Search-select widgets for large FK/M2M fields.
+
+The plain Select renders one <option> per row of the field queryset, so a
+form page grows (in queries and HTML) with the inventory. These widgets only
+render the currently selected option(s); static/js/remote_select.js adds a
+search box that fetches matches from the autocomplete endpoint on demand.
+Validation is unchanged: the form field still checks the submitted pk
+against its queryset.
+"""
+from urllib.parse import urlencode
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class RemoteSelectMixin:
+    def __init__(self, source, params=None, attrs=None):
+        """source: key of AUTOCOMPLETE_SOURCES (inventory/views/autocomplete.py); params: fixed endpoint filters."""
+        super().__init__(attrs)
+        self.source = source
+        self.params = params or {}
+
+    def __deepcopy__(self, memo):
+        obj = super().__deepcopy__(memo)
+        obj.params = dict(self.params)
+        return obj
+
+    def _selected_choices(self, value):
+        field = getattr(self.choices, 'field', None)
+        selected = [v for v in value if v not in ('', None)]
+        choices = []
+        if field is not None and not self.allow_multiple_selected and field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        if field is None or not selected:
+            return choices
+        try:
+            objects = list(field.queryset.filter(pk__in=selected))
+        except (ValueError, TypeError, ValidationError):
+            return choices
+        choices.extend((field.prepare_value(obj), field.label_from_instance(obj)) for obj in objects)
+        return choices
+
+    def optgroups(self, name, value, attrs=None):
+        full_choices = self.choices
+        self.choices = self._selected_choices(value)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = full_choices
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse('inventory:autocomplete', args=[self.source])
+        if self.params:
+            attrs['data-autocomplete-params'] = urlencode(self.params)
+        return attrs
+
+
+class RemoteSelect(RemoteSelectMixin, forms.Select):
+    pass
+
+
+class RemoteSelectMultiple(RemoteSelectMixin, forms.SelectMultiple):
+    pass
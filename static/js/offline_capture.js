@@ -0,0 +1,211 @@
+/*
+ * Offline capture page (inventory/offline_capture.html).
+ *
+ * Rounds, component changes and maintenance are queued in localStorage with
+ * an id generated here, and sent in batches to the sync API, which applies
+ * each batch in one transaction and ignores ids it already has. Records the
+ * server accepted (created or duplicate) leave the queue; rejected ones stay
+ * with their errors so they can be reviewed and discarded.
+ */
+(function () {
+    const STORAGE_KEY = 'hfps-offline-queue';
+    const BATCH_SIZE = 200;
+    const KIND_LABELS = { ROUND: 'Ronda', COMPONENT_LOG: 'Cambio de Componente', MAINTENANCE: 'Mantenimiento' };
+
+    const root = document.getElementById('offline-capture');
+    if (!root) return;
+    const equipmentSelect = document.getElementById('offline-equipment');
+    const syncButton = document.getElementById('offline-sync');
+    let syncing = false;
+
+    function loadQueue() {
+        try {
+            return JSON.parse(localStorage.getItem(STORAGE_KEY)) || [];
+        } catch (e) {
+            return [];
+        }
+    }
+
+    function saveQueue(queue) {
+        localStorage.setItem(STORAGE_KEY, JSON.stringify(queue));
+        render();
+    }
+
+    function newId() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        // RFC 4122 v4 from getRandomValues (randomUUID needs a secure context).
+        const bytes = crypto.getRandomValues(new Uint8Array(16));
+        bytes[6] = (bytes[6] & 0x0f) | 0x40;
+        bytes[8] = (bytes[8] & 0x3f) | 0x80;
+        const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+        return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+    }
+
+    function csrfToken() {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        if (match) return decodeURIComponent(match[1]);
+        const input = root.querySelector('input[name=csrfmiddlewaretoken]');
+        return input ? input.value : '';
+    }
+
+    function today() {
+        const now = new Date();
+        now.setMinutes(now.getMinutes() - now.getTimezoneOffset());
+        return now.toISOString().slice(0, 10);
+    }
+
+    function readForm(form) {
+        const data = {};
+        Array.from(form.elements).forEach(el => {
+            if (!el.name) return;
+            if (el.type === 'checkbox') data[el.name] = el.checked;
+            else if (el.value !== '') data[el.name] = el.value;
+        });
+        return data;
+    }
+
+    function resetForm(form) {
+        form.reset();
+        form.querySelectorAll('[data-default=today]').forEach(el => { el.value = today(); });
+    }
+
+    function errorText(errors) {
+        if (!errors) return '';
+        return Object.entries(errors)
+            .map(([field, messages]) => (field === 'non_field_errors' ? '' : field + ': ') + [].concat(messages).join(' '))
+            .join(' | ');
+    }
+
+    function render() {
+        const queue = loadQueue();
+        document.getElementById('offline-pending').textContent = queue.length;
+        document.getElementById('offline-empty').style.display = queue.length ? 'none' : '';
+        const connection = document.getElementById('offline-connection');
+        connection.textContent = navigator.onLine ? 'En línea' : 'Sin conexión';
+        connection.style.color = navigator.onLine ? '#16a34a' : '#dc2626';
+
+        const body = document.getElementById('offline-queue');
+        body.innerHTML = '';
+        queue.forEach(record => {
+            const row = document.createElement('tr');
+            [
+                new Date(record.captured_at).toLocaleString(),
+                KIND_LABELS[record.kind],
+                record.label,
+                record.errors ? 'Rechazado: ' + errorText(record.errors) : 'Pendiente',
+            ].forEach(text => {
+                const cell = document.createElement('td');
+                cell.textContent = text;
+                if (record.errors) cell.style.color = '#dc2626';
+                row.appendChild(cell);
+            });
+            const actions = document.createElement('td');
+            const discard = document.createElement('button');
+            discard.type = 'button';
+            discard.className = 'btn btn-secondary';
+            discard.textContent = 'Descartar';
+            discard.addEventListener('click', () => {
+                if (confirm('¿Descartar este registro? No se podrá recuperar.')) {
+                    saveQueue(loadQueue().filter(r => r.client_id !== record.client_id));
+                }
+            });
+            actions.appendChild(discard);
+            row.appendChild(actions);
+            body.appendChild(row);
+        });
+    }
+
+    function capture(event) {
+        event.preventDefault();
+        const form = event.target;
+        if (!equipmentSelect.value) {
+            alert('Seleccione un equipo.');
+            equipmentSelect.focus();
+            return;
+        }
+        const kind = form.dataset.kind;
+        const now = new Date().toISOString();
+        const data = Object.assign(readForm(form), { equipment: Number(equipmentSelect.value) });
+        if (kind === 'ROUND') data.datetime = now;
+        if (kind === 'COMPONENT_LOG') data.date = now;
+
+        const queue = loadQueue();
+        queue.push({
+            client_id: newId(),
+            kind: kind,
+            data: data,
+            label: equipmentSelect.options[equipmentSelect.selectedIndex].textContent.trim(),
+            captured_at: now,
+        });
+        saveQueue(queue);
+        resetForm(form);
+        if (navigator.onLine) sync();
+    }
+
+    async function postBatch(batch) {
+        const response = await fetch(root.dataset.syncUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken() },
+            body: JSON.stringify({
+                records: batch.map(r => ({ client_id: r.client_id, kind: r.kind, data: r.data })),
+            }),
+        });
+        if (response.status === 401 || response.status === 403) {
+            throw new Error('Inicie sesión nuevamente para sincronizar.');
+        }
+        if (!response.ok) throw new Error('El servidor rechazó la sincronización (' + response.status + ').');
+        return (await response.json()).results;
+    }
+
+    async function sync() {
+        if (syncing || !navigator.onLine) return;
+        const pending = loadQueue().filter(r => !r.errors);
+        if (!pending.length) return;
+        syncing = true;
+        syncButton.disabled = true;
+        try {
+            for (let i = 0; i < pending.length; i += BATCH_SIZE) {
+                const results = await postBatch(pending.slice(i, i + BATCH_SIZE));
+                const byId = new Map(results.map(r => [r.client_id, r]));
+                // Re-read: records may have been captured while the request was in flight.
+                const queue = loadQueue().filter(record => {
+                    const result = byId.get(record.client_id);
+                    if (!result) return true;
+                    if (result.status === 'error') {
+                        record.errors = result.errors;
+                        return true;
+                    }
+                    return false;
+                });
+                saveQueue(queue);
+            }
+        } catch (error) {
+            // Network errors keep everything queued for the next attempt.
+            if (!(error instanceof TypeError)) alert(error.message);
+        } finally {
+            syncing = false;
+            syncButton.disabled = false;
+        }
+    }
+
+    root.querySelectorAll('[data-tab]').forEach(tab => {
+        tab.addEventListener('click', () => {
+            root.querySelectorAll('[data-tab]').forEach(t => t.classList.toggle('active', t === tab));
+            root.querySelectorAll('.offline-form').forEach(f => f.classList.toggle('active', f.dataset.kind === tab.dataset.tab));
+        });
+    });
+    root.querySelectorAll('.offline-form').forEach(form => {
+        resetForm(form);
+        form.addEventListener('submit', capture);
+    });
+    syncButton.addEventListener('click', sync);
+    window.addEventListener('online', () => { render(); sync(); });
+    window.addEventListener('offline', render);
+
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register(root.dataset.serviceWorker).catch(() => {});
+    }
+    render();
+    sync();
+})();
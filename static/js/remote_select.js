@@ -0,0 +1,90 @@
+/*
+ * Search box for <select data-autocomplete-url="..."> (inventory/widgets.py).
+ *
+ * The server only renders the selected option(s); matches are fetched from
+ * the autocomplete endpoint while typing. Selects added later (formset rows,
+ * equipment rows) are picked up automatically. Elements inside
+ * [data-template] are copied by other scripts and are left untouched.
+ */
+(function () {
+    const DEBOUNCE_MS = 250;
+
+    function buildUrl(select, query) {
+        const params = new URLSearchParams(select.dataset.autocompleteParams || '');
+        params.set('q', query);
+        return select.dataset.autocompleteUrl + '?' + params.toString();
+    }
+
+    function replaceOptions(select, results) {
+        // Keep the empty option and whatever is currently selected.
+        const kept = Array.from(select.options).filter(o => o.value === '' || o.selected);
+        const keptValues = new Set(kept.map(o => o.value));
+        select.innerHTML = '';
+        kept.forEach(o => select.appendChild(o));
+        results.forEach(item => {
+            if (keptValues.has(String(item.id))) return;
+            const option = document.createElement('option');
+            option.value = item.id;
+            option.textContent = item.text;
+            select.appendChild(option);
+        });
+    }
+
+    function search(select, query) {
+        fetch(buildUrl(select, query), { credentials: 'same-origin' })
+            .then(response => response.ok ? response.json() : { results: [] })
+            .then(data => {
+                // Ignore answers to queries the user already typed past.
+                if (select.dataset.remoteSelectQuery === query) replaceOptions(select, data.results);
+            });
+    }
+
+    function enhance(select) {
+        if (select.dataset.remoteSelectReady || select.closest('[data-template]')) return;
+        select.dataset.remoteSelectReady = '1';
+
+        const input = document.createElement('input');
+        input.type = 'search';
+        input.className = 'form-control remote-select-search';
+        input.placeholder = 'Buscar por serial, marca o modelo...';
+        input.autocomplete = 'off';
+        input.style.marginBottom = '0.25rem';
+        select.parentNode.insertBefore(input, select);
+
+        let timer = null;
+        let loaded = false;
+        const run = (query) => {
+            select.dataset.remoteSelectQuery = query;
+            search(select, query);
+        };
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => run(input.value.trim()), DEBOUNCE_MS);
+        });
+        // First page of results on first use, so the list is never empty.
+        const loadInitial = () => {
+            if (!loaded) {
+                loaded = true;
+                run('');
+            }
+        };
+        input.addEventListener('focus', loadInitial);
+        select.addEventListener('focus', loadInitial);
+    }
+
+    function initRemoteSelects(root) {
+        if (root.matches && root.matches('select[data-autocomplete-url]')) enhance(root);
+        if (root.querySelectorAll) root.querySelectorAll('select[data-autocomplete-url]').forEach(enhance);
+    }
+
+    window.initRemoteSelects = initRemoteSelects;
+
+    document.addEventListener('DOMContentLoaded', function () {
+        initRemoteSelects(document);
+        new MutationObserver(mutations => {
+            mutations.forEach(m => m.addedNodes.forEach(node => {
+                if (node.nodeType === Node.ELEMENT_NODE) initRemoteSelects(node);
+            }));
+        }).observe(document.body, { childList: true, subtree: true });
+    });
+})();